@@ -0,0 +1,28 @@
+"""full-text search vector on span_events
+
+Revision ID: 0005_span_event_search
+Revises: 0004_project_current_api_key
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+
+revision = "0005_span_event_search"
+down_revision = "0004_project_current_api_key"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # STORED generated column: rewrites span_events once, then Postgres maintains it on every insert.
+    op.execute(
+        "ALTER TABLE span_events ADD COLUMN search_vector tsvector "
+        "GENERATED ALWAYS AS (jsonb_to_tsvector('simple', coalesce(payload, '{}'::jsonb), '[\"string\"]')) STORED"
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_span_events_search ON span_events USING GIN (search_vector)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_span_events_search")
+    op.drop_column("span_events", "search_vector")
@@ -0,0 +1,124 @@
+"""hourly rollups for trace stats
+
+Revision ID: 0006_hourly_rollups
+Revises: 0005_span_event_search
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0006_hourly_rollups"
+down_revision = "0005_span_event_search"
+branch_labels = None
+depends_on = None
+
+
+# source table -> (rollup table, key expressions, counter expressions, bucket column)
+ROLLUPS = {
+    "traces": (
+        "trace_rollups_hourly",
+        {"status": "coalesce(status, '')", "model": "coalesce(model, '')", "environment": "coalesce(environment, '')"},
+        {"traces": "1", "open_traces": "coalesce(has_open_spans, false)::int"},
+        "start_time",
+    ),
+    "spans": ("span_rollups_hourly", {"span_type": "coalesce(span_type, '')"}, {"spans": "1"}, "start_time"),
+    "trace_decisions": ("decision_rollups_hourly", {"action": "action"}, {"decisions": "1"}, "created_at"),
+}
+
+
+def _rows(source: str, relation: str, sign: str) -> str:
+    _, keys, counters, bucket = ROLLUPS[source]
+    columns = [f"date_trunc('hour', {bucket}, 'UTC') AS bucket_start"]
+    columns += [f"{expr} AS {name}" for name, expr in keys.items()]
+    columns += [f"{sign}({expr}) AS {name}" for name, expr in counters.items()]
+    return f"SELECT project_id, {', '.join(columns)} FROM {relation}"
+
+
+def _upsert(source: str, rows_sql: str) -> str:
+    rollup, keys, counters, _ = ROLLUPS[source]
+    key_cols = ["project_id", "bucket_start", *keys]
+    sums = [f"sum({name})" for name in counters]
+    # Net deltas only: rows an UPDATE did not move between keys cancel out and are never written.
+    # ORDER BY keeps row-lock order stable so concurrent writers queue instead of deadlocking.
+    return (
+        f"INSERT INTO {rollup} AS r ({', '.join(key_cols + list(counters))}) "
+        f"SELECT {', '.join(key_cols + sums)} FROM ({rows_sql}) AS d "
+        f"GROUP BY {', '.join(key_cols)} "
+        f"HAVING {' OR '.join(f'{s} <> 0' for s in sums)} "
+        f"ORDER BY {', '.join(key_cols)} "
+        f"ON CONFLICT ({', '.join(key_cols)}) DO UPDATE SET "
+        + ", ".join(f"{name} = r.{name} + excluded.{name}" for name in counters)
+    )
+
+
+def _trigger_function(source: str) -> str:
+    inserted = _upsert(source, _rows(source, "new_rows", "+"))
+    deleted = _upsert(source, _rows(source, "old_rows", "-"))
+    updated = _upsert(source, f"{_rows(source, 'new_rows', '+')} UNION ALL {_rows(source, 'old_rows', '-')}")
+    return f"""
+        CREATE OR REPLACE FUNCTION rollup_{source}() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                {inserted};
+            ELSIF TG_OP = 'DELETE' THEN
+                {deleted};
+            ELSE
+                {updated};
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """
+
+
+def _rollup_table(name: str, keys: list[sa.Column], counters: list[str]) -> None:
+    op.create_table(
+        name,
+        sa.Column("project_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("projects.id"), nullable=False),
+        sa.Column("bucket_start", sa.DateTime(timezone=True), nullable=False),
+        *keys,
+        *(sa.Column(counter, sa.BigInteger(), nullable=False, server_default="0") for counter in counters),
+        sa.PrimaryKeyConstraint("project_id", "bucket_start", *(c.name for c in keys)),
+    )
+
+
+def upgrade() -> None:
+    _rollup_table(
+        "trace_rollups_hourly",
+        [
+            sa.Column("status", sa.String(length=32), nullable=False),
+            sa.Column("model", sa.String(length=128), nullable=False),
+            sa.Column("environment", sa.String(length=64), nullable=False),
+        ],
+        ["traces", "open_traces"],
+    )
+    _rollup_table("span_rollups_hourly", [sa.Column("span_type", sa.String(length=64), nullable=False)], ["spans"])
+    _rollup_table("decision_rollups_hourly", [sa.Column("action", sa.String(length=32), nullable=False)], ["decisions"])
+
+    for source in ROLLUPS:
+        op.execute(_trigger_function(source))
+        # transition tables require one trigger per event; all three share the function
+        for event, referencing in (
+            ("INSERT", "NEW TABLE AS new_rows"),
+            ("UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+            ("DELETE", "OLD TABLE AS old_rows"),
+        ):
+            op.execute(
+                f"CREATE TRIGGER rollup_{source}_{event.lower()} AFTER {event} ON {source} "
+                f"REFERENCING {referencing} FOR EACH STATEMENT EXECUTE FUNCTION rollup_{source}()"
+            )
+        # the triggers lock the source table against writes until commit, so nothing is counted twice
+        op.execute(_upsert(source, _rows(source, source, "+")))
+
+
+def downgrade() -> None:
+    for source in ROLLUPS:
+        for event in ("insert", "update", "delete"):
+            op.execute(f"DROP TRIGGER IF EXISTS rollup_{source}_{event} ON {source}")
+        op.execute(f"DROP FUNCTION IF EXISTS rollup_{source}()")
+    op.drop_table("decision_rollups_hourly")
+    op.drop_table("span_rollups_hourly")
+    op.drop_table("trace_rollups_hourly")
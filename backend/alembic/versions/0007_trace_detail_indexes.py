@@ -0,0 +1,29 @@
+"""per-trace indexes for the detail loader
+
+Revision ID: 0007_trace_detail_indexes
+Revises: 0006_hourly_rollups
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+
+revision = "0007_trace_detail_indexes"
+down_revision = "0006_hourly_rollups"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # (event_time, id) matches the timeline keyset, so pages stream from the index without a sort.
+    op.create_index("ix_span_events_trace_time", "span_events", ["trace_id", "event_time", "id"], unique=False)
+    op.create_index("ix_evaluations_trace", "evaluations", ["trace_id", "created_at"], unique=False)
+    op.create_index("ix_trace_decisions_trace", "trace_decisions", ["trace_id", "created_at"], unique=False)
+    op.create_index("ix_judge_runs_trace", "judge_runs", ["trace_id", "created_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_judge_runs_trace", table_name="judge_runs")
+    op.drop_index("ix_trace_decisions_trace", table_name="trace_decisions")
+    op.drop_index("ix_evaluations_trace", table_name="evaluations")
+    op.drop_index("ix_span_events_trace_time", table_name="span_events")
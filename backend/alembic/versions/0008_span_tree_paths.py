@@ -0,0 +1,61 @@
+"""materialized span tree: path, depth, child_count
+
+Revision ID: 0008_span_tree_paths
+Revises: 0007_trace_detail_indexes
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0008_span_tree_paths"
+down_revision = "0007_trace_detail_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # children may be ingested before their parent (allow_missing_parent); ingest grafts them later
+    op.drop_constraint("spans_parent_span_id_fkey", "spans", type_="foreignkey")
+    op.add_column("spans", sa.Column("path", postgresql.ARRAY(postgresql.UUID(as_uuid=True)), nullable=True))
+    op.add_column("spans", sa.Column("depth", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("spans", sa.Column("child_count", sa.Integer(), nullable=False, server_default="0"))
+
+    op.execute(
+        """
+        WITH RECURSIVE tree(id, path) AS (
+            SELECT s.id, ARRAY[s.id]
+            FROM spans s
+            WHERE s.parent_span_id IS NULL OR NOT EXISTS (SELECT 1 FROM spans p WHERE p.id = s.parent_span_id)
+            UNION ALL
+            SELECT c.id, t.path || c.id
+            FROM spans c JOIN tree t ON c.parent_span_id = t.id
+            WHERE NOT c.id = ANY(t.path)
+        )
+        UPDATE spans s SET path = tree.path, depth = cardinality(tree.path) - 1
+        FROM tree WHERE s.id = tree.id
+        """
+    )
+    # spans caught in a parent cycle are unreachable from any root
+    op.execute("UPDATE spans SET path = ARRAY[id] WHERE path IS NULL")
+    op.execute(
+        """
+        UPDATE spans s SET child_count = c.n
+        FROM (SELECT parent_span_id, count(*) AS n FROM spans WHERE parent_span_id IS NOT NULL GROUP BY parent_span_id) c
+        WHERE s.id = c.parent_span_id
+        """
+    )
+    op.alter_column("spans", "path", nullable=False)
+    op.execute("CREATE INDEX IF NOT EXISTS ix_spans_path ON spans USING GIN (path)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_spans_path")
+    op.drop_column("spans", "child_count")
+    op.drop_column("spans", "depth")
+    op.drop_column("spans", "path")
+    # orphans whose parent never arrived would violate the restored constraint
+    op.execute("UPDATE spans s SET parent_span_id = NULL WHERE NOT EXISTS (SELECT 1 FROM spans p WHERE p.id = s.parent_span_id)")
+    op.create_foreign_key("spans_parent_span_id_fkey", "spans", "spans", ["parent_span_id"], ["id"])
@@ -0,0 +1,34 @@
+"""cache of per-trace latency analyses
+
+Revision ID: 0009_trace_latency_cache
+Revises: 0008_span_tree_paths
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0009_trace_latency_cache"
+down_revision = "0008_span_tree_paths"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "trace_latency_analyses",
+        sa.Column("trace_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("project_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("total_spans", sa.Integer(), nullable=False),
+        sa.Column("analysis", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("computed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["project_id"], ["projects.id"]),
+        sa.ForeignKeyConstraint(["trace_id"], ["traces.id"]),
+        sa.PrimaryKeyConstraint("trace_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("trace_latency_analyses")
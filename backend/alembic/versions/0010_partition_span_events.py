@@ -0,0 +1,115 @@
+"""partition span_events by day and add per-project retention
+
+Revision ID: 0010_partition_span_events
+Revises: 0009_trace_latency_cache
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0010_partition_span_events"
+down_revision = "0009_trace_latency_cache"
+branch_labels = None
+depends_on = None
+
+
+COLUMNS = "id, project_id, trace_id, span_id, event_type, event_time, payload, idempotency_key, created_at"
+PREMAKE_DAYS = 7
+
+CREATE_COLUMNS = """
+    id uuid NOT NULL,
+    project_id uuid NOT NULL REFERENCES projects (id),
+    trace_id uuid NOT NULL REFERENCES traces (id),
+    span_id uuid REFERENCES spans (id),
+    event_type varchar(64) NOT NULL,
+    event_time timestamptz NOT NULL,
+    payload jsonb,
+    idempotency_key varchar(255) NOT NULL,
+    created_at timestamptz,
+    search_vector tsvector GENERATED ALWAYS AS (jsonb_to_tsvector('simple', coalesce(payload, '{}'::jsonb), '["string"]')) STORED
+"""
+
+
+def upgrade() -> None:
+    op.add_column("projects", sa.Column("retention_days", sa.Integer(), nullable=True))
+
+    # Index names are schema-wide, so move the old ones out of the way before recreating them.
+    op.execute("ALTER TABLE span_events RENAME TO span_events_unpartitioned")
+    op.execute("ALTER TABLE span_events_unpartitioned RENAME CONSTRAINT span_events_pkey TO span_events_unpartitioned_pkey")
+    op.execute(
+        "ALTER TABLE span_events_unpartitioned RENAME CONSTRAINT uq_span_events_project_idempotency "
+        "TO uq_span_events_unpartitioned_idempotency"
+    )
+    op.execute("ALTER INDEX ix_span_events_search RENAME TO ix_span_events_unpartitioned_search")
+    op.execute("ALTER INDEX ix_span_events_trace_time RENAME TO ix_span_events_unpartitioned_trace_time")
+
+    # Unique constraints on a partitioned table must contain the partition key: an idempotency key
+    # now dedupes per (project, key, event_time), which is what SDK retries resend.
+    op.execute(
+        f"""
+        CREATE TABLE span_events ({CREATE_COLUMNS},
+            CONSTRAINT span_events_pkey PRIMARY KEY (id, event_time),
+            CONSTRAINT uq_span_events_project_idempotency UNIQUE (project_id, idempotency_key, event_time)
+        ) PARTITION BY RANGE (event_time)
+        """
+    )
+    op.execute("CREATE INDEX ix_span_events_search ON span_events USING GIN (search_vector)")
+    op.execute("CREATE INDEX ix_span_events_trace_time ON span_events (trace_id, event_time, id)")
+    # catches timestamps outside the daily partitions; maintenance moves them out when it creates a day
+    op.execute("CREATE TABLE span_events_default PARTITION OF span_events DEFAULT")
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            day date;
+        BEGIN
+            FOR day IN
+                SELECT generate_series(
+                    coalesce((SELECT min(event_time AT TIME ZONE 'UTC')::date FROM span_events_unpartitioned), current_date),
+                    (now() AT TIME ZONE 'UTC')::date + {PREMAKE_DAYS},
+                    interval '1 day'
+                )::date
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF span_events FOR VALUES FROM (%L) TO (%L)',
+                    'span_events_p' || to_char(day, 'YYYYMMDD'),
+                    day::timestamp AT TIME ZONE 'UTC',
+                    (day + 1)::timestamp AT TIME ZONE 'UTC'
+                );
+            END LOOP;
+        END
+        $$
+        """
+    )
+    op.execute(f"INSERT INTO span_events ({COLUMNS}) SELECT {COLUMNS} FROM span_events_unpartitioned")
+    op.execute("DROP TABLE span_events_unpartitioned")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE span_events RENAME TO span_events_partitioned")
+    op.execute("ALTER INDEX ix_span_events_search RENAME TO ix_span_events_partitioned_search")
+    op.execute("ALTER INDEX ix_span_events_trace_time RENAME TO ix_span_events_partitioned_trace_time")
+    op.execute("ALTER TABLE span_events_partitioned RENAME CONSTRAINT span_events_pkey TO span_events_partitioned_pkey")
+    op.execute(
+        "ALTER TABLE span_events_partitioned RENAME CONSTRAINT uq_span_events_project_idempotency "
+        "TO uq_span_events_partitioned_idempotency"
+    )
+    op.execute(
+        f"""
+        CREATE TABLE span_events ({CREATE_COLUMNS},
+            CONSTRAINT span_events_pkey PRIMARY KEY (id),
+            CONSTRAINT uq_span_events_project_idempotency UNIQUE (project_id, idempotency_key)
+        )
+        """
+    )
+    op.execute("CREATE INDEX ix_span_events_search ON span_events USING GIN (search_vector)")
+    op.execute("CREATE INDEX ix_span_events_trace_time ON span_events (trace_id, event_time, id)")
+    # keys that only differed by event_time collapse to their earliest event
+    op.execute(
+        f"INSERT INTO span_events ({COLUMNS}) SELECT {COLUMNS} FROM span_events_partitioned "
+        "ORDER BY event_time ON CONFLICT DO NOTHING"
+    )
+    op.execute("DROP TABLE span_events_partitioned CASCADE")
+    op.drop_column("projects", "retention_days")
@@ -0,0 +1,25 @@
+"""blob references for offloaded trace text
+
+Revision ID: 0011_trace_text_blobs
+Revises: 0010_partition_span_events
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0011_trace_text_blobs"
+down_revision = "0010_partition_span_events"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("traces", sa.Column("input_text_blob", sa.String(length=64), nullable=True))
+    op.add_column("traces", sa.Column("output_text_blob", sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("traces", "output_text_blob")
+    op.drop_column("traces", "input_text_blob")
@@ -0,0 +1,51 @@
+"""batch decision jobs
+
+Revision ID: 0012_decision_jobs
+Revises: 0011_trace_text_blobs
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0012_decision_jobs"
+down_revision = "0011_trace_text_blobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "decision_jobs",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("project_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("status", sa.String(length=32), nullable=True),
+        sa.Column("policy_version_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("trace_ids", postgresql.ARRAY(postgresql.UUID(as_uuid=True)), nullable=False),
+        sa.Column("total", sa.Integer(), nullable=True),
+        sa.Column("processed", sa.Integer(), nullable=True),
+        sa.Column("decided", sa.Integer(), nullable=True),
+        sa.Column("cached", sa.Integer(), nullable=True),
+        sa.Column("skipped", sa.Integer(), nullable=True),
+        sa.Column("failed", sa.Integer(), nullable=True),
+        sa.Column("actions", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column("errors", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("heartbeat_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["policy_version_id"], ["policy_versions.id"]),
+        sa.ForeignKeyConstraint(["project_id"], ["projects.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_decision_jobs_status", "decision_jobs", ["status", "created_at"])
+    op.create_index("ix_decision_jobs_project", "decision_jobs", ["project_id", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_decision_jobs_project", table_name="decision_jobs")
+    op.drop_index("ix_decision_jobs_status", table_name="decision_jobs")
+    op.drop_table("decision_jobs")
@@ -0,0 +1,24 @@
+"""indexes for judge_cache TTL and size sweeps
+
+Revision ID: 0013_judge_cache_sweep_indexes
+Revises: 0012_decision_jobs
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+
+revision = "0013_judge_cache_sweep_indexes"
+down_revision = "0012_decision_jobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_judge_cache_created", "judge_cache", ["created_at"])
+    op.create_index("ix_judge_cache_project_created", "judge_cache", ["project_id", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_judge_cache_project_created", table_name="judge_cache")
+    op.drop_index("ix_judge_cache_created", table_name="judge_cache")
@@ -0,0 +1,30 @@
+"""per-project judge routing and judge run timing
+
+Revision ID: 0014_judge_routing
+Revises: 0013_judge_cache_sweep_indexes
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0014_judge_routing"
+down_revision = "0013_judge_cache_sweep_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("projects", sa.Column("judge_routing", postgresql.JSONB(), nullable=True))
+    op.add_column("judge_runs", sa.Column("started_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column("judge_runs", sa.Column("latency_ms", sa.Float(), nullable=True))
+    op.add_column("judge_runs", sa.Column("cost", sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("judge_runs", "cost")
+    op.drop_column("judge_runs", "latency_ms")
+    op.drop_column("judge_runs", "started_at")
+    op.drop_column("projects", "judge_routing")
@@ -0,0 +1,34 @@
+"""versioned heuristic judge pattern sets
+
+Revision ID: 0015_heuristic_pattern_sets
+Revises: 0014_judge_routing
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0015_heuristic_pattern_sets"
+down_revision = "0014_judge_routing"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "heuristic_pattern_sets",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("project_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("patterns", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["project_id"], ["projects.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("project_id", "version", name="uq_heuristic_pattern_sets_project_version"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("heuristic_pattern_sets")
@@ -0,0 +1,38 @@
+"""webhook notification outbox
+
+Revision ID: 0016_notification_outbox
+Revises: 0015_heuristic_pattern_sets
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0016_notification_outbox"
+down_revision = "0015_heuristic_pattern_sets"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("notifications", sa.Column("attempts", sa.Integer(), server_default="0", nullable=False))
+    op.add_column("notifications", sa.Column("next_attempt_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column("notifications", sa.Column("last_attempt_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column("notifications", sa.Column("delivered_at", sa.DateTime(timezone=True), nullable=True))
+    # deliveries that failed inline were never retried; they become dead letters that can be requeued
+    op.execute("UPDATE notifications SET status = 'dead', attempts = 1 WHERE status = 'failed'")
+    op.execute("UPDATE notifications SET attempts = 1, delivered_at = created_at WHERE status = 'sent'")
+    op.execute("UPDATE notifications SET next_attempt_at = now() WHERE status = 'pending'")
+    op.create_index("ix_notifications_due", "notifications", ["status", "next_attempt_at"])
+    op.create_index("ix_notifications_project", "notifications", ["project_id", "status", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_notifications_project", table_name="notifications")
+    op.drop_index("ix_notifications_due", table_name="notifications")
+    op.execute("UPDATE notifications SET status = 'failed' WHERE status = 'dead'")
+    op.drop_column("notifications", "delivered_at")
+    op.drop_column("notifications", "last_attempt_at")
+    op.drop_column("notifications", "next_attempt_at")
+    op.drop_column("notifications", "attempts")
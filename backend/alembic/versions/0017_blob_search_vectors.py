@@ -0,0 +1,31 @@
+"""search vectors for offloaded text
+
+Revision ID: 0017_blob_search_vectors
+Revises: 0016_notification_outbox
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0017_blob_search_vectors"
+down_revision = "0016_notification_outbox"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # rows offloaded before this revision stay searchable by their preview / references only
+    op.add_column("traces", sa.Column("blob_search_vector", postgresql.TSVECTOR(), nullable=True))
+    op.add_column("span_events", sa.Column("blob_search_vector", postgresql.TSVECTOR(), nullable=True))
+    op.execute("CREATE INDEX ix_traces_blob_search ON traces USING GIN (blob_search_vector)")
+    op.execute("CREATE INDEX ix_span_events_blob_search ON span_events USING GIN (blob_search_vector)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_span_events_blob_search")
+    op.execute("DROP INDEX IF EXISTS ix_traces_blob_search")
+    op.drop_column("span_events", "blob_search_vector")
+    op.drop_column("traces", "blob_search_vector")
@@ -1,11 +1,14 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_project
-from app.db.session import get_db
-from app.models import Project
-from app.schemas.decision import DecideRequest
+from app.db.session import get_async_db
+from app.schemas.decision import BatchDecideRequest, DecideRequest, DecisionJobOut
+from app.services.decision_job_service import DecisionJobService
 from app.services.decision_service import DecisionService
+from app.services.project_cache import ProjectSnapshot
 
 
 router = APIRouter(prefix="/api/v1", tags=["decision"])
@@ -14,8 +17,49 @@ router = APIRouter(prefix="/api/v1", tags=["decision"])
 @router.post("/decide")
 async def decide(
     payload: DecideRequest,
-    project: Project = Depends(get_project),
-    db: Session = Depends(get_db),
+    project: ProjectSnapshot = Depends(get_project),
+    db: AsyncSession = Depends(get_async_db),
 ):
     service = DecisionService(db, project.id)
     return await service.decide(payload)
+
+
+@router.post("/decide/batch", status_code=202, response_model=DecisionJobOut)
+async def decide_batch(
+    payload: BatchDecideRequest,
+    project: ProjectSnapshot = Depends(get_project),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = DecisionJobService(db, project.id)
+    return await service.create_job(payload)
+
+
+@router.get("/decide/jobs", response_model=list[DecisionJobOut])
+async def list_decision_jobs(
+    status: str | None = Query(default=None),
+    limit: int = Query(default=20, ge=1, le=100),
+    project: ProjectSnapshot = Depends(get_project),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = DecisionJobService(db, project.id)
+    return await service.list_jobs(status, limit)
+
+
+@router.get("/decide/jobs/{job_id}", response_model=DecisionJobOut)
+async def get_decision_job(
+    job_id: UUID,
+    project: ProjectSnapshot = Depends(get_project),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = DecisionJobService(db, project.id)
+    return await service.get_job(job_id)
+
+
+@router.post("/decide/jobs/{job_id}/cancel", response_model=DecisionJobOut)
+async def cancel_decision_job(
+    job_id: UUID,
+    project: ProjectSnapshot = Depends(get_project),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = DecisionJobService(db, project.id)
+    return await service.cancel_job(job_id)
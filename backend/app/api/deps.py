@@ -3,11 +3,12 @@ from uuid import UUID
 
 from fastapi import Depends, Header, HTTPException, status
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.db.session import get_db
+from app.db.session import get_async_db
 from app.models import Project
+from app.services.project_cache import ProjectSnapshot, project_cache
 
 
 def _is_admin_key(x_api_key: str) -> bool:
@@ -21,8 +22,8 @@ def _is_admin_key(x_api_key: str) -> bool:
 async def get_project(
     x_api_key: str | None = Header(default=None),
     x_project_id: str | None = Header(default=None),
-    db: Session = Depends(get_db),
-) -> Project:
+    db: AsyncSession = Depends(get_async_db),
+) -> ProjectSnapshot:
     if not x_api_key:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing API key")
 
@@ -31,23 +32,37 @@ async def get_project(
             project_id = UUID(x_project_id)
         except Exception as exc:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid x-project-id") from exc
-        project = db.get(Project, project_id)
-        if not project:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+        cache_key = f"id:{project_id}"
+        project = project_cache.get(cache_key)
+        if project is None:
+            row = await db.get(Project, project_id)
+            if not row:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+            project = _snapshot(row)
+            project_cache.put(cache_key, project)
         if not project.is_active:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Project is inactive")
         return project
 
     key_hash = hashlib.sha256(x_api_key.encode("utf-8")).hexdigest()
-    project = db.scalar(select(Project).where(Project.api_key_hash == key_hash, Project.is_active.is_(True)))
-    if not project:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid API key")
+    cache_key = f"key:{key_hash}"
+    project = project_cache.get(cache_key)
+    if project is None:
+        row = await db.scalar(select(Project).where(Project.api_key_hash == key_hash, Project.is_active.is_(True)))
+        if not row:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid API key")
+        project = _snapshot(row)
+        project_cache.put(cache_key, project)
 
     if x_project_id and str(project.id) != x_project_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Project scope mismatch")
     return project
 
 
+def _snapshot(project: Project) -> ProjectSnapshot:
+    return ProjectSnapshot(id=project.id, is_active=bool(project.is_active), key_activated=bool(project.key_activated))
+
+
 async def require_admin(
     x_api_key: str | None = Header(default=None),
 ) -> bool:
@@ -59,8 +74,8 @@ async def require_admin(
 
 
 async def get_project_for_ingest(
-    project: Project = Depends(get_project),
-) -> Project:
+    project: ProjectSnapshot = Depends(get_project),
+) -> ProjectSnapshot:
     if not project.key_activated:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -1,24 +1,24 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_project_for_ingest
-from app.db.session import get_db
-from app.models import Project
+from app.db.session import get_async_db
 from app.schemas.eval import EvalCreateRequest
 from app.services.eval_service import EvalService
+from app.services.project_cache import ProjectSnapshot
 
 
 router = APIRouter(prefix="/api/v1", tags=["evals"])
 
 
 @router.post("/evals")
-def create_eval(
+async def create_eval(
     payload: EvalCreateRequest,
-    project: Project = Depends(get_project_for_ingest),
-    db: Session = Depends(get_db),
+    project: ProjectSnapshot = Depends(get_project_for_ingest),
+    db: AsyncSession = Depends(get_async_db),
 ):
     service = EvalService(db, project.id)
-    row = service.create_eval(payload)
+    row = await service.create_eval(payload)
     return {
         "id": str(row.id),
         "trace_id": str(row.trace_id) if row.trace_id else None,
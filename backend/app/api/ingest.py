@@ -1,41 +1,77 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_project_for_ingest
-from app.db.session import get_db
-from app.models import Project
+from app.api.wire import COMPACT_SPANS_VERSION, MSGPACK_CONTENT_TYPES, DecodingRoute, supported_encodings
+from app.core.config import settings
+from app.db.session import get_async_db
 from app.schemas.ingest import IngestSpansRequest, IngestTraceBatchRequest, LangGraphRunIn
+from app.services.ingest_queue import IngestQueueFull, get_ingest_queue, queue_enabled
+from app.services.project_cache import ProjectSnapshot
 from app.services.trace_service import TraceService
 
 
-router = APIRouter(prefix="/api/v1/ingest", tags=["ingest"])
+router = APIRouter(prefix="/api/v1/ingest", tags=["ingest"], route_class=DecodingRoute)
+
+
+async def _enqueue(kind: str, project: ProjectSnapshot, payload: BaseModel, wait: bool):
+    queue = get_ingest_queue()
+    try:
+        offset = await run_in_threadpool(queue.enqueue, kind, project.id, payload.model_dump(mode="json"))
+    except IngestQueueFull as exc:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(exc), headers={"Retry-After": "1"})
+    if wait and await queue.wait_committed(offset, settings.ingest_queue_wait_timeout_sec):
+        return {"queued": True, "offset": offset, "committed": True}
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"queued": True, "offset": offset, "committed": False},
+    )
+
+
+@router.get("/formats")
+async def ingest_formats():
+    """Wire formats this server decodes; the SDK reads it once to pick an encoding."""
+    return {
+        "content_types": ["application/json", *MSGPACK_CONTENT_TYPES],
+        "content_encodings": supported_encodings(),
+        "compact_spans_version": COMPACT_SPANS_VERSION,
+    }
 
 
 @router.post("/traces")
-def ingest_traces(
+async def ingest_traces(
     payload: IngestTraceBatchRequest,
-    project: Project = Depends(get_project_for_ingest),
-    db: Session = Depends(get_db),
+    wait: bool = Query(default=False, description="queue mode only: block until the batch is written"),
+    project: ProjectSnapshot = Depends(get_project_for_ingest),
+    db: AsyncSession = Depends(get_async_db),
 ):
+    if queue_enabled():
+        return await _enqueue("traces", project, payload, wait)
     service = TraceService(db, project.id)
-    return service.ingest_trace_batch(payload)
+    return await service.ingest_trace_batch(payload)
 
 
 @router.post("/spans")
-def ingest_spans(
+async def ingest_spans(
     payload: IngestSpansRequest,
-    project: Project = Depends(get_project_for_ingest),
-    db: Session = Depends(get_db),
+    wait: bool = Query(default=False, description="queue mode only: block until the batch is written"),
+    project: ProjectSnapshot = Depends(get_project_for_ingest),
+    db: AsyncSession = Depends(get_async_db),
 ):
+    if queue_enabled():
+        return await _enqueue("spans", project, payload, wait)
     service = TraceService(db, project.id)
-    return service.ingest_span_events(payload)
+    return await service.ingest_span_events(payload)
 
 
 @router.post("/langgraph-runs")
-def ingest_langgraph_runs(
+async def ingest_langgraph_runs(
     payload: LangGraphRunIn,
-    project: Project = Depends(get_project_for_ingest),
-    db: Session = Depends(get_db),
+    project: ProjectSnapshot = Depends(get_project_for_ingest),
+    db: AsyncSession = Depends(get_async_db),
 ):
     service = TraceService(db, project.id)
-    return service.ingest_langgraph_run(payload)
+    return await service.ingest_langgraph_run(payload)
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_project
+from app.db.session import get_async_db
+from app.schemas.judge import HeuristicPatternSetIn, HeuristicPatternSetOut
+from app.services.pattern_set_service import PatternSetService
+from app.services.project_cache import ProjectSnapshot
+
+
+router = APIRouter(prefix="/api/v1/judges", tags=["judges"])
+
+
+@router.get("/heuristic-patterns", response_model=HeuristicPatternSetOut)
+async def get_heuristic_patterns(
+    project: ProjectSnapshot = Depends(get_project),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = PatternSetService(db, project.id)
+    return await service.current()
+
+
+@router.put("/heuristic-patterns", response_model=HeuristicPatternSetOut)
+async def put_heuristic_patterns(
+    payload: HeuristicPatternSetIn,
+    project: ProjectSnapshot = Depends(get_project),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = PatternSetService(db, project.id)
+    return await service.create_version(payload)
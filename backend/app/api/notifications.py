@@ -0,0 +1,35 @@
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_project
+from app.db.session import get_async_db
+from app.schemas.case import NotificationOut
+from app.services.notification_service import NotificationService
+from app.services.project_cache import ProjectSnapshot
+
+
+router = APIRouter(prefix="/api/v1/notifications", tags=["notifications"])
+
+
+@router.get("", response_model=list[NotificationOut])
+async def list_notifications(
+    status: str | None = Query(default=None),
+    case_id: UUID | None = Query(default=None),
+    limit: int = Query(default=50, ge=1, le=500),
+    project: ProjectSnapshot = Depends(get_project),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = NotificationService(db, project.id)
+    return await service.list_notifications(status, case_id, limit)
+
+
+@router.post("/{notification_id}/retry", response_model=NotificationOut)
+async def retry_notification(
+    notification_id: UUID,
+    project: ProjectSnapshot = Depends(get_project),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = NotificationService(db, project.id)
+    return await service.retry(notification_id)
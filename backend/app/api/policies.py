@@ -1,54 +1,68 @@
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_project
-from app.db.session import get_db
-from app.models import Project
+from app.db.session import get_async_db
 from app.schemas.policy import PolicyCreateRequest
+from app.services.backtest_service import BacktestService
 from app.services.policy_service import PolicyService
+from app.services.project_cache import ProjectSnapshot
 
 
 router = APIRouter(prefix="/api/v1/policies", tags=["policies"])
 
 
 @router.post("")
-def create_policy(
+async def create_policy(
     payload: PolicyCreateRequest,
-    project: Project = Depends(get_project),
-    db: Session = Depends(get_db),
+    project: ProjectSnapshot = Depends(get_project),
+    db: AsyncSession = Depends(get_async_db),
 ):
     service = PolicyService(db, project.id)
-    policy, version = service.create_policy(payload)
+    policy, version = await service.create_policy(payload)
     return {"policy": policy, "version": version}
 
 
 @router.get("")
-def list_policies(
-    project: Project = Depends(get_project),
-    db: Session = Depends(get_db),
+async def list_policies(
+    project: ProjectSnapshot = Depends(get_project),
+    db: AsyncSession = Depends(get_async_db),
 ):
     service = PolicyService(db, project.id)
-    return service.list_policies()
+    return await service.list_policies()
 
 
 @router.get("/{policy_id}/versions")
-def list_policy_versions(
+async def list_policy_versions(
     policy_id: UUID,
-    project: Project = Depends(get_project),
-    db: Session = Depends(get_db),
+    project: ProjectSnapshot = Depends(get_project),
+    db: AsyncSession = Depends(get_async_db),
 ):
     service = PolicyService(db, project.id)
-    return service.get_versions(policy_id)
+    return await service.get_versions(policy_id)
 
 
 @router.post("/{policy_id}/activate")
-def activate_policy(
+async def activate_policy(
     policy_id: UUID,
     version: int = Query(..., ge=1),
-    project: Project = Depends(get_project),
-    db: Session = Depends(get_db),
+    project: ProjectSnapshot = Depends(get_project),
+    db: AsyncSession = Depends(get_async_db),
 ):
     service = PolicyService(db, project.id)
-    return service.activate(policy_id, version)
+    return await service.activate(policy_id, version)
+
+
+@router.get("/{policy_id}/backtest")
+async def backtest_policy(
+    policy_id: UUID,
+    version: int = Query(..., ge=1),
+    last_days: int = Query(default=30, ge=1, le=365),
+    max_traces: int = Query(default=1_000_000, ge=1, le=5_000_000),
+    project: ProjectSnapshot = Depends(get_project),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = BacktestService(db, project.id)
+    return await service.backtest(policy_id, version, last_days, max_traces)
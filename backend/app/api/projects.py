@@ -5,7 +5,14 @@ from sqlalchemy.orm import Session
 
 from app.api.deps import require_admin
 from app.db.session import get_db
-from app.schemas.project import ProjectCreateIn, ProjectCreateOut, ProjectCurrentKeyOut, ProjectListItem
+from app.schemas.project import (
+    ProjectCreateIn,
+    ProjectCreateOut,
+    ProjectCurrentKeyOut,
+    ProjectJudgeRoutingIn,
+    ProjectListItem,
+    ProjectRetentionIn,
+)
 from app.services.project_service import ProjectService
 
 
@@ -47,6 +54,26 @@ def get_current_key(
     return service.get_current_key(project_id)
 
 
+@router.put("/{project_id}/retention", dependencies=[Depends(require_admin)])
+def set_project_retention(
+    project_id: UUID,
+    payload: ProjectRetentionIn,
+    db: Session = Depends(get_db),
+):
+    service = ProjectService(db)
+    return service.set_retention(project_id, payload.retention_days)
+
+
+@router.put("/{project_id}/judge-routing", dependencies=[Depends(require_admin)])
+def set_project_judge_routing(
+    project_id: UUID,
+    payload: ProjectJudgeRoutingIn,
+    db: Session = Depends(get_db),
+):
+    service = ProjectService(db)
+    return service.set_judge_routing(project_id, payload.judge_routing)
+
+
 @router.post("/{project_id}/deactivate", dependencies=[Depends(require_admin)])
 def deactivate_project(
     project_id: UUID,
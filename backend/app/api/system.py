@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends
+
+from app.api.deps import require_admin
+from app.core.config import settings
+from app.judge.registry import judge_registry
+from app.services.ingest_queue import get_ingest_queue, queue_enabled
+from app.services.judge_cache import judge_cache
+from app.services.notification_service import notification_dispatcher
+from app.services.project_cache import project_cache
+
+
+router = APIRouter(prefix="/api/v1/system", tags=["system"])
+
+
+@router.get("/metrics", dependencies=[Depends(require_admin)])
+def get_metrics():
+    return {
+        "ingest_queue": {"mode": settings.ingest_mode, **(get_ingest_queue().stats() if queue_enabled() else {})},
+        "project_cache": project_cache.stats(),
+        "judge_cache": judge_cache.stats(),
+        "judges": judge_registry.stats(),
+        "notifications": notification_dispatcher.stats(),
+    }
@@ -1,20 +1,22 @@
 from datetime import datetime
+from typing import Literal
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_project
-from app.db.session import get_db
-from app.models import Project
-from app.services.trace_service import TraceService
+from app.db.session import get_async_db
+from app.services.latency_service import LatencyService
+from app.services.project_cache import ProjectSnapshot
+from app.services.trace_service import DEFAULT_TIMELINE_LIMIT, TraceService
 
 
 router = APIRouter(prefix="/api/v1/traces", tags=["traces"])
 
 
 @router.get("")
-def list_traces(
+async def list_traces(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     start_time: datetime | None = None,
@@ -26,11 +28,14 @@ def list_traces(
     user_id: str | None = None,
     session_id: str | None = None,
     search: str | None = None,
-    project: Project = Depends(get_project),
-    db: Session = Depends(get_db),
+    cursor: str | None = Query(default=None, description="next_cursor from the previous page; overrides page"),
+    count: Literal["exact", "estimate", "none"] = "exact",
+    sort: Literal["relevance", "time"] | None = None,
+    project: ProjectSnapshot = Depends(get_project),
+    db: AsyncSession = Depends(get_async_db),
 ):
     service = TraceService(db, project.id)
-    return service.list_traces(
+    return await service.list_traces(
         page=page,
         page_size=page_size,
         start_time=start_time,
@@ -42,24 +47,118 @@ def list_traces(
         user_id=user_id,
         session_id=session_id,
         search=search,
+        cursor=cursor,
+        count=count,
+        sort=sort,
     )
 
 
 @router.get("/stats/overview")
-def get_trace_stats(
+async def get_trace_stats(
     last_hours: int = Query(default=24, ge=1, le=168),
-    project: Project = Depends(get_project),
-    db: Session = Depends(get_db),
+    project: ProjectSnapshot = Depends(get_project),
+    db: AsyncSession = Depends(get_async_db),
 ):
     service = TraceService(db, project.id)
-    return service.trace_stats(last_hours=last_hours)
+    return await service.trace_stats(last_hours=last_hours)
+
+
+@router.get("/stats/latency")
+async def get_latency_stats(
+    last_hours: int = Query(default=24, ge=1, le=168),
+    group_by: Literal["name", "node_name", "span_type"] = "name",
+    max_traces: int = Query(default=5000, ge=1, le=50_000),
+    project: ProjectSnapshot = Depends(get_project),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = LatencyService(db, project.id)
+    return await service.project_latency(last_hours=last_hours, group_by=group_by, max_traces=max_traces)
+
+
+@router.get("/blobs/{digest}")
+async def get_blob(
+    digest: str,
+    project: ProjectSnapshot = Depends(get_project),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = TraceService(db, project.id)
+    return await service.get_blob(digest)
+
+
+@router.get("/{trace_id}/latency")
+async def get_trace_latency(
+    trace_id: UUID,
+    project: ProjectSnapshot = Depends(get_project),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = LatencyService(db, project.id)
+    return await service.trace_latency(trace_id)
 
 
 @router.get("/{trace_id}")
-def get_trace_detail(
+async def get_trace_detail(
+    trace_id: UUID,
+    timeline_limit: int = Query(default=DEFAULT_TIMELINE_LIMIT, ge=1, le=5000),
+    resolve_blobs: bool = Query(default=False, description="inline offloaded values instead of {$blob} references"),
+    project: ProjectSnapshot = Depends(get_project),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = TraceService(db, project.id)
+    return await service.get_trace_detail(trace_id, timeline_limit=timeline_limit, resolve_blobs=resolve_blobs)
+
+
+@router.get("/{trace_id}/timeline")
+async def get_trace_timeline(
+    trace_id: UUID,
+    after: str | None = Query(default=None, description="next_cursor / timeline_next_cursor from the previous page"),
+    limit: int = Query(default=DEFAULT_TIMELINE_LIMIT, ge=1, le=5000),
+    fields: str | None = Query(default=None, description="comma-separated, e.g. event_type,source_id,payload.status"),
+    span_id: UUID | None = None,
+    resolve_blobs: bool = False,
+    project: ProjectSnapshot = Depends(get_project),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = TraceService(db, project.id)
+    return await service.get_timeline(
+        trace_id,
+        after=after,
+        limit=limit,
+        fields=[f.strip() for f in fields.split(",") if f.strip()] if fields else None,
+        span_id=span_id,
+        resolve_blobs=resolve_blobs,
+    )
+
+
+@router.get("/{trace_id}/spans/{span_id}/subtree")
+async def get_span_subtree(
+    trace_id: UUID,
+    span_id: UUID,
+    max_depth: int | None = Query(default=None, ge=0, description="levels below span_id; omit for the whole subtree"),
+    resolve_blobs: bool = False,
+    project: ProjectSnapshot = Depends(get_project),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = TraceService(db, project.id)
+    return await service.get_subtree(trace_id, span_id, max_depth=max_depth, resolve_blobs=resolve_blobs)
+
+
+@router.get("/{trace_id}/spans/{span_id}/ancestors")
+async def get_span_ancestors(
+    trace_id: UUID,
+    span_id: UUID,
+    project: ProjectSnapshot = Depends(get_project),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = TraceService(db, project.id)
+    return await service.get_ancestors(trace_id, span_id)
+
+
+@router.get("/{trace_id}/critical-path")
+async def get_critical_path(
     trace_id: UUID,
-    project: Project = Depends(get_project),
-    db: Session = Depends(get_db),
+    span_id: UUID | None = Query(default=None, description="subtree root; defaults to the trace's root span"),
+    project: ProjectSnapshot = Depends(get_project),
+    db: AsyncSession = Depends(get_async_db),
 ):
     service = TraceService(db, project.id)
-    return service.get_trace_detail(trace_id)
+    return await service.get_critical_path(trace_id, span_id)
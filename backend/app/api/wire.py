@@ -0,0 +1,148 @@
+"""Request-body decoding for the ingest routes.
+
+`DecodingRoute` accepts gzip/zstd `Content-Encoding` and `application/msgpack` bodies next to plain
+JSON. msgpack documents are handed to FastAPI as already-decoded objects, so the same Pydantic models
+validate every format. `/ingest/spans` additionally accepts the compact document the SDK sends:
+
+    {"v": 1, "allow_missing_parent": bool,
+     "traces": [<16-byte trace id>, ...],
+     "events": [[trace_index, <16-byte span id> | nil, event_type, event_time_us, payload, idempotency_key], ...]}
+
+An idempotency key (on the event or in its payload) starting with NUL is relative to
+"{trace_id}:{span_id}:". Postgres text cannot store NUL, so the marker never collides with a real key.
+"""
+
+import json
+import zlib
+from collections.abc import Callable, Coroutine
+from typing import Any
+from uuid import UUID
+
+import msgpack
+from fastapi import HTTPException, Request, Response, status
+from fastapi.routing import APIRoute
+
+from app.core.config import settings
+
+try:
+    import zstandard
+except ImportError:  # zstd bodies are rejected with 415 unless the optional dependency is installed
+    zstandard = None
+
+MSGPACK_CONTENT_TYPES = ("application/msgpack", "application/x-msgpack")
+COMPACT_SPANS_VERSION = 1
+RELATIVE_KEY_MARKER = "\x00"
+
+
+def supported_encodings() -> list[str]:
+    return ["gzip", "zstd"] if zstandard else ["gzip"]
+
+
+def _decompress(raw: bytes, encoding: str | None) -> bytes:
+    encoding = (encoding or "identity").strip().lower()
+    limit = settings.ingest_max_body_bytes
+    if encoding == "identity":
+        body = raw
+    elif encoding == "gzip":
+        try:
+            body = zlib.decompressobj(wbits=31).decompress(raw, limit + 1)
+        except zlib.error as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="invalid gzip body") from exc
+    elif encoding == "zstd" and zstandard:
+        try:
+            with zstandard.ZstdDecompressor().stream_reader(raw) as reader:
+                body = reader.read(limit + 1)
+        except zstandard.ZstdError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="invalid zstd body") from exc
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"unsupported content-encoding: {encoding}",
+            headers={"Accept-Encoding": ", ".join(supported_encodings())},
+        )
+    if len(body) > limit:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="decoded body too large")
+    return body
+
+
+def expand_compact_spans(doc: dict[str, Any]) -> dict[str, Any]:
+    """Rebuild the `IngestSpansRequest` shape from the compact msgpack document.
+
+    Ids stay as 16-byte values and timestamps become float epoch seconds: Pydantic converts both in
+    its core (float seconds round-trip to the exact microsecond), which is much cheaper than building
+    UUID/datetime objects here. The id string form is only built, once per span, for relative keys.
+    """
+    try:
+        traces = doc["traces"]
+        prefixes: dict[tuple[int, bytes | None], str] = {}
+
+        def expand_key(key: str, trace_index: int, span_id: bytes | None) -> str:
+            if not key.startswith(RELATIVE_KEY_MARKER):
+                return key
+            prefix = prefixes.get((trace_index, span_id))
+            if prefix is None:
+                span = UUID(bytes=span_id) if span_id is not None else None
+                prefix = prefixes[(trace_index, span_id)] = f"{UUID(bytes=traces[trace_index])}:{span}:"
+            return prefix + key[1:]
+
+        events = []
+        for trace_index, span_id, event_type, event_time_us, payload, key in doc["events"]:
+            if isinstance(payload, dict) and isinstance(payload.get("idempotency_key"), str):
+                payload["idempotency_key"] = expand_key(payload["idempotency_key"], trace_index, span_id)
+            events.append(
+                {
+                    "trace_id": traces[trace_index],
+                    "span_id": span_id,
+                    "event_type": event_type,
+                    "event_time": event_time_us / 1_000_000,
+                    "payload": payload,
+                    "idempotency_key": expand_key(key, trace_index, span_id),
+                }
+            )
+    except (KeyError, IndexError, TypeError, ValueError) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"malformed compact span batch: {exc}") from exc
+    return {"events": events, "allow_missing_parent": doc.get("allow_missing_parent", True)}
+
+
+class DecodedRequest(Request):
+    def __init__(self, scope, receive):
+        headers = scope.get("headers", [])
+        content_type = next((v for k, v in headers if k == b"content-type"), b"").decode("latin-1")
+        self.is_msgpack = content_type.split(";")[0].strip().lower() in MSGPACK_CONTENT_TYPES
+        if self.is_msgpack:
+            # FastAPI only calls `json()` for JSON content types; `json()` below decodes msgpack instead.
+            scope = {
+                **scope,
+                "headers": [(k, v) for k, v in headers if k != b"content-type"] + [(b"content-type", b"application/json")],
+            }
+        super().__init__(scope, receive)
+
+    async def body(self) -> bytes:
+        if not hasattr(self, "_decoded_body"):
+            self._decoded_body = _decompress(await super().body(), self.headers.get("content-encoding"))
+        return self._decoded_body
+
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            body = await self.body()
+            if not self.is_msgpack:
+                self._json = json.loads(body)
+            else:
+                try:
+                    doc = msgpack.unpackb(body, raw=False)
+                except (msgpack.UnpackException, ValueError) as exc:
+                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="invalid msgpack body") from exc
+                if isinstance(doc, dict) and doc.get("v") == COMPACT_SPANS_VERSION and "traces" in doc:
+                    doc = expand_compact_spans(doc)
+                self._json = doc
+        return self._json
+
+
+class DecodingRoute(APIRoute):
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def decoding_handler(request: Request) -> Response:
+            return await handler(DecodedRequest(request.scope, request.receive))
+
+        return decoding_handler
@@ -1,3 +1,5 @@
+from typing import Any
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -8,6 +10,112 @@ class Settings(BaseSettings):
     internal_api_key_seed: str = "dev-seed"
     webhook_url: str | None = None
 
+    # "sync" writes inside the request; "queue" appends to the on-disk log and returns 202 with an offset.
+    # Each uvicorn worker process needs its own ingest_queue_dir.
+    ingest_mode: str = "sync"
+    # upper bound on a gzip/zstd ingest body after decompression
+    ingest_max_body_bytes: int = 32 * 1024 * 1024
+    ingest_queue_dir: str = "./data/ingest-queue"
+    ingest_queue_segment_bytes: int = 64 * 1024 * 1024
+    ingest_queue_fsync: bool = True
+    ingest_queue_max_depth: int = 100_000
+    ingest_queue_batch_records: int = 500
+    ingest_queue_writers: int = 4
+    ingest_queue_wait_timeout_sec: float = 10.0
+
+    # Authenticated projects are cached per worker; key rotation / deactivation is pushed via LISTEN/NOTIFY
+    # and the TTL caps staleness if a notification is missed.
+    project_cache_max_entries: int = 10_000
+    project_cache_ttl_sec: float = 30.0
+
+    # span_events is partitioned by UTC day; maintenance keeps this many future days created and drops
+    # days past every project's retention (projects.retention_days, else this default; None keeps forever).
+    partition_premake_days: int = 7
+    partition_maintenance_interval_sec: float = 3600.0
+    span_event_retention_days: int | None = None
+
+    # Values whose canonical JSON is at least blob_offload_min_bytes (LangGraph states, long trace text) are
+    # stored once per project under their SHA-256 and referenced from the row. blob_store: "local", "s3" or "none".
+    # Search covers offloaded text through the row's blob_search_vector, built from its first
+    # blob_search_text_max_chars characters.
+    blob_store: str = "local"
+    blob_store_dir: str = "./data/blobs"
+    blob_s3_bucket: str = "trace-hub-blobs"
+    blob_s3_prefix: str = "blobs"
+    blob_s3_endpoint_url: str | None = None
+    blob_offload_min_bytes: int = 16 * 1024
+    blob_text_preview_chars: int = 2000
+    blob_search_text_max_chars: int = 100_000
+
+    # POST /decide/batch snapshots up to decision_job_max_traces trace ids into a job; the worker decides
+    # decision_job_batch_size traces per transaction with at most decision_job_llm_concurrency LLM judge calls
+    # in flight, and takes over a running job whose heartbeat is older than decision_job_stale_after_sec.
+    decision_job_max_traces: int = 100_000
+    decision_job_batch_size: int = 200
+    decision_job_llm_concurrency: int = 16
+    decision_job_poll_interval_sec: float = 2.0
+    decision_job_stale_after_sec: float = 300.0
+
+    # Judge outputs are cached per worker (LRU, judge_cache_memory_*) in front of the judge_cache table. The
+    # sweeper deletes table rows older than judge_cache_ttl_sec and each project's oldest rows past
+    # judge_cache_max_rows_per_project; None disables either bound.
+    judge_cache_memory_max_entries: int = 50_000
+    judge_cache_memory_ttl_sec: float = 300.0
+    judge_cache_ttl_sec: int | None = 7 * 24 * 3600
+    judge_cache_max_rows_per_project: int | None = 1_000_000
+    judge_cache_sweep_interval_sec: float = 600.0
+
+    # Remote judge calls share one connection pool per provider and are bounded by judge_llm_deadline_sec
+    # (or the provider's deadline_sec). Once judge_hedge_min_samples calls were seen, a call still running at the
+    # judge_hedge_quantile latency gets one duplicate request. judge_breaker_failures consecutive failures stop
+    # calls for judge_breaker_reset_sec; /decide then answers with the last verdict the cascade got. With
+    # judge_speculative_llm a remote stage starts alongside the local stage before it and is cancelled when
+    # that stage ends the cascade.
+    judge_llm_endpoint: str | None = None
+    judge_llm_max_connections: int = 64
+    judge_llm_deadline_sec: float = 10.0
+    judge_hedge_enabled: bool = True
+    judge_hedge_quantile: float = 0.95
+    judge_hedge_min_samples: int = 50
+    judge_hedge_min_delay_sec: float = 0.05
+    judge_breaker_failures: int = 5
+    judge_breaker_reset_sec: float = 30.0
+    judge_speculative_llm: bool = True
+    # With judge_llm_batch_endpoint set, concurrent LLM judge calls are sent together once
+    # judge_llm_batch_max_items are waiting or judge_llm_batch_max_wait_ms after the first; a failed batch is
+    # retried as single calls. judge_llm_batch_max_items = 1 turns batching off.
+    judge_llm_batch_endpoint: str | None = None
+    judge_llm_batch_max_items: int = 16
+    judge_llm_batch_max_wait_ms: float = 10.0
+    # Judge providers besides the built-in "heuristic" and "llm", by name, e.g.
+    # {"llm-large": {"type": "llm", "endpoint": "...", "model": "...", "cost_per_call": 0.002}}. "type" is a
+    # built-in or an entry point in the llm_trace_hub.judges group; the other keys are passed to it, except
+    # deadline_sec and cost_per_call. Projects route between providers with PUT /projects/{id}/judge-routing.
+    judge_providers: dict[str, dict[str, Any]] = {}
+    # The heuristic judge scans at most heuristic_scan_max_chars of the input and of the output (the rest is
+    # not checked and the output says so); texts longer than heuristic_scan_inline_chars in total are scanned
+    # in a worker thread instead of on the event loop.
+    heuristic_scan_max_chars: int = 500_000
+    heuristic_scan_inline_chars: int = 16_384
+
+    # Case webhooks (webhook_url) are committed as notifications with the case and delivered by a dispatcher in
+    # every worker: up to webhook_concurrency requests in flight over one pool, each target host limited to
+    # webhook_target_rate_per_sec and cut off for webhook_breaker_reset_sec after webhook_breaker_failures
+    # consecutive failures. A failed delivery is retried after webhook_backoff_base_sec doubling per attempt (up
+    # to webhook_backoff_max_sec, jittered) and becomes dead after webhook_max_attempts attempts.
+    webhook_timeout_sec: float = 5.0
+    webhook_max_connections: int = 32
+    webhook_concurrency: int = 16
+    webhook_claim_batch: int = 100
+    webhook_poll_interval_sec: float = 1.0
+    webhook_lease_sec: float = 60.0
+    webhook_max_attempts: int = 8
+    webhook_backoff_base_sec: float = 2.0
+    webhook_backoff_max_sec: float = 3600.0
+    webhook_target_rate_per_sec: float = 10.0
+    webhook_breaker_failures: int = 5
+    webhook_breaker_reset_sec: float = 60.0
+
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
 
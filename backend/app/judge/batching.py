@@ -0,0 +1,145 @@
+"""Coalesces concurrent judge calls into batched requests.
+
+`JudgeBatcher.submit` parks each payload on a future. The pending payloads are sent as one batched call
+when `max_items` are waiting or `max_wait_sec` after the first one arrived, and each result is handed
+back to its future. If the batched call fails, the batch is retried as single calls, except when the
+endpoint pushed back (`BatchRejectedError`, e.g. rate limited), which fails every call in the batch
+rather than multiplying the requests. An endpoint that does not take batches (`BatchUnsupportedError`)
+gets single calls only for `UNSUPPORTED_RETRY_SEC`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+Payload = dict[str, Any]
+# how long single calls are used after the endpoint said it does not take batches
+UNSUPPORTED_RETRY_SEC = 300.0
+
+
+class BatchUnsupportedError(Exception):
+    """The judge endpoint does not accept batched requests."""
+
+
+class BatchRejectedError(Exception):
+    """The judge endpoint refused the batch for load reasons; single calls would be refused too."""
+
+
+class JudgeBatcher:
+    def __init__(
+        self,
+        judge_many: Callable[[list[Payload]], Awaitable[list[Payload | Exception]]],
+        judge_one: Callable[[Payload], Awaitable[Payload]],
+        max_items: int,
+        max_wait_sec: float,
+    ):
+        self.judge_many = judge_many
+        self.judge_one = judge_one
+        self.max_items = max_items
+        self.max_wait_sec = max_wait_sec
+        self.batches = 0
+        self.batched_items = 0
+        self.single_calls = 0
+        self.fallbacks = 0
+        self.rejected = 0
+        self.largest_batch = 0
+        self._pending: list[tuple[Payload, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._unsupported_until = 0.0
+        # sends in flight, referenced so they are not garbage-collected mid-call
+        self._sends: set[asyncio.Task] = set()
+
+    async def submit(self, payload: Payload) -> Payload:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((payload, future))
+        if len(self._pending) >= self.max_items:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_sec, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._send(batch))
+            self._sends.add(task)
+            task.add_done_callback(self._sends.discard)
+
+    async def _send(self, batch: list[tuple[Payload, asyncio.Future]]) -> None:
+        # callers that gave up (deadline, cancelled speculation) while waiting are not sent
+        batch = [(payload, future) for payload, future in batch if not future.done()]
+        if len(batch) < 2 or time.monotonic() < self._unsupported_until:
+            await self._send_singly(batch)
+            return
+        try:
+            results = await self.judge_many([payload for payload, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"batched judge returned {len(results)} results for {len(batch)} payloads")
+        except BatchRejectedError as exc:
+            self.rejected += 1
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        except BatchUnsupportedError:
+            self._unsupported_until = time.monotonic() + UNSUPPORTED_RETRY_SEC
+            self.fallbacks += 1
+            await self._send_singly(batch)
+            return
+        except Exception:
+            self.fallbacks += 1
+            await self._send_singly(batch)
+            return
+        self.batches += 1
+        self.batched_items += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def _send_singly(self, batch: list[tuple[Payload, asyncio.Future]]) -> None:
+        async def one(payload: Payload, future: asyncio.Future) -> None:
+            if future.done():
+                return
+            call = asyncio.ensure_future(self.judge_one(payload))
+            # a caller that stops waiting cancels its request
+            future.add_done_callback(lambda f: call.cancel() if f.cancelled() else None)
+            self.single_calls += 1
+            try:
+                result = await call
+            except asyncio.CancelledError:
+                return
+            except Exception as exc:
+                if not future.done():
+                    future.set_exception(exc)
+                return
+            if not future.done():
+                future.set_result(result)
+
+        await asyncio.gather(*(one(payload, future) for payload, future in batch))
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "max_items": self.max_items,
+            "max_wait_ms": round(self.max_wait_sec * 1000, 2),
+            "batches": self.batches,
+            "batched_items": self.batched_items,
+            "avg_batch_size": round(self.batched_items / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "single_calls": self.single_calls,
+            "fallbacks": self.fallbacks,
+            "rejected": self.rejected,
+            "batch_unsupported": time.monotonic() < self._unsupported_until,
+            "pending": len(self._pending),
+        }
@@ -0,0 +1,229 @@
+"""How judge providers are called: deadlines, hedged requests, circuit breaking and latency histograms.
+
+Every provider in `JudgeRegistry` is wrapped in a `JudgeExecutor`. A call that outlives the provider's
+observed `judge_hedge_quantile` latency gets one duplicate request and the first success wins; the whole
+call, hedge included, is bounded by the provider's deadline. Consecutive failures open the provider's
+breaker, after which calls fail fast with `JudgeUnavailableError` until a single probe succeeds.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import time
+from typing import Any
+
+from app.judge.providers.base import JudgeProvider
+
+# upper bounds of the latency buckets in ms; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10_000, 20_000, 60_000)
+
+
+class JudgeUnavailableError(Exception):
+    """The provider's breaker is open or the call ran past its deadline."""
+
+
+class LatencyHistogram:
+    def __init__(self, bounds_ms: tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.bounds_ms = bounds_ms
+        self.counts = [0] * (len(bounds_ms) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds_ms, ms)] += 1
+        self.count += 1
+        self.sum_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def quantile(self, q: float) -> float:
+        """Estimated `q` quantile in ms, interpolated linearly inside its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.bounds_ms[i - 1] if i else 0.0
+                upper = self.bounds_ms[i] if i < len(self.bounds_ms) else self.max_ms
+                return min(lower + (upper - lower) * (rank - seen) / n, self.max_ms)
+            seen += n
+        return self.max_ms
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.sum_ms / self.count, 2) if self.count else 0.0,
+            "p50_ms": round(self.quantile(0.5), 2),
+            "p95_ms": round(self.quantile(0.95), 2),
+            "p99_ms": round(self.quantile(0.99), 2),
+            "max_ms": round(self.max_ms, 2),
+            # [upper bound in ms (None = unbounded), count], empty buckets left out
+            "buckets": [
+                [self.bounds_ms[i] if i < len(self.bounds_ms) else None, n] for i, n in enumerate(self.counts) if n
+            ],
+        }
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failed calls; after `reset_after_sec` one probe call is let
+    through (half-open) and its outcome closes or re-opens the breaker."""
+
+    def __init__(self, failure_threshold: int, reset_after_sec: float):
+        self.failure_threshold = failure_threshold
+        self.reset_after_sec = reset_after_sec
+        self.state = "closed"
+        self.failures = 0
+        self.opened = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            if time.monotonic() - self._opened_at < self.reset_after_sec:
+                return False
+            self.state = "half_open"
+        if self._probing:
+            return False
+        self._probing = True
+        return True
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self._probing = False
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.state = "open"
+            self._opened_at = time.monotonic()
+            self.opened += 1
+
+    def release(self) -> None:
+        """A call that was let through ended without an outcome (cancelled by its caller)."""
+        self._probing = False
+
+
+class JudgeExecutor:
+    def __init__(
+        self,
+        provider: JudgeProvider,
+        deadline_sec: float | None = None,
+        hedge_quantile: float | None = None,
+        hedge_min_samples: int = 50,
+        hedge_min_delay_sec: float = 0.05,
+        breaker: CircuitBreaker | None = None,
+    ):
+        self.provider = provider
+        self.deadline_sec = deadline_sec
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay_sec = hedge_min_delay_sec
+        self.breaker = breaker
+        self.latency = LatencyHistogram()
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    @property
+    def name(self) -> str:
+        return self.provider.name
+
+    def hedge_delay(self) -> float | None:
+        """Seconds to wait on the first request before sending a duplicate; None until enough calls were seen."""
+        if self.hedge_quantile is None or self.latency.count < self.hedge_min_samples:
+            return None
+        return max(self.hedge_min_delay_sec, self.latency.quantile(self.hedge_quantile) / 1000)
+
+    def expected_latency_ms(self) -> float:
+        """The observed p95 a route's latency budget is checked against; 0 until enough calls were seen."""
+        if self.latency.count < self.hedge_min_samples:
+            return 0.0
+        return self.latency.quantile(0.95)
+
+    async def judge(self, payload: dict[str, Any]) -> dict[str, Any]:
+        if self.breaker is not None and not self.breaker.allow():
+            self.rejected += 1
+            raise JudgeUnavailableError(f"{self.name} judge circuit open")
+        self.calls += 1
+        started = time.perf_counter()
+        try:
+            async with asyncio.timeout(self.deadline_sec):
+                output = await self._hedged(payload)
+        except TimeoutError:
+            self.timeouts += 1
+            # counted at the deadline, so the tail stays visible in the histogram
+            self.latency.observe(self.deadline_sec * 1000)
+            if self.breaker is not None:
+                self.breaker.record_failure()
+            raise JudgeUnavailableError(f"{self.name} judge exceeded its {self.deadline_sec}s deadline") from None
+        except asyncio.CancelledError:
+            if self.breaker is not None:
+                self.breaker.release()
+            raise
+        except Exception:
+            self.failures += 1
+            if self.breaker is not None:
+                self.breaker.record_failure()
+            raise
+        self.latency.observe((time.perf_counter() - started) * 1000)
+        if self.breaker is not None:
+            self.breaker.record_success()
+        return output
+
+    async def _hedged(self, payload: dict[str, Any]) -> dict[str, Any]:
+        """The first successful attempt; a second attempt starts once the first outlives `hedge_delay`."""
+        delay = self.hedge_delay()
+        attempts = [asyncio.create_task(self.provider.judge(payload))]
+        pending = set(attempts)
+        error: BaseException | None = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=delay if len(attempts) == 1 else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    self.hedges += 1
+                    attempts.append(asyncio.create_task(self.provider.judge(payload)))
+                    pending.add(attempts[-1])
+                    continue
+                for task in done:
+                    if task.exception() is None:
+                        if task is not attempts[0]:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            # a failure before the hedge delay is not retried
+            assert error is not None
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_delay_ms": round(delay * 1000, 2) if (delay := self.hedge_delay()) is not None else None,
+            "breaker": (
+                {"state": self.breaker.state, "consecutive_failures": self.breaker.failures, "opened": self.breaker.opened}
+                if self.breaker is not None
+                else None
+            ),
+            "latency": self.latency.stats(),
+            **self.provider.stats(),
+        }
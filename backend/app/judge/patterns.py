@@ -0,0 +1,181 @@
+"""Keyword and regex patterns for the heuristic judge, compiled once per pattern-set version.
+
+All of a set's keywords become one trie regex, so the lowercased text is scanned once for all of them
+however many there are; each match of the trie also yields the shorter keywords that are its prefixes.
+Regex patterns come from project API keys, so they are compiled with RE2, whose matching time is linear
+in the text: a pattern like `(a+)+$` cannot stall the worker the way it would with `re`, which backtracks
+while holding the GIL (even a plain `\w+x` is quadratic there). RE2 syntax has no backreferences or
+lookarounds and rejects them. Each regex is run with `finditer`. Every pattern reports the same
+non-overlapping leftmost matches as repeated `str.find` on the lowercased text (keywords) or the regex's
+own `finditer` would.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from collections import OrderedDict
+from typing import Any
+
+import re2
+
+# the keywords HeuristicJudgeProvider checked before patterns were configurable
+DEFAULT_PATTERNS: list[dict[str, Any]] = [
+    {"name": "ssn", "kind": "keyword", "pattern": "ssn", "signal": "pii", "scope": "input"},
+    {"name": "credit_card", "kind": "keyword", "pattern": "credit card", "signal": "pii", "scope": "input"},
+    {"name": "passport", "kind": "keyword", "pattern": "passport", "signal": "pii", "scope": "input"},
+    {
+        "name": "investment_advice",
+        "kind": "keyword",
+        "pattern": "investment advice",
+        "signal": "financial_risk",
+        "scope": "output",
+    },
+]
+COMPILED_CACHE_MAX_ENTRIES = 256
+MAX_REGEX_CHARS = 1000
+
+
+class PatternError(ValueError):
+    pass
+
+
+def _compile_regex(pattern: dict[str, Any]) -> re2._Regexp:
+    if len(pattern["pattern"]) > MAX_REGEX_CHARS:
+        raise PatternError(f"pattern {pattern['name']!r} is longer than {MAX_REGEX_CHARS} characters")
+    options = re2.Options()
+    options.case_sensitive = not pattern.get("ignore_case", True)
+    options.log_errors = False
+    try:
+        return re2.compile(pattern["pattern"], options)
+    except re2.error as exc:
+        detail = exc.args[0].decode() if exc.args and isinstance(exc.args[0], bytes) else exc
+        raise PatternError(f"pattern {pattern['name']!r}: {detail}") from None
+
+
+def _trie_regex(words: list[str]) -> str:
+    """One regex matching the longest of `words` that starts at a position."""
+    trie: dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict[str, Any]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        # greedy, so the longer keyword wins over one that ends here
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class TextMatcher:
+    """The patterns that apply to one text (input or output), by their index in the pattern set."""
+
+    def __init__(self, patterns: list[tuple[int, dict[str, Any]]]):
+        self.keywords: dict[str, list[int]] = {}
+        self.regexes: list[tuple[int, re2._Regexp]] = []
+        for index, pattern in patterns:
+            if pattern["kind"] == "keyword":
+                self.keywords.setdefault(pattern["pattern"].lower(), []).append(index)
+                continue
+            compiled = _compile_regex(pattern)
+            if compiled.match(""):
+                raise PatternError(f"pattern {pattern['name']!r} matches the empty string")
+            self.regexes.append((index, compiled))
+        # keywords that are prefixes of a longer keyword match wherever the longer one does
+        self.prefixes = {
+            word: [word[:n] for n in range(1, len(word) + 1) if word[:n] in self.keywords] for word in self.keywords
+        }
+        trie = _trie_regex(list(self.keywords))
+        # matched against the lowercased text, which is much faster than IGNORECASE; the IGNORECASE one is
+        # for the rare text whose lowercase form has a different length (the offsets would not line up)
+        self.keyword_re = re.compile(trie) if self.keywords else None
+        self.keyword_re_folded = re.compile(trie, re.IGNORECASE) if self.keywords else None
+
+    def _keyword_hits(self, text: str, hits: list[tuple[int, int, int]]) -> None:
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            keyword_re, text = self.keyword_re, lowered
+        else:
+            keyword_re = self.keyword_re_folded
+        # end of each keyword's last match: its next match may not start before it
+        resume: dict[int, int] = {}
+        search = keyword_re.search
+        position = 0
+        while (longest := search(text, position)) is not None:
+            at = longest.start()
+            for prefix in self.prefixes.get(longest.group().lower(), ()):
+                end = at + len(prefix)
+                for index in self.keywords[prefix]:
+                    if at >= resume.get(index, 0):
+                        hits.append((index, at, end))
+                        resume[index] = end
+            # a keyword can also start inside the one just found
+            position = at + 1
+
+    def scan(self, text: str) -> list[tuple[int, int, int]]:
+        """(pattern index, start, end) of every match, by start position and then pattern index."""
+        hits: list[tuple[int, int, int]] = []
+        if not text:
+            return hits
+        if self.keyword_re is not None:
+            self._keyword_hits(text, hits)
+        for index, regex in self.regexes:
+            hits.extend((index, match.start(), match.end()) for match in regex.finditer(text))
+        hits.sort(key=lambda hit: (hit[1], hit[0]))
+        return hits
+
+
+class CompiledPatternSet:
+    def __init__(self, patterns: list[dict[str, Any]]):
+        self.patterns = patterns
+        self.input = TextMatcher([(i, p) for i, p in enumerate(patterns) if p.get("scope", "both") in ("input", "both")])
+        self.output = TextMatcher([(i, p) for i, p in enumerate(patterns) if p.get("scope", "both") in ("output", "both")])
+
+    def scan(self, input_text: str, output_text: str) -> list[dict[str, Any]]:
+        """Matches in the input, then the output, one pass over each."""
+        matches = []
+        for text_name, matcher, text in (("input", self.input, input_text), ("output", self.output, output_text)):
+            for index, start, end in matcher.scan(text):
+                pattern = self.patterns[index]
+                matches.append(
+                    {"pattern": pattern["name"], "signal": pattern["signal"], "text": text_name, "start": start, "end": end}
+                )
+        return matches
+
+
+DEFAULT_PATTERN_SET = CompiledPatternSet(DEFAULT_PATTERNS)
+
+_compiled: OrderedDict[str, CompiledPatternSet] = OrderedDict()
+_compiled_lock = threading.Lock()
+
+
+def compile_pattern_set(key: str, patterns: list[dict[str, Any]]) -> CompiledPatternSet:
+    """The set stored under `key` (a pattern-set version never changes), compiled on first use."""
+    with _compiled_lock:
+        compiled = _compiled.get(key)
+        if compiled is not None:
+            _compiled.move_to_end(key)
+            return compiled
+    compiled = CompiledPatternSet(patterns)
+    with _compiled_lock:
+        _compiled[key] = compiled
+        while len(_compiled) > COMPILED_CACHE_MAX_ENTRIES:
+            _compiled.popitem(last=False)
+    return compiled
+
+
+def compiled_pattern_set(key: str | None) -> CompiledPatternSet | None:
+    """An already compiled set, `DEFAULT_PATTERN_SET` for None, or None if `key` is not compiled here."""
+    if key is None:
+        return DEFAULT_PATTERN_SET
+    with _compiled_lock:
+        compiled = _compiled.get(key)
+        if compiled is not None:
+            _compiled.move_to_end(key)
+        return compiled
@@ -4,7 +4,21 @@ from typing import Any
 
 class JudgeProvider(ABC):
     name = "base"
+    # recorded on JudgeRun.model
+    model: str | None = None
+    # remote providers get a deadline, hedging and a circuit breaker; local ones are only timed
+    remote = False
+    # what a call counts against a route's cost_budget
+    cost_per_call = 0.0
 
     @abstractmethod
     async def judge(self, payload: dict[str, Any]) -> dict[str, Any]:
         raise NotImplementedError
+
+    def stats(self) -> dict[str, Any]:
+        """Provider-specific counters merged into the executor's stats."""
+        return {}
+
+    async def aclose(self) -> None:
+        """Release pooled connections; called once at shutdown."""
+        return None
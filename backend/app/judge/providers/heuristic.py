@@ -1,19 +1,39 @@
+import asyncio
 from typing import Any
 
+from app.core.config import settings
+from app.judge.patterns import compiled_pattern_set
 from app.judge.providers.base import JudgeProvider
 from app.schemas.common import ActionEnum
 
+# matches listed on the judge output; the signals count all of them
+MAX_REPORTED_MATCHES = 100
+
 
 class HeuristicJudgeProvider(JudgeProvider):
     name = "heuristic"
+    model = "rules-v1"
 
     async def judge(self, payload: dict[str, Any]) -> dict[str, Any]:
         input_text = str(payload.get("input_text") or "")
         output_text = str(payload.get("output_text") or "")
         evals = payload.get("evals", {})
 
-        pii_signal = any(token in input_text.lower() for token in ["ssn", "credit card", "passport"])
-        financial_risk = 0.9 if "investment advice" in output_text.lower() else 0.1
+        # the project's pattern set, compiled by DecisionService before judging; None means the built-in one
+        pattern_set = compiled_pattern_set(payload.get("heuristic_patterns"))
+        if pattern_set is None:
+            raise LookupError(f"heuristic pattern set {payload['heuristic_patterns']} is not compiled")
+        limit = settings.heuristic_scan_max_chars
+        truncated = len(input_text) > limit or len(output_text) > limit
+        input_text, output_text = input_text[:limit], output_text[:limit]
+        if len(input_text) + len(output_text) > settings.heuristic_scan_inline_chars:
+            matches = await asyncio.to_thread(pattern_set.scan, input_text, output_text)
+        else:
+            matches = pattern_set.scan(input_text, output_text)
+        hit_signals = {match["signal"] for match in matches}
+
+        pii_signal = "pii" in hit_signals
+        financial_risk = 0.9 if "financial_risk" in hit_signals else 0.1
         hallucination_risk = 1.0 - float(evals.get("faithfulness_score", 0.8))
 
         if pii_signal:
@@ -30,14 +50,20 @@ class HeuristicJudgeProvider(JudgeProvider):
             reason = "HEURISTIC_OK"
 
         confidence = 0.95 if action in {ActionEnum.ESCALATE.value, ActionEnum.BLOCK.value} else 0.7
-        return {
+        output = {
             "action": action,
             "confidence": confidence,
             "reason_code": reason,
             "rationale": "heuristic pre-check",
             "signals": {
+                **{signal: True for signal in hit_signals},
                 "pii": pii_signal,
                 "hallucination_risk": hallucination_risk,
                 "financial_risk": financial_risk,
             },
         }
+        if matches:
+            output["matches"] = matches[:MAX_REPORTED_MATCHES]
+        if truncated:
+            output["scan_truncated_at"] = limit
+        return output
@@ -3,8 +3,14 @@ from typing import Any
 import httpx
 from pydantic import BaseModel, Field
 
+from app.judge.batching import BatchRejectedError, BatchUnsupportedError, JudgeBatcher
 from app.judge.providers.base import JudgeProvider
 
+# statuses meaning the batch endpoint does not exist, as opposed to a failed batch
+BATCH_UNSUPPORTED_STATUSES = frozenset({404, 405, 501})
+# the endpoint is shedding load; splitting the batch would only add requests
+BATCH_REJECTED_STATUSES = frozenset({429, 503})
+
 
 class LLMJudgeOutput(BaseModel):
     action: str
@@ -15,19 +21,77 @@ class LLMJudgeOutput(BaseModel):
 
 
 class LLMJudgeProvider(JudgeProvider):
+    """Posts `{"model", "payload"}` to `endpoint`.
+
+    With a `batch_endpoint` and `batch_max_items` > 1, concurrent calls are coalesced by a `JudgeBatcher` into
+    `{"model", "payloads": [...]}` posts answered by `{"results": [...]}` in payload order, where an entry
+    may be `{"error": "..."}` for that payload alone.
+    """
+
     name = "llm"
+    remote = True
 
-    def __init__(self, endpoint: str | None = None, model: str = "gpt-judge"):
+    def __init__(
+        self,
+        endpoint: str | None = None,
+        model: str = "gpt-judge",
+        timeout_sec: float = 10.0,
+        max_connections: int = 64,
+        batch_endpoint: str | None = None,
+        batch_max_items: int = 1,
+        batch_max_wait_sec: float = 0.01,
+        cost_per_call: float = 0.0,
+    ):
         self.endpoint = endpoint
         self.model = model
+        self.cost_per_call = cost_per_call
+        self.timeout_sec = timeout_sec
+        self.max_connections = max_connections
+        self.batch_endpoint = batch_endpoint
+        self._client: httpx.AsyncClient | None = None
+        self.batcher = (
+            JudgeBatcher(self._post_many, self._post_one, batch_max_items, batch_max_wait_sec)
+            if endpoint and batch_endpoint and batch_max_items > 1
+            else None
+        )
+
+    def _http(self) -> httpx.AsyncClient:
+        # one keep-alive pool per provider instead of a new connection (and TLS handshake) per call
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout_sec,
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+            )
+        return self._client
+
+    async def _post_one(self, payload: dict[str, Any]) -> dict[str, Any]:
+        response = await self._http().post(self.endpoint, json={"model": self.model, "payload": payload})
+        response.raise_for_status()
+        return LLMJudgeOutput.model_validate(response.json()).model_dump()
+
+    async def _post_many(self, payloads: list[dict[str, Any]]) -> list[dict[str, Any] | Exception]:
+        response = await self._http().post(self.batch_endpoint, json={"model": self.model, "payloads": payloads})
+        if response.status_code in BATCH_UNSUPPORTED_STATUSES:
+            raise BatchUnsupportedError(f"{self.batch_endpoint} answered {response.status_code}")
+        if response.status_code in BATCH_REJECTED_STATUSES:
+            raise BatchRejectedError(f"{self.batch_endpoint} answered {response.status_code}")
+        response.raise_for_status()
+        results: list[dict[str, Any] | Exception] = []
+        for item in response.json()["results"]:
+            if isinstance(item, dict) and "error" in item:
+                results.append(RuntimeError(f"llm judge: {item['error']}"))
+                continue
+            try:
+                results.append(LLMJudgeOutput.model_validate(item).model_dump())
+            except ValueError as exc:
+                results.append(exc)
+        return results
 
     async def judge(self, payload: dict[str, Any]) -> dict[str, Any]:
+        if self.batcher is not None:
+            return await self.batcher.submit(payload)
         if self.endpoint:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(self.endpoint, json={"model": self.model, "payload": payload})
-                response.raise_for_status()
-                data = response.json()
-                return LLMJudgeOutput.model_validate(data).model_dump()
+            return await self._post_one(payload)
 
         # Fallback stub output for local MVP.
         score = payload.get("evals", {}).get("overall_score", 0.8)
@@ -44,3 +108,11 @@ class LLMJudgeProvider(JudgeProvider):
             },
         }
         return LLMJudgeOutput.model_validate(data).model_dump()
+
+    def stats(self) -> dict[str, Any]:
+        return {"batching": self.batcher.stats() if self.batcher is not None else None}
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
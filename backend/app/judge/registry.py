@@ -1,15 +1,103 @@
+import logging
+from collections.abc import Callable
+from importlib.metadata import entry_points
+from typing import Any
+
+from app.core.config import settings
+from app.judge.execution import CircuitBreaker, JudgeExecutor
+from app.judge.providers.base import JudgeProvider
 from app.judge.providers.heuristic import HeuristicJudgeProvider
 from app.judge.providers.llm import LLMJudgeProvider
 
+logger = logging.getLogger(__name__)
+
+# installed packages add provider types here, e.g. in their pyproject.toml:
+#   [project.entry-points."llm_trace_hub.judges"]
+#   onnx-toxicity = "my_judges.onnx:ToxicityJudgeProvider"
+ENTRY_POINT_GROUP = "llm_trace_hub.judges"
+BUILTIN_PROVIDERS: dict[str, Callable[..., JudgeProvider]] = {
+    "heuristic": HeuristicJudgeProvider,
+    "llm": LLMJudgeProvider,
+}
+
+
+def provider_factories() -> dict[str, Callable[..., JudgeProvider]]:
+    """Provider types by name: the built-ins, then every `llm_trace_hub.judges` entry point that loads."""
+    factories = dict(BUILTIN_PROVIDERS)
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        if entry_point.name in factories:
+            logger.warning("judge provider type %s from %s is already registered", entry_point.name, entry_point.value)
+            continue
+        try:
+            factories[entry_point.name] = entry_point.load()
+        except Exception:
+            logger.exception("could not load judge provider type %s from %s", entry_point.name, entry_point.value)
+    return factories
+
 
 class JudgeRegistry:
-    def __init__(self, llm_endpoint: str | None = None):
+    def __init__(self, llm_endpoint: str | None = None, providers: dict[str, dict[str, Any]] | None = None):
+        self.factories = provider_factories()
+        self.executors: dict[str, JudgeExecutor] = {}
         self.heuristic = HeuristicJudgeProvider()
-        self.llm = LLMJudgeProvider(endpoint=llm_endpoint)
-
-    def get(self, name: str):
-        if name == "heuristic":
-            return self.heuristic
-        if name == "llm":
-            return self.llm
-        raise KeyError(f"Unknown judge provider: {name}")
+        self.llm = LLMJudgeProvider(
+            endpoint=llm_endpoint,
+            timeout_sec=settings.judge_llm_deadline_sec,
+            max_connections=settings.judge_llm_max_connections,
+            batch_endpoint=settings.judge_llm_batch_endpoint,
+            batch_max_items=settings.judge_llm_batch_max_items,
+            batch_max_wait_sec=settings.judge_llm_batch_max_wait_ms / 1000,
+        )
+        self.add(self.heuristic)
+        self.add(self.llm)
+        for name, spec in (providers or {}).items():
+            self.add_from_spec(name, spec)
+
+    def add_from_spec(self, name: str, spec: dict[str, Any]) -> JudgeExecutor:
+        options = dict(spec)
+        kind = options.pop("type", name)
+        deadline_sec = options.pop("deadline_sec", None)
+        cost_per_call = options.pop("cost_per_call", None)
+        factory = self.factories.get(kind)
+        if factory is None:
+            raise ValueError(f"judge provider {name!r}: unknown type {kind!r}")
+        provider = factory(**options)
+        provider.name = name
+        if cost_per_call is not None:
+            provider.cost_per_call = float(cost_per_call)
+        return self.add(provider, deadline_sec)
+
+    def add(self, provider: JudgeProvider, deadline_sec: float | None = None) -> JudgeExecutor:
+        if provider.name in self.executors:
+            raise ValueError(f"judge provider {provider.name!r} is already registered")
+        if provider.remote:
+            executor = JudgeExecutor(
+                provider,
+                deadline_sec=deadline_sec or settings.judge_llm_deadline_sec,
+                hedge_quantile=settings.judge_hedge_quantile if settings.judge_hedge_enabled else None,
+                hedge_min_samples=settings.judge_hedge_min_samples,
+                hedge_min_delay_sec=settings.judge_hedge_min_delay_sec,
+                breaker=CircuitBreaker(settings.judge_breaker_failures, settings.judge_breaker_reset_sec),
+            )
+        else:
+            # local: nothing to hedge or trip, but its latency is still recorded
+            executor = JudgeExecutor(provider, deadline_sec=deadline_sec, hedge_min_samples=settings.judge_hedge_min_samples)
+        self.executors[provider.name] = executor
+        return executor
+
+    def get(self, name: str) -> JudgeExecutor:
+        try:
+            return self.executors[name]
+        except KeyError:
+            raise KeyError(f"Unknown judge provider: {name}") from None
+
+    def stats(self) -> dict[str, Any]:
+        return {name: executor.stats() for name, executor in self.executors.items()}
+
+    async def aclose(self) -> None:
+        for executor in self.executors.values():
+            await executor.provider.aclose()
+
+
+# shared by every request and job in the worker, so the providers' connection pools and stats are too
+judge_registry = JudgeRegistry(settings.judge_llm_endpoint, settings.judge_providers)
@@ -0,0 +1,206 @@
+"""Per-project judge cascades.
+
+A route lists judge stages from cheap to expensive. Each stage runs only if the ones before it did not
+settle the trace: a stage's output ends the cascade when its confidence reaches the stage's
+`min_confidence` (and, with `stop_actions`, its action is one of them); the last stage to answer is the
+verdict. Once a stage has answered, a later stage is skipped when its observed p95 latency would take
+the cascade past `latency_budget_ms` or its `cost_per_call` past `cost_budget`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any
+
+from app.judge.execution import JudgeExecutor
+from app.schemas.common import ActionEnum
+
+if TYPE_CHECKING:
+    from app.judge.registry import JudgeRegistry
+
+logger = logging.getLogger(__name__)
+
+# a heuristic BLOCK/ESCALATE at 0.9 confidence is final; anything else also goes to the LLM judge
+DEFAULT_ROUTE: dict[str, Any] = {
+    "stages": [
+        {
+            "provider": "heuristic",
+            "min_confidence": 0.9,
+            "stop_actions": [ActionEnum.BLOCK.value, ActionEnum.ESCALATE.value],
+        },
+        {"provider": "llm"},
+    ],
+}
+
+
+@dataclass(frozen=True)
+class JudgeStage:
+    provider: str
+    min_confidence: float = 0.9
+    stop_actions: frozenset[str] | None = None
+
+    def settles(self, output: dict[str, Any]) -> bool:
+        if float(output.get("confidence", 0.0)) < self.min_confidence:
+            return False
+        return self.stop_actions is None or output.get("action") in self.stop_actions
+
+
+@dataclass(frozen=True)
+class JudgeRoute:
+    stages: tuple[JudgeStage, ...]
+    latency_budget_ms: float | None = None
+    cost_budget: float | None = None
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any] | None) -> JudgeRoute:
+        """A project's `judge_routing`, or `DEFAULT_ROUTE` when it has none."""
+        config = config or DEFAULT_ROUTE
+        return cls(
+            stages=tuple(
+                JudgeStage(
+                    provider=stage["provider"],
+                    min_confidence=float(stage.get("min_confidence", 0.9)),
+                    stop_actions=frozenset(stage["stop_actions"]) if stage.get("stop_actions") else None,
+                )
+                for stage in config["stages"]
+            ),
+            latency_budget_ms=config.get("latency_budget_ms"),
+            cost_budget=config.get("cost_budget"),
+        )
+
+
+@dataclass
+class StageRun:
+    provider: str
+    model: str | None
+    output: dict[str, Any]
+    started_at: datetime
+    latency_ms: float
+    cost: float
+
+
+@dataclass
+class CascadeResult:
+    selected: dict[str, Any]
+    runs: list[StageRun]
+    # the provider or model recorded on the decision
+    judge_model: str
+    # stages left out, with the budget ("latency" or "cost") that ruled them out
+    skipped: dict[str, str] = field(default_factory=dict)
+    # stages that failed (only when the caller allowed falling back)
+    failed: list[str] = field(default_factory=list)
+
+    @property
+    def cacheable(self) -> bool:
+        """Whether the verdict can be reused for the same input: not when it depended on a failure or on
+        how slow a judge happened to be; the cost budget skips the same stages every time."""
+        return not self.failed and "latency" not in self.skipped.values()
+
+
+async def _timed_call(
+    executor: JudgeExecutor, payload: dict[str, Any], remote_slots: asyncio.Semaphore | None
+) -> tuple[dict[str, Any], datetime, float]:
+    started_at = datetime.now(timezone.utc)
+    started = time.perf_counter()
+    if remote_slots is not None and executor.provider.remote:
+        async with remote_slots:
+            output = await executor.judge(payload)
+    else:
+        output = await executor.judge(payload)
+    return output, started_at, (time.perf_counter() - started) * 1000
+
+
+async def run_cascade(
+    registry: JudgeRegistry,
+    route: JudgeRoute,
+    payload: dict[str, Any],
+    remote_slots: asyncio.Semaphore | None = None,
+    fallback: bool = True,
+    speculative: bool = True,
+) -> CascadeResult:
+    """Run `route` on `payload`.
+
+    `remote_slots` bounds concurrent remote calls across cascades. With `speculative`, a remote stage starts
+    while the local stage before it runs and is cancelled if that stage settles the trace. A failing stage
+    raises unless `fallback`, in which case the cascade goes on and the last answer wins; it raises only
+    if no stage answered.
+    """
+    executors = [registry.get(stage.provider) for stage in route.stages]
+    started = time.perf_counter()
+    spent = 0.0
+    runs: list[StageRun] = []
+    selected: dict[str, Any] | None = None
+    judge_model = ""
+    skipped: dict[str, str] = {}
+    failed: list[str] = []
+    last_error: Exception | None = None
+
+    def over_budget(executor: JudgeExecutor) -> str | None:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if route.latency_budget_ms is not None and elapsed_ms + executor.expected_latency_ms() > route.latency_budget_ms:
+            return "latency"
+        if route.cost_budget is not None and spent + executor.provider.cost_per_call > route.cost_budget:
+            return "cost"
+        return None
+
+    speculated: dict[int, asyncio.Task] = {}
+    try:
+        for index, (stage, executor) in enumerate(zip(route.stages, executors)):
+            call = speculated.pop(index, None)
+            if call is None:
+                # the first stage to answer always runs; later ones must fit the budget
+                budget = over_budget(executor) if selected is not None else None
+                if budget is not None:
+                    skipped[stage.provider] = budget
+                    continue
+                call = asyncio.create_task(_timed_call(executor, payload, remote_slots))
+            following = index + 1
+            if (
+                speculative
+                and not executor.provider.remote
+                and following < len(executors)
+                and executors[following].provider.remote
+                and over_budget(executors[following]) is None
+            ):
+                speculated[following] = asyncio.create_task(_timed_call(executors[following], payload, remote_slots))
+            try:
+                output, started_at, latency_ms = await call
+            except Exception as exc:
+                if not fallback:
+                    raise
+                logger.warning("%s judge failed, continuing the cascade: %r", stage.provider, exc)
+                failed.append(stage.provider)
+                last_error = exc
+                continue
+            spent += executor.provider.cost_per_call
+            runs.append(
+                StageRun(
+                    provider=executor.name,
+                    model=executor.provider.model,
+                    output=output,
+                    started_at=started_at,
+                    latency_ms=round(latency_ms, 3),
+                    cost=executor.provider.cost_per_call,
+                )
+            )
+            selected = output
+            judge_model = (executor.provider.model or executor.name) if executor.provider.remote else executor.name
+            if stage.settles(output):
+                break
+    finally:
+        for task in speculated.values():
+            task.cancel()
+        if speculated:
+            await asyncio.gather(*speculated.values(), return_exceptions=True)
+
+    if selected is None:
+        assert last_error is not None
+        raise last_error
+    if failed:
+        rationale = f"{selected.get('rationale', '')} ({', '.join(failed)} judge unavailable: {type(last_error).__name__})"
+        selected = {**selected, "rationale": rationale.strip()}
+    return CascadeResult(selected=selected, runs=runs, judge_model=judge_model, skipped=skipped, failed=failed)
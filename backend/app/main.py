@@ -1,14 +1,48 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
+from fastapi import FastAPI, Response
 
 from app.api.cases import router as cases_router
 from app.api.decisions import router as decisions_router
 from app.api.evals import router as evals_router
 from app.api.ingest import router as ingest_router
+from app.api.judges import router as judges_router
+from app.api.notifications import router as notifications_router
 from app.api.policies import router as policies_router
 from app.api.projects import router as projects_router
+from app.api.system import router as system_router
 from app.api.traces import router as traces_router
+from app.judge.registry import judge_registry
+from app.services.decision_job_service import run_decision_jobs
+from app.services.ingest_queue import get_ingest_queue, queue_enabled
+from app.services.judge_cache import run_judge_cache_sweeper
+from app.services.notification_service import notification_dispatcher, run_notification_dispatcher
+from app.services.partition_maintenance import run_partition_maintenance
+from app.services.project_cache import listen_for_invalidations
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    listener = asyncio.create_task(listen_for_invalidations(), name="project-cache-listener")
+    maintenance = asyncio.create_task(run_partition_maintenance(), name="partition-maintenance")
+    decision_jobs = asyncio.create_task(run_decision_jobs(), name="decision-jobs")
+    judge_cache_sweeper = asyncio.create_task(run_judge_cache_sweeper(), name="judge-cache-sweeper")
+    notifications = asyncio.create_task(run_notification_dispatcher(), name="notification-dispatcher")
+    if queue_enabled():
+        await get_ingest_queue().start()
+    yield
+    if queue_enabled():
+        await get_ingest_queue().stop()
+    for task in (listener, maintenance, decision_jobs, judge_cache_sweeper, notifications):
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await judge_registry.aclose()
+    await notification_dispatcher.aclose()
+
 
-app = FastAPI(title="LLM Trace Hub")
+app = FastAPI(title="LLM Trace Hub", lifespan=lifespan)
 
 app.include_router(ingest_router)
 app.include_router(evals_router)
@@ -16,9 +50,19 @@ app.include_router(traces_router)
 app.include_router(policies_router)
 app.include_router(decisions_router)
 app.include_router(cases_router)
+app.include_router(notifications_router)
+app.include_router(judges_router)
 app.include_router(projects_router)
+app.include_router(system_router)
 
 
 @app.get("/healthz")
-def healthz():
-    return {"ok": True}
+def healthz(response: Response):
+    if not queue_enabled():
+        return {"ok": True}
+    queue = get_ingest_queue()
+    # queued records are acknowledged but nothing applies them while the dispatcher is down
+    ok = queue.running
+    if not ok:
+        response.status_code = 503
+    return {"ok": ok, "ingest_dispatcher": {"running": queue.running, "failing_windows": queue.failing_windows}}
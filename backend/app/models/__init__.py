@@ -1,6 +1,9 @@
 from app.models.entities import (
     Case,
+    DecisionJob,
+    DecisionRollupHourly,
     Evaluation,
+    HeuristicPatternSet,
     JudgeCache,
     JudgeRun,
     Notification,
@@ -9,8 +12,11 @@ from app.models.entities import (
     Project,
     Span,
     SpanEvent,
+    SpanRollupHourly,
     Trace,
     TraceDecision,
+    TraceLatencyAnalysis,
+    TraceRollupHourly,
 )
 
 __all__ = [
@@ -26,4 +32,10 @@ __all__ = [
     "JudgeRun",
     "Case",
     "Notification",
+    "TraceRollupHourly",
+    "SpanRollupHourly",
+    "DecisionRollupHourly",
+    "TraceLatencyAnalysis",
+    "DecisionJob",
+    "HeuristicPatternSet",
 ]
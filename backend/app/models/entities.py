@@ -3,7 +3,9 @@ from datetime import datetime
 
 from sqlalchemy import (
     JSON,
+    BigInteger,
     Boolean,
+    Computed,
     DateTime,
     Float,
     ForeignKey,
@@ -13,7 +15,7 @@ from sqlalchemy import (
     UniqueConstraint,
     Index,
 )
-from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, TSVECTOR, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -28,6 +30,10 @@ class Project(Base):
     current_api_key: Mapped[str | None] = mapped_column(String(255), nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
     key_activated: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    # span_events older than this are removed by partition maintenance; None uses the server default
+    retention_days: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # judge cascade for /decide and decision jobs (see app.judge.routing); None uses DEFAULT_ROUTE
+    judge_routing: Mapped[dict | None] = mapped_column(JSONB().with_variant(JSON, "sqlite"), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
 
 
@@ -47,6 +53,11 @@ class Trace(Base):
     session_id: Mapped[str | None] = mapped_column(String(128), nullable=True)
     input_text: Mapped[str | None] = mapped_column(Text, nullable=True)
     output_text: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # set when the full text lives in the blob store; the *_text column then holds a preview
+    input_text_blob: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    output_text_blob: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    # words of the offloaded full text, which ix_traces_text_search (on the previews) does not see
+    blob_search_vector: Mapped[str | None] = mapped_column(TSVECTOR, nullable=True, deferred=True)
     has_open_spans: Mapped[bool] = mapped_column(Boolean, default=True)
     total_spans: Mapped[int] = mapped_column(Integer, default=0)
     ended_spans: Mapped[int] = mapped_column(Integer, default=0)
@@ -62,7 +73,13 @@ class Span(Base):
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
     project_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("projects.id"), nullable=False)
     trace_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("traces.id"), nullable=False)
-    parent_span_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), ForeignKey("spans.id"), nullable=True)
+    # no FK: with allow_missing_parent a child may land before its parent (see TraceService._graft_orphans)
+    parent_span_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    # ids from the top-most known ancestor down to this span; a span whose parent has not arrived
+    # yet starts its own path and is re-rooted when the parent is ingested
+    path: Mapped[list[uuid.UUID]] = mapped_column(ARRAY(UUID(as_uuid=True)), nullable=False)
+    depth: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    child_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     span_type: Mapped[str] = mapped_column(String(64), default="task")
     status: Mapped[str] = mapped_column(String(32), default="running")
@@ -76,10 +93,13 @@ class Span(Base):
     __table_args__ = (
         UniqueConstraint("project_id", "idempotency_key", name="uq_spans_project_idempotency"),
         Index("ix_spans_trace_parent", "trace_id", "parent_span_id"),
+        Index("ix_spans_path", "path", postgresql_using="gin"),
     )
 
 
 class SpanEvent(Base):
+    """Range-partitioned by `event_time` (one partition per UTC day, see partition_maintenance)."""
+
     __tablename__ = "span_events"
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -87,13 +107,26 @@ class SpanEvent(Base):
     trace_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("traces.id"), nullable=False)
     span_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), ForeignKey("spans.id"), nullable=True)
     event_type: Mapped[str] = mapped_column(String(64), nullable=False)
-    event_time: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    # part of the primary key: unique constraints on a partitioned table must include the partition key
+    event_time: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
     payload: Mapped[dict] = mapped_column(JSONB().with_variant(JSON, "sqlite"), default=dict)
     idempotency_key: Mapped[str] = mapped_column(String(255), nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    # every string value in payload; filled by Postgres on insert, only read by search
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVECTOR,
+        Computed("jsonb_to_tsvector('simple', coalesce(payload, '{}'::jsonb), '[\"string\"]')", persisted=True),
+        deferred=True,
+    )
+    # strings of payload values moved to the blob store, which search_vector only sees as references
+    blob_search_vector: Mapped[str | None] = mapped_column(TSVECTOR, nullable=True, deferred=True)
 
     __table_args__ = (
-        UniqueConstraint("project_id", "idempotency_key", name="uq_span_events_project_idempotency"),
+        UniqueConstraint("project_id", "idempotency_key", "event_time", name="uq_span_events_project_idempotency"),
+        Index("ix_span_events_search", "search_vector", postgresql_using="gin"),
+        Index("ix_span_events_blob_search", "blob_search_vector", postgresql_using="gin"),
+        Index("ix_span_events_trace_time", "trace_id", "event_time", "id"),
+        {"postgresql_partition_by": "RANGE (event_time)"},
     )
 
 
@@ -115,6 +148,7 @@ class Evaluation(Base):
 
     __table_args__ = (
         UniqueConstraint("project_id", "idempotency_key", name="uq_evaluations_project_idempotency"),
+        Index("ix_evaluations_trace", "trace_id", "created_at"),
     )
 
 
@@ -137,9 +171,94 @@ class TraceDecision(Base):
 
     __table_args__ = (
         UniqueConstraint("project_id", "idempotency_key", name="uq_trace_decisions_project_idempotency"),
+        Index("ix_trace_decisions_trace", "trace_id", "created_at"),
     )
 
 
+class DecisionJob(Base):
+    """A batch decide over a snapshot of trace ids; the worker advances `processed` one slice at a time."""
+
+    __tablename__ = "decision_jobs"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    project_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("projects.id"), nullable=False)
+    # queued | running | succeeded | failed | cancelled
+    status: Mapped[str] = mapped_column(String(32), default="queued")
+    # resolved when the job is created, so activating another version mid-run does not mix policies
+    policy_version_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("policy_versions.id"), nullable=False)
+    # deferred: only the worker reads it, one slice at a time
+    trace_ids: Mapped[list[uuid.UUID]] = mapped_column(ARRAY(UUID(as_uuid=True)), nullable=False, deferred=True)
+    total: Mapped[int] = mapped_column(Integer, default=0)
+    processed: Mapped[int] = mapped_column(Integer, default=0)
+    decided: Mapped[int] = mapped_column(Integer, default=0)
+    cached: Mapped[int] = mapped_column(Integer, default=0)
+    skipped: Mapped[int] = mapped_column(Integer, default=0)
+    failed: Mapped[int] = mapped_column(Integer, default=0)
+    actions: Mapped[dict] = mapped_column(JSONB().with_variant(JSON, "sqlite"), default=dict)
+    # the most recent per-trace failures, newest last
+    errors: Mapped[list] = mapped_column(JSONB().with_variant(JSON, "sqlite"), default=list)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_decision_jobs_status", "status", "created_at"),
+        Index("ix_decision_jobs_project", "project_id", "created_at"),
+    )
+
+
+class TraceRollupHourly(Base):
+    """Trace counts per start hour; maintained by the `rollup_traces` triggers (migration 0006)."""
+
+    __tablename__ = "trace_rollups_hourly"
+
+    project_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("projects.id"), primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    status: Mapped[str] = mapped_column(String(32), primary_key=True)
+    # '' stands for NULL so the columns can be part of the key
+    model: Mapped[str] = mapped_column(String(128), primary_key=True)
+    environment: Mapped[str] = mapped_column(String(64), primary_key=True)
+    traces: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    open_traces: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+
+
+class SpanRollupHourly(Base):
+    """Span counts per start hour; maintained by the `rollup_spans` triggers (migration 0006)."""
+
+    __tablename__ = "span_rollups_hourly"
+
+    project_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("projects.id"), primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    span_type: Mapped[str] = mapped_column(String(64), primary_key=True)
+    spans: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+
+
+class DecisionRollupHourly(Base):
+    """Decision counts per creation hour; maintained by the `rollup_decisions` trigger (migration 0006)."""
+
+    __tablename__ = "decision_rollups_hourly"
+
+    project_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("projects.id"), primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    action: Mapped[str] = mapped_column(String(32), primary_key=True)
+    decisions: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+
+
+class TraceLatencyAnalysis(Base):
+    """Cached `latency_analysis.analyze_trace` result for a trace without open spans."""
+
+    __tablename__ = "trace_latency_analyses"
+
+    trace_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("traces.id"), primary_key=True)
+    project_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("projects.id"), nullable=False)
+    # traces.total_spans when computed; a later span makes the entry stale
+    total_spans: Mapped[int] = mapped_column(Integer, nullable=False)
+    analysis: Mapped[dict] = mapped_column(JSONB().with_variant(JSON, "sqlite"), nullable=False)
+    computed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+
+
 class Policy(Base):
     __tablename__ = "policies"
 
@@ -179,8 +298,14 @@ class JudgeRun(Base):
     reason_code: Mapped[str] = mapped_column(String(128), nullable=False)
     confidence: Mapped[float] = mapped_column(Float, nullable=False)
     output: Mapped[dict] = mapped_column(JSONB().with_variant(JSON, "sqlite"), default=dict)
+    # when the provider call started, how long it took and what the route charged for it
+    started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    latency_ms: Mapped[float | None] = mapped_column(Float, nullable=True)
+    cost: Mapped[float | None] = mapped_column(Float, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
 
+    __table_args__ = (Index("ix_judge_runs_trace", "trace_id", "created_at"),)
+
 
 class JudgeCache(Base):
     __tablename__ = "judge_cache"
@@ -194,6 +319,25 @@ class JudgeCache(Base):
 
     __table_args__ = (
         UniqueConstraint("project_id", "input_hash", "policy_version", name="uq_judge_cache_lookup"),
+        # TTL and per-project size sweeps
+        Index("ix_judge_cache_created", "created_at"),
+        Index("ix_judge_cache_project_created", "project_id", "created_at"),
+    )
+
+
+class HeuristicPatternSet(Base):
+    """A version of a project's heuristic judge patterns (see app.judge.patterns); the latest one is used."""
+
+    __tablename__ = "heuristic_pattern_sets"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    project_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("projects.id"), nullable=False)
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+    patterns: Mapped[list] = mapped_column(JSONB().with_variant(JSON, "sqlite"), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("project_id", "version", name="uq_heuristic_pattern_sets_project_version"),
     )
 
 
@@ -219,7 +363,18 @@ class Notification(Base):
     case_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("cases.id"), nullable=False)
     channel: Mapped[str] = mapped_column(String(32), default="webhook")
     target_url: Mapped[str] = mapped_column(String(1024), nullable=False)
+    # pending -> sent, or dead once retries run out or the target rejects it (see app.services.notification_service)
     status: Mapped[str] = mapped_column(String(32), default="pending")
     payload: Mapped[dict] = mapped_column(JSONB().with_variant(JSON, "sqlite"), default=dict)
     response_snippet: Mapped[str | None] = mapped_column(Text, nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # when a pending notification is next due; while a dispatcher holds it, the end of its lease
+    next_attempt_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_attempt_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    delivered_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_notifications_due", "status", "next_attempt_at"),
+        Index("ix_notifications_project", "project_id", "status", "created_at"),
+    )
@@ -3,6 +3,8 @@ from uuid import UUID
 
 from pydantic import BaseModel
 
+from app.schemas.common import JsonDict
+
 
 class CaseOut(BaseModel):
     id: UUID
@@ -17,3 +19,18 @@ class CaseOut(BaseModel):
 
 class CaseActionRequest(BaseModel):
     assignee: str | None = None
+
+
+class NotificationOut(BaseModel):
+    id: UUID
+    case_id: UUID
+    channel: str
+    target_url: str
+    status: str
+    payload: JsonDict
+    response_snippet: str | None
+    attempts: int
+    next_attempt_at: datetime | None
+    last_attempt_at: datetime | None
+    delivered_at: datetime | None
+    created_at: datetime
@@ -1,9 +1,9 @@
 from datetime import datetime
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
-from app.schemas.common import ActionEnum, JsonDict
+from app.schemas.common import ActionEnum, BaseOut, JsonDict
 
 
 class DecideRequest(BaseModel):
@@ -33,4 +33,44 @@ class JudgeRunOut(BaseModel):
     reason_code: str
     confidence: float
     output: JsonDict
+    started_at: datetime | None = None
+    latency_ms: float | None = None
+    cost: float | None = None
     created_at: datetime
+
+
+class BatchDecideRequest(BaseModel):
+    """Either explicit trace ids or a start-time window, optionally narrowed by status and environment."""
+
+    trace_ids: list[UUID] | None = Field(default=None, min_length=1)
+    start_time: datetime | None = None
+    end_time: datetime | None = None
+    status: str | None = None
+    environment: str | None = None
+    force_policy_id: UUID | None = None
+    force_policy_version: int | None = None
+
+    @model_validator(mode="after")
+    def _require_selection(self):
+        if self.trace_ids is None and self.start_time is None:
+            raise ValueError("trace_ids or start_time is required")
+        return self
+
+
+class DecisionJobOut(BaseOut):
+    id: UUID
+    status: str
+    policy_version_id: UUID
+    total: int
+    processed: int
+    decided: int
+    cached: int
+    skipped: int
+    failed: int
+    actions: JsonDict
+    errors: list[JsonDict]
+    error: str | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    heartbeat_at: datetime | None = None
+    finished_at: datetime | None = None
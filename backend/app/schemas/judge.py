@@ -0,0 +1,29 @@
+from datetime import datetime
+from typing import Literal
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+
+class HeuristicPatternIn(BaseModel):
+    name: str = Field(min_length=1, max_length=128)
+    # keyword: case-insensitive substring; regex: RE2 syntax (linear time; no backreferences or lookarounds)
+    kind: Literal["keyword", "regex"] = "keyword"
+    pattern: str = Field(min_length=1, max_length=1000)
+    # "pii" escalates, "financial_risk" warns; any other signal is reported on the judge output
+    signal: str = Field(min_length=1, max_length=64)
+    scope: Literal["input", "output", "both"] = "both"
+    # regex only; keywords always ignore case
+    ignore_case: bool = True
+
+
+class HeuristicPatternSetIn(BaseModel):
+    patterns: list[HeuristicPatternIn] = Field(max_length=5000)
+
+
+class HeuristicPatternSetOut(BaseModel):
+    # None while the project uses the built-in patterns
+    id: UUID | None
+    version: int
+    patterns: list[HeuristicPatternIn]
+    created_at: datetime | None
@@ -1,7 +1,9 @@
 from datetime import datetime
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from app.schemas.common import ActionEnum
 
 
 class ProjectCreateIn(BaseModel):
@@ -13,6 +15,8 @@ class ProjectListItem(BaseModel):
     name: str
     is_active: bool
     key_activated: bool
+    retention_days: int | None = None
+    judge_routing: dict | None = None
     created_at: datetime
     trace_count: int
     open_case_count: int
@@ -26,6 +30,30 @@ class ProjectCreateOut(BaseModel):
     api_key: str
 
 
+class ProjectRetentionIn(BaseModel):
+    # None falls back to SPAN_EVENT_RETENTION_DAYS
+    retention_days: int | None = Field(default=None, ge=1)
+
+
+class JudgeStageIn(BaseModel):
+    provider: str
+    # the cascade ends at this stage once its confidence reaches min_confidence (and its action is one of
+    # stop_actions, if given); the last stage always ends it
+    min_confidence: float = Field(default=0.9, ge=0.0, le=1.0)
+    stop_actions: list[ActionEnum] | None = None
+
+
+class JudgeRoutingIn(BaseModel):
+    stages: list[JudgeStageIn] = Field(min_length=1)
+    latency_budget_ms: float | None = Field(default=None, gt=0)
+    cost_budget: float | None = Field(default=None, ge=0)
+
+
+class ProjectJudgeRoutingIn(BaseModel):
+    # None falls back to the default heuristic -> llm cascade
+    judge_routing: JudgeRoutingIn | None = None
+
+
 class ProjectCurrentKeyOut(BaseModel):
     project_id: UUID
     key_activated: bool
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import defaultdict
+from datetime import timedelta
+from typing import Any
+from uuid import UUID
+
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy import and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Evaluation, Policy, PolicyVersion, Trace, TraceDecision
+from app.services.policy_backtest import Column, confusion_matrix, evaluate_columns
+from app.services.policy_engine import field_accessor, ordered_rules
+from app.services.utils import utcnow
+
+# parts of decide's policy context that come from the /decide call and are not stored
+UNSTORED_ROOTS = ("request", "response", "safety")
+MAX_SAMPLES = 20
+
+
+def _policy_fields(definition: dict[str, Any]) -> set[str]:
+    fields = set()
+    for rule in ordered_rules(definition):
+        when = rule.get("when", {})
+        for condition in (when.get("all") or []) + (when.get("any") or []):
+            if condition.get("field"):
+                fields.add(condition["field"])
+    return fields
+
+
+class BacktestService:
+    def __init__(self, db: AsyncSession, project_id: UUID):
+        self.db = db
+        self.project_id = project_id
+
+    async def backtest(self, policy_id: UUID, version: int, last_days: int, max_traces: int) -> dict[str, Any]:
+        """Replay a policy version over the recorded decisions of traces started in the last `last_days`.
+
+        Read-only: each decided trace's latest decision is the baseline, its stored judge `signals` and
+        current evaluations rebuild the policy context, and the whole rule set runs as NumPy masks over
+        those columns (see `policy_backtest`). Fields under request/response/safety are not stored, so they
+        read as missing, and are listed in `unavailable_fields`.
+        """
+        target = await self.db.scalar(
+            select(PolicyVersion)
+            .join(Policy, Policy.id == PolicyVersion.policy_id)
+            .where(
+                and_(Policy.id == policy_id, Policy.project_id == self.project_id, PolicyVersion.version == version)
+            )
+        )
+        if not target:
+            raise HTTPException(status_code=404, detail="policy version not found")
+
+        started = time.perf_counter()
+        since = utcnow() - timedelta(days=last_days)
+        fields = _policy_fields(target.definition)
+        signal_fields = sorted(f for f in fields if f.split(".", 1)[0] == "signals")
+        eval_fields = sorted(f for f in fields if f.split(".", 1)[0] == "evals")
+
+        in_window = and_(
+            TraceDecision.project_id == self.project_id,
+            Trace.project_id == self.project_id,
+            Trace.start_time >= since,
+        )
+        columns = [TraceDecision.trace_id, TraceDecision.action, TraceDecision.reason_code]
+        # only the signal paths the policy reads leave the database
+        columns += [
+            TraceDecision.signals if f == "signals" else TraceDecision.signals[tuple(f.split(".")[1:])] for f in signal_fields
+        ]
+        rows = (
+            await self.db.execute(
+                select(*columns)
+                .join(Trace, Trace.id == TraceDecision.trace_id)
+                .where(in_window)
+                .distinct(TraceDecision.trace_id)
+                .order_by(TraceDecision.trace_id, TraceDecision.created_at.desc())
+                .limit(max_traces + 1)
+            )
+        ).all()
+        truncated = len(rows) > max_traces
+        rows = rows[:max_traces]
+        traces_in_window = await self.db.scalar(
+            select(func.count())
+            .select_from(Trace)
+            .where(and_(Trace.project_id == self.project_id, Trace.start_time >= since))
+        ) or 0
+
+        trace_ids = [row[0] for row in rows]
+        values: dict[str, list[Any]] = {f: [row[3 + i] for row in rows] for i, f in enumerate(signal_fields)}
+        if eval_fields:
+            values.update(await self._eval_values(trace_ids, since, eval_fields))
+        loaded = time.perf_counter()
+
+        result = await asyncio.to_thread(
+            self._compare,
+            target.definition,
+            trace_ids,
+            [row[1] for row in rows],
+            [row[2] for row in rows],
+            values,
+        )
+        return {
+            "policy_id": policy_id,
+            "version": version,
+            "policy_version": f"{policy_id}:v{version}",
+            "window_days": last_days,
+            "traces_in_window": traces_in_window,
+            "decided_traces": len(rows),
+            "truncated": truncated,
+            "unavailable_fields": sorted(f for f in fields if f.split(".", 1)[0] in UNSTORED_ROOTS),
+            **result,
+            "timing_ms": {
+                "load": round((loaded - started) * 1000, 1),
+                "evaluate": round((time.perf_counter() - loaded) * 1000, 1),
+            },
+        }
+
+    async def _eval_values(self, trace_ids: list[UUID], since, fields: list[str]) -> dict[str, list[Any]]:
+        """Each `evals.*` field per trace, from the same summary `DecisionService` builds at decide time."""
+        scores: dict[UUID, dict[str, Any]] = defaultdict(dict)
+        totals: dict[UUID, list[float]] = defaultdict(lambda: [0.0, 0])
+        rows = await self.db.execute(
+            select(Evaluation.trace_id, Evaluation.eval_name, Evaluation.score, Evaluation.passed, Evaluation.eval_model)
+            .join(Trace, Trace.id == Evaluation.trace_id)
+            .where(
+                and_(
+                    Evaluation.project_id == self.project_id,
+                    Trace.project_id == self.project_id,
+                    Trace.start_time >= since,
+                )
+            )
+            .order_by(Evaluation.created_at)
+        )
+        for trace_id, name, score, passed, eval_model in rows.all():
+            scores[trace_id][name] = {"score": score, "passed": passed, "eval_model": eval_model}
+            total = totals[trace_id]
+            total[0] += score
+            total[1] += 1
+        getters = {f: field_accessor(f.split(".", 1)[1]) if "." in f else None for f in fields}
+        values: dict[str, list[Any]] = {f: [] for f in fields}
+        for trace_id in trace_ids:
+            eval_map = scores.get(trace_id, {})
+            total = totals.get(trace_id)
+            summary = {
+                **eval_map,
+                "overall_score": total[0] / total[1] if total else 0.8,
+                "faithfulness_score": eval_map.get("faithfulness", {}).get("score", 0.8),
+            }
+            for f, get in getters.items():
+                values[f].append(get(summary) if get else summary)
+        return values
+
+    @staticmethod
+    def _compare(
+        definition: dict[str, Any],
+        trace_ids: list[UUID],
+        old_actions: list[str],
+        old_reason_codes: list[str],
+        values: dict[str, list[Any]],
+    ) -> dict[str, Any]:
+        n = len(trace_ids)
+        if n == 0:
+            return {"changed": 0, "change_rate": 0.0, "matrix": {}, "by_reason_code": {}, "by_new_reason_code": {}, "samples": []}
+        columns = {f: Column(v) for f, v in values.items()}
+        chosen, outcomes = evaluate_columns(definition, columns, n)
+        outcome_actions = np.array([o[0] for o in outcomes], dtype=object)
+        outcome_reasons = np.array([o[1] for o in outcomes], dtype=object)
+        old = np.array(old_actions, dtype=object)
+        new = outcome_actions[chosen]
+        old_reasons = np.array(old_reason_codes, dtype=object)
+        new_reasons = outcome_reasons[chosen]
+
+        changed = old != new
+        samples = [
+            {
+                "trace_id": trace_ids[i],
+                "old_action": old[i],
+                "new_action": new[i],
+                "old_reason_code": old_reasons[i],
+                "new_reason_code": new_reasons[i],
+            }
+            for i in np.flatnonzero(changed)[:MAX_SAMPLES]
+        ]
+        return {
+            "changed": int(changed.sum()),
+            "change_rate": round(float(changed.mean()), 4),
+            "matrix": confusion_matrix(old, new),
+            # keyed by the recorded decision's reason_code
+            "by_reason_code": confusion_matrix(old, new, old_reasons),
+            # keyed by the reason_code the backtested version would give
+            "by_new_reason_code": confusion_matrix(old, new, new_reasons),
+            "samples": samples,
+        }
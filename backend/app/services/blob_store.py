@@ -0,0 +1,268 @@
+"""Content-addressed storage for large values in span attributes, event payloads and trace text.
+
+A value whose canonical JSON encoding is at least `blob_offload_min_bytes` is written once under
+its SHA-256 and replaced in the row by a reference:
+
+    {"$blob": "<sha256 hex>", "bytes": 48213, "keys": ["messages", "step"]}
+
+(`keys` for objects, `items` for arrays, so UIs can show a state's shape without loading it).
+Blobs are namespaced per project; identical states from different nodes or traces of a project are
+stored once. Trace `input_text`/`output_text` keep a preview in the row and the digest in
+`input_text_blob`/`output_text_blob`. Reads return references unless they ask for `resolve()`.
+Search cannot read blobs, so writers keep the words of what was offloaded in the row's
+`blob_search_vector` (see `PayloadBlobs.take_search_text`).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any
+from uuid import UUID
+
+from app.core.config import settings
+
+try:
+    import boto3
+    from botocore.exceptions import ClientError
+except ImportError:  # only needed for blob_store="s3"
+    boto3 = None
+
+BLOB_REF_KEY = "$blob"
+# event payload keys whose objects are kept inline (their values may still be offloaded), so
+# `payload.attributes.input_state` and `span.attributes.input_state` hash to the same blob
+EVENT_ENVELOPE_KEYS = frozenset({"attributes", "patch"})
+# event payload keys copied into span columns, never offloaded
+EVENT_INLINE_KEYS = frozenset({"name", "span_type", "status", "error", "parent_span_id", "idempotency_key"})
+
+
+def encode(value: Any) -> bytes:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+
+
+def is_ref(value: Any) -> bool:
+    return isinstance(value, dict) and BLOB_REF_KEY in value
+
+
+class LocalBlobStore:
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _path(self, project_id: UUID, digest: str) -> Path:
+        return self.root / str(project_id) / digest[:2] / digest
+
+    def put_many(self, project_id: UUID, blobs: dict[str, bytes]) -> None:
+        for digest, data in blobs.items():
+            path = self._path(project_id, digest)
+            if path.exists():
+                continue
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # write-then-rename: a concurrent reader never sees a partial blob
+            fd, tmp = tempfile.mkstemp(dir=path.parent)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+
+    def get_many(self, project_id: UUID, digests: set[str]) -> dict[str, bytes]:
+        found = {}
+        for digest in digests:
+            try:
+                found[digest] = self._path(project_id, digest).read_bytes()
+            except FileNotFoundError:
+                pass
+        return found
+
+
+class S3BlobStore:
+    """Any S3-compatible endpoint (AWS, MinIO, R2)."""
+
+    def __init__(self, bucket: str, prefix: str, endpoint_url: str | None):
+        if boto3 is None:
+            raise RuntimeError("blob_store=s3 requires boto3 (pip install '.[s3]')")
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+
+    def _key(self, project_id: UUID, digest: str) -> str:
+        return f"{self.prefix}/{project_id}/{digest}"
+
+    def put_many(self, project_id: UUID, blobs: dict[str, bytes]) -> None:
+        for digest, data in blobs.items():
+            key = self._key(project_id, digest)
+            try:
+                self.client.head_object(Bucket=self.bucket, Key=key)
+                continue
+            except ClientError:
+                pass
+            self.client.put_object(Bucket=self.bucket, Key=key, Body=data, ContentType="application/json")
+
+    def get_many(self, project_id: UUID, digests: set[str]) -> dict[str, bytes]:
+        found = {}
+        for digest in digests:
+            try:
+                found[digest] = self.client.get_object(Bucket=self.bucket, Key=self._key(project_id, digest))["Body"].read()
+            except self.client.exceptions.NoSuchKey:
+                pass
+        return found
+
+
+_store: LocalBlobStore | S3BlobStore | None = None
+
+
+def get_blob_store() -> LocalBlobStore | S3BlobStore | None:
+    """The configured store, or None when offloading is disabled (blob_store="none")."""
+    global _store
+    if _store is None and settings.blob_store != "none":
+        if settings.blob_store == "s3":
+            _store = S3BlobStore(settings.blob_s3_bucket, settings.blob_s3_prefix, settings.blob_s3_endpoint_url)
+        else:
+            _store = LocalBlobStore(settings.blob_store_dir)
+    return _store
+
+
+class PayloadBlobs:
+    """Offloads large values of one project's rows; `flush()` must run before the rows are committed."""
+
+    def __init__(self, project_id: UUID):
+        self.project_id = project_id
+        self.store = get_blob_store()
+        self.min_bytes = settings.blob_offload_min_bytes
+        self.pending: dict[str, bytes] = {}
+        # strings moved out since the last take_search_text()
+        self.offloaded_text: list[str] = []
+
+    def offload(
+        self,
+        value: dict[str, Any],
+        envelope_keys: frozenset[str] = frozenset(),
+        inline_keys: frozenset[str] = frozenset(),
+    ) -> dict[str, Any]:
+        """Copy of `value` with large nested values replaced by references.
+
+        Bottom-up, so a state made of many medium fields is stored whole while a state with one huge
+        message only has that message moved out. The root object and objects under `envelope_keys`
+        stay inline, as do the root's `inline_keys` values.
+        """
+        if self.store is None or not value or len(encode(value)) < self.min_bytes:
+            return value
+        return {
+            k: v if k in inline_keys else self._offload(v, k in envelope_keys, envelope_keys) for k, v in value.items()
+        }
+
+    def _offload(self, value: Any, envelope: bool, envelope_keys: frozenset[str]) -> Any:
+        if isinstance(value, dict):
+            if is_ref(value):
+                return value
+            value = {k: self._offload(v, envelope and k in envelope_keys, envelope_keys) for k, v in value.items()}
+        elif isinstance(value, list):
+            value = [self._offload(v, False, envelope_keys) for v in value]
+        elif not isinstance(value, str):
+            return value
+        if envelope:
+            return value
+        data = encode(value)
+        if len(data) < self.min_bytes:
+            return value
+        digest = hashlib.sha256(data).hexdigest()
+        self.pending[digest] = data
+        _strings(value, self.offloaded_text)
+        ref: dict[str, Any] = {BLOB_REF_KEY: digest, "bytes": len(data)}
+        if isinstance(value, dict):
+            ref["keys"] = sorted(value)
+        elif isinstance(value, list):
+            ref["items"] = len(value)
+        return ref
+
+    def offload_text(self, text: str | None) -> tuple[str | None, str | None]:
+        """(text kept in the row, blob digest or None); the row keeps a `blob_text_preview_chars` prefix."""
+        if self.store is None or text is None or len(text) * 4 < self.min_bytes:
+            return text, None
+        data = encode(text)
+        if len(data) < self.min_bytes:
+            return text, None
+        digest = hashlib.sha256(data).hexdigest()
+        self.pending[digest] = data
+        return text[: settings.blob_text_preview_chars], digest
+
+    def take_search_text(self) -> list[str]:
+        """The strings `offload` moved out since the last call, for the blob_search_vector of the row they
+        came from."""
+        texts, self.offloaded_text = self.offloaded_text, []
+        return texts
+
+    async def flush(self) -> None:
+        if self.pending:
+            pending, self.pending = self.pending, {}
+            await asyncio.to_thread(self.store.put_many, self.project_id, pending)
+
+
+def _strings(value: Any, out: list[str]) -> None:
+    """Appends the strings in `value`, except those of nested references (already collected)."""
+    if isinstance(value, str):
+        out.append(value)
+    elif isinstance(value, dict):
+        if not is_ref(value):
+            for v in value.values():
+                _strings(v, out)
+    elif isinstance(value, list):
+        for v in value:
+            _strings(v, out)
+
+
+def _collect(value: Any, digests: set[str]) -> None:
+    if isinstance(value, dict):
+        if is_ref(value):
+            digests.add(value[BLOB_REF_KEY])
+        else:
+            for v in value.values():
+                _collect(v, digests)
+    elif isinstance(value, list):
+        for v in value:
+            _collect(v, digests)
+
+
+def _substitute(value: Any, blobs: dict[str, Any]) -> Any:
+    if isinstance(value, dict):
+        if is_ref(value):
+            digest = value[BLOB_REF_KEY]
+            # a blob that is gone (store wiped, other region) stays a reference
+            return _substitute(blobs[digest], blobs) if digest in blobs else value
+        return {k: _substitute(v, blobs) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_substitute(v, blobs) for v in value]
+    return value
+
+
+async def load_blobs(project_id: UUID, digests: set[str]) -> dict[str, Any]:
+    store = get_blob_store()
+    if store is None or not digests:
+        return {}
+    raw = await asyncio.to_thread(store.get_many, project_id, digests)
+    return {digest: json.loads(data) for digest, data in raw.items()}
+
+
+async def resolve(project_id: UUID, value: Any) -> Any:
+    """`value` with every blob reference replaced by its content, loading each distinct blob once.
+
+    Offloading is bottom-up, so a blob may itself hold references; those load in the next round.
+    """
+    blobs: dict[str, Any] = {}
+    digests: set[str] = set()
+    _collect(value, digests)
+    while digests:
+        loaded = await load_blobs(project_id, digests)
+        blobs.update(loaded)
+        nested: set[str] = set()
+        _collect(list(loaded.values()), nested)
+        digests = nested - blobs.keys()
+    return _substitute(value, blobs) if blobs else value
+
+
+async def resolve_text(project_id: UUID, text: str | None, digest: str | None) -> str | None:
+    if not digest:
+        return text
+    return (await load_blobs(project_id, {digest})).get(digest, text)
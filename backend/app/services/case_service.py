@@ -1,60 +1,59 @@
 from __future__ import annotations
 
+import uuid
 from datetime import datetime, timedelta, timezone
 from uuid import UUID
 
-import httpx
 from fastapi import HTTPException
 from sqlalchemy import and_, func, select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 from app.models import Case, Notification
+from app.services.notification_service import notification_dispatcher
+from app.services.utils import utcnow
 
 
 class CaseService:
-    def __init__(self, db: Session, project_id: UUID):
+    def __init__(self, db: AsyncSession, project_id: UUID):
         self.db = db
         self.project_id = project_id
 
     async def create_case_and_notify(self, trace_id: UUID, reason_code: str) -> Case:
+        """Open a case; its webhook notification is committed with it and delivered by the dispatcher."""
         case = Case(project_id=self.project_id, trace_id=trace_id, reason_code=reason_code, status="open")
         self.db.add(case)
-        self.db.flush()
+        await self.db.flush()
 
         if settings.webhook_url:
-            payload = {
-                "case_id": str(case.id),
-                "trace_id": str(trace_id),
-                "reason_code": reason_code,
-                "status": case.status,
-                "created_at": case.created_at.isoformat(),
-            }
-            notification = Notification(
-                project_id=self.project_id,
-                case_id=case.id,
-                channel="webhook",
-                target_url=settings.webhook_url,
-                status="pending",
-                payload=payload,
+            notification_id = uuid.uuid4()
+            self.db.add(
+                Notification(
+                    id=notification_id,
+                    project_id=self.project_id,
+                    case_id=case.id,
+                    channel="webhook",
+                    target_url=settings.webhook_url,
+                    status="pending",
+                    payload={
+                        "notification_id": str(notification_id),
+                        "case_id": str(case.id),
+                        "trace_id": str(trace_id),
+                        "reason_code": reason_code,
+                        "status": case.status,
+                        "created_at": case.created_at.isoformat(),
+                    },
+                    next_attempt_at=utcnow(),
+                )
             )
-            self.db.add(notification)
-            self.db.flush()
-
-            try:
-                async with httpx.AsyncClient(timeout=5.0) as client:
-                    response = await client.post(settings.webhook_url, json=payload)
-                    notification.status = "sent" if response.status_code < 300 else "failed"
-                    notification.response_snippet = response.text[:500]
-            except Exception as exc:
-                notification.status = "failed"
-                notification.response_snippet = str(exc)[:500]
 
-        self.db.commit()
-        self.db.refresh(case)
+        await self.db.commit()
+        await self.db.refresh(case)
+        if settings.webhook_url:
+            notification_dispatcher.wake()
         return case
 
-    def list_cases(
+    async def list_cases(
         self,
         status: str | None,
         assignee: str | None,
@@ -70,24 +69,28 @@ class CaseService:
         if reason_code:
             q = q.where(Case.reason_code == reason_code)
 
-        total = self.db.scalar(select(func.count()).select_from(q.subquery())) or 0
-        rows = self.db.scalars(
-            q.order_by(Case.created_at.desc()).offset((page - 1) * page_size).limit(page_size)
+        total = await self.db.scalar(select(func.count()).select_from(q.subquery())) or 0
+        rows = (
+            await self.db.scalars(
+                q.order_by(Case.created_at.desc()).offset((page - 1) * page_size).limit(page_size)
+            )
         ).all()
         return {
             "items": rows,
             "page": page,
             "page_size": page_size,
             "total": total,
-            "stats": self.case_stats(),
+            "stats": await self.case_stats(),
         }
 
-    def case_stats(self) -> dict:
-        status_rows = self.db.execute(
-            select(Case.status, func.count(Case.id)).where(Case.project_id == self.project_id).group_by(Case.status)
+    async def case_stats(self) -> dict:
+        status_rows = (
+            await self.db.execute(
+                select(Case.status, func.count(Case.id)).where(Case.project_id == self.project_id).group_by(Case.status)
+            )
         ).all()
         overdue_at = datetime.now(timezone.utc) - timedelta(hours=24)
-        overdue_open = self.db.scalar(
+        overdue_open = await self.db.scalar(
             select(func.count(Case.id)).where(
                 and_(
                     Case.project_id == self.project_id,
@@ -101,28 +104,28 @@ class CaseService:
             "overdue_open_24h": int(overdue_open),
         }
 
-    def get_case(self, case_id: UUID) -> Case:
-        case = self.db.scalar(select(Case).where(and_(Case.id == case_id, Case.project_id == self.project_id)))
+    async def get_case(self, case_id: UUID) -> Case:
+        case = await self.db.scalar(select(Case).where(and_(Case.id == case_id, Case.project_id == self.project_id)))
         if not case:
             raise HTTPException(status_code=404, detail="case not found")
         return case
 
-    def ack_case(self, case_id: UUID, assignee: str | None) -> Case:
-        case = self.get_case(case_id)
+    async def ack_case(self, case_id: UUID, assignee: str | None) -> Case:
+        case = await self.get_case(case_id)
         case.status = "acknowledged"
         case.assignee = assignee or case.assignee
         case.acknowledged_at = datetime.now(timezone.utc)
-        self.db.commit()
-        self.db.refresh(case)
+        await self.db.commit()
+        await self.db.refresh(case)
         return case
 
-    def resolve_case(self, case_id: UUID, assignee: str | None) -> Case:
-        case = self.get_case(case_id)
+    async def resolve_case(self, case_id: UUID, assignee: str | None) -> Case:
+        case = await self.get_case(case_id)
         case.status = "resolved"
         case.assignee = assignee or case.assignee
         if not case.acknowledged_at:
             case.acknowledged_at = datetime.now(timezone.utc)
         case.resolved_at = datetime.now(timezone.utc)
-        self.db.commit()
-        self.db.refresh(case)
+        await self.db.commit()
+        await self.db.refresh(case)
         return case
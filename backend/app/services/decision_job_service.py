@@ -0,0 +1,221 @@
+"""Batch decide jobs.
+
+`POST /decide/batch` snapshots the selected trace ids, ordered by start time, into a `decision_jobs`
+row and returns at once. `run_decision_jobs` runs in every worker, claims queued jobs with
+`FOR UPDATE SKIP LOCKED` and decides `decision_job_batch_size` traces per transaction through
+`DecisionService.decide_batch`. A slice's decisions commit together with the job's progress
+counters, so a job taken over after a crash or a stale heartbeat resumes at `processed` without
+losing or repeating decisions, which are keyed `decision-job:{job_id}:{trace_id}`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import Counter
+from datetime import timedelta
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import and_, any_, bindparam, func, literal_column, or_, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models import DecisionJob, PolicyVersion, Trace
+from app.schemas.decision import BatchDecideRequest
+from app.services.decision_service import MAX_BATCH_ERRORS, DecisionService
+from app.services.policy_service import PolicyService
+from app.services.utils import utcnow
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+class DecisionJobService:
+    def __init__(self, db: AsyncSession, project_id: UUID):
+        self.db = db
+        self.project_id = project_id
+
+    async def create_job(self, payload: BatchDecideRequest) -> DecisionJob:
+        policy = await PolicyService(self.db, self.project_id).get_active_version(
+            payload.force_policy_id, payload.force_policy_version
+        )
+        if not policy:
+            raise HTTPException(status_code=400, detail="no active policy")
+
+        conditions = [Trace.project_id == self.project_id]
+        if payload.trace_ids is not None:
+            # one array parameter instead of an IN list, which would run out of bind parameters
+            conditions.append(Trace.id == any_(bindparam("trace_ids", payload.trace_ids, type_=ARRAY(PG_UUID(as_uuid=True)))))
+        if payload.start_time is not None:
+            conditions.append(Trace.start_time >= payload.start_time)
+        if payload.end_time is not None:
+            conditions.append(Trace.start_time < payload.end_time)
+        if payload.status:
+            conditions.append(Trace.status == payload.status)
+        if payload.environment:
+            conditions.append(Trace.environment == payload.environment)
+
+        max_traces = settings.decision_job_max_traces
+        selected = (
+            select(Trace.id, Trace.start_time)
+            .where(and_(*conditions))
+            .order_by(Trace.start_time, Trace.id)
+            .limit(max_traces + 1)
+            .subquery()
+        )
+        snapshot = select(
+            func.coalesce(
+                func.array_agg(aggregate_order_by(selected.c.id, selected.c.start_time, selected.c.id)),
+                literal_column("'{}'::uuid[]"),
+            )
+        ).scalar_subquery()
+        job = DecisionJob(project_id=self.project_id, policy_version_id=policy.id, trace_ids=snapshot)
+        self.db.add(job)
+        await self.db.flush()
+
+        total = await self.db.scalar(select(func.cardinality(DecisionJob.trace_ids)).where(DecisionJob.id == job.id))
+        if not total:
+            await self.db.rollback()
+            raise HTTPException(status_code=400, detail="no traces match")
+        if total > max_traces:
+            await self.db.rollback()
+            raise HTTPException(status_code=400, detail=f"more than {max_traces} traces match; narrow the selection")
+        job.total = total
+        await self.db.commit()
+        await self.db.refresh(job)
+        return job
+
+    async def list_jobs(self, status: str | None, limit: int) -> list[DecisionJob]:
+        q = select(DecisionJob).where(DecisionJob.project_id == self.project_id)
+        if status:
+            q = q.where(DecisionJob.status == status)
+        return (await self.db.scalars(q.order_by(DecisionJob.created_at.desc()).limit(limit))).all()
+
+    async def get_job(self, job_id: UUID) -> DecisionJob:
+        job = await self.db.scalar(
+            select(DecisionJob).where(and_(DecisionJob.id == job_id, DecisionJob.project_id == self.project_id))
+        )
+        if not job:
+            raise HTTPException(status_code=404, detail="decision job not found")
+        return job
+
+    async def cancel_job(self, job_id: UUID) -> DecisionJob:
+        """Stops the job before its next slice; the slice being decided is discarded."""
+        job = await self.get_job(job_id)
+        if job.status not in ACTIVE_STATUSES:
+            raise HTTPException(status_code=409, detail=f"decision job is already {job.status}")
+        job.status = "cancelled"
+        job.finished_at = utcnow()
+        await self.db.commit()
+        await self.db.refresh(job)
+        return job
+
+
+async def claim_job() -> UUID | None:
+    """Mark the oldest queued job, or a running one whose worker stopped heartbeating, as ours."""
+    now = utcnow()
+    stale_before = now - timedelta(seconds=settings.decision_job_stale_after_sec)
+    candidate = (
+        select(DecisionJob.id)
+        .where(
+            or_(
+                DecisionJob.status == "queued",
+                and_(DecisionJob.status == "running", DecisionJob.heartbeat_at < stale_before),
+            )
+        )
+        .order_by(DecisionJob.created_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    async with AsyncSessionLocal() as db:
+        job_id = await db.scalar(
+            update(DecisionJob)
+            .where(DecisionJob.id == candidate)
+            .values(status="running", started_at=func.coalesce(DecisionJob.started_at, now), heartbeat_at=now)
+            .returning(DecisionJob.id)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+    return job_id
+
+
+async def process_job(job_id: UUID) -> None:
+    async with AsyncSessionLocal() as db:
+        job = await db.get(DecisionJob, job_id)
+        try:
+            policy = await db.get(PolicyVersion, job.policy_version_id)
+            service = DecisionService(db, job.project_id)
+            prefix = f"decision-job:{job.id}"
+            batch_size = settings.decision_job_batch_size
+            while job.processed < job.total:
+                offset = job.processed
+                # Postgres arrays are 1-based and slices inclusive
+                trace_ids = await db.scalar(
+                    select(DecisionJob.trace_ids[offset + 1 : offset + batch_size]).where(DecisionJob.id == job.id)
+                )
+                result = await service.decide_batch(trace_ids, policy, prefix, settings.decision_job_llm_concurrency)
+                # only the worker that read `offset` may advance it; a cancelled job matches nothing
+                advanced = await db.execute(
+                    update(DecisionJob)
+                    .where(and_(DecisionJob.id == job.id, DecisionJob.status == "running", DecisionJob.processed == offset))
+                    .values(
+                        processed=offset + len(trace_ids),
+                        decided=DecisionJob.decided + result["decided"],
+                        cached=DecisionJob.cached + result["cached"],
+                        skipped=DecisionJob.skipped + result["skipped"],
+                        failed=DecisionJob.failed + result["failed"],
+                        actions=dict(Counter(job.actions) + result["actions"]),
+                        errors=(job.errors + result["errors"])[-MAX_BATCH_ERRORS:],
+                        heartbeat_at=utcnow(),
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                if advanced.rowcount == 0:
+                    await db.rollback()
+                    return
+                await db.commit()
+                await db.refresh(job)
+                await service.open_cases(result["escalations"])
+
+            await db.execute(
+                update(DecisionJob)
+                .where(and_(DecisionJob.id == job.id, DecisionJob.status == "running"))
+                .values(status="succeeded", finished_at=utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        except IntegrityError:
+            # another worker took the job over and wrote this slice first
+            await db.rollback()
+        except Exception as exc:
+            logger.exception("decision job %s failed", job_id)
+            await db.rollback()
+            await db.execute(
+                update(DecisionJob)
+                .where(and_(DecisionJob.id == job_id, DecisionJob.status == "running"))
+                .values(status="failed", error=f"{type(exc).__name__}: {exc}"[:2000], finished_at=utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+
+
+async def run_decision_jobs() -> None:
+    """Runs for the lifetime of the worker."""
+    while True:
+        try:
+            job_id = await claim_job()
+            if job_id:
+                await process_job(job_id)
+                continue
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("decision job worker failed")
+        await asyncio.sleep(settings.decision_job_poll_interval_sec)
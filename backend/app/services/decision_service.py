@@ -1,41 +1,128 @@
 from __future__ import annotations
 
+import asyncio
+import logging
 import uuid
+from collections import Counter, defaultdict
 from datetime import datetime, timezone
 from typing import Any
 from uuid import UUID
 
 from fastapi import HTTPException
-from sqlalchemy import and_, select
+from sqlalchemy import Float, and_, cast, column, select, update, values
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.judge.registry import JudgeRegistry
-from app.models import Evaluation, JudgeCache, JudgeRun, Span, SpanEvent, Trace, TraceDecision
+from app.core.config import settings
+from app.judge.registry import judge_registry
+from app.judge.routing import CascadeResult, JudgeRoute, run_cascade
+from app.models import Evaluation, JudgeRun, PolicyVersion, Project, Span, SpanEvent, Trace, TraceDecision
 from app.schemas.common import ActionEnum
 from app.schemas.decision import DecideRequest
+from app.services.blob_store import load_blobs, resolve_text
 from app.services.case_service import CaseService
-from app.services.policy_engine import PolicyEngine
+from app.services.judge_cache import judge_cache
+from app.services.pattern_set_service import PatternSetService
+from app.services.policy_engine import EvaluatedRule, PolicyEngine, compiled_policy
 from app.services.policy_service import PolicyService
 from app.services.utils import stable_hash
 
+logger = logging.getLogger(__name__)
+
+# judge_model of a decision served from judge_cache (no judge ran), as before routing was configurable
+CACHED_JUDGE_MODEL = "heuristic"
+# per-trace failures a batch reports back; the rest are only counted
+MAX_BATCH_ERRORS = 20
+DEFAULT_JUDGE_ROUTE = JudgeRoute.from_config(None)
+
+
+def _eval_summary(rows: list[Evaluation]) -> dict[str, Any]:
+    eval_map = {row.eval_name: {"score": row.score, "passed": row.passed, "eval_model": row.eval_model} for row in rows}
+    overall = sum((row.score for row in rows), 0.0) / len(rows) if rows else 0.8
+    return {
+        **eval_map,
+        "overall_score": overall,
+        "faithfulness_score": eval_map.get("faithfulness", {}).get("score", 0.8),
+    }
+
+
+def _route_fingerprint(route: JudgeRoute) -> str | None:
+    """Identifies the cascade a cached verdict came from; None for the default route."""
+    if route == DEFAULT_JUDGE_ROUTE:
+        return None
+    return stable_hash(
+        {
+            "stages": [
+                {
+                    "provider": stage.provider,
+                    "min_confidence": stage.min_confidence,
+                    "stop_actions": sorted(stage.stop_actions) if stage.stop_actions else None,
+                }
+                for stage in route.stages
+            ],
+            "latency_budget_ms": route.latency_budget_ms,
+            "cost_budget": route.cost_budget,
+        }
+    )
+
+
+def _input_hash(
+    context: dict[str, Any],
+    request_payload: dict[str, Any] | None,
+    response_payload: dict[str, Any] | None,
+    route: JudgeRoute,
+) -> str:
+    hashed = {
+        "trace_id": context["trace"]["id"],
+        "input_text": context["input_text"],
+        "output_text": context["output_text"],
+        "request": request_payload,
+        "response": response_payload,
+        "evals": context["evals"],
+    }
+    # left out for the built-in patterns, so verdicts cached before pattern sets existed stay valid
+    if context["heuristic_patterns"] is not None:
+        hashed["heuristic_patterns"] = context["heuristic_patterns"]
+    # likewise for the default route; any other route's verdicts are only reused under that same route
+    if (route_fingerprint := _route_fingerprint(route)) is not None:
+        hashed["judge_routing"] = route_fingerprint
+    return stable_hash(hashed)
+
+
+def _decision_summary(decision: TraceDecision) -> dict[str, Any]:
+    """The copy of a decision kept on `traces.decision`."""
+    return {
+        "action": decision.action,
+        "reason_code": decision.reason_code,
+        "severity": decision.severity,
+        "confidence": decision.confidence,
+        "policy_version": decision.policy_version,
+        "judge_model": decision.judge_model,
+    }
+
 
 class DecisionService:
-    def __init__(self, db: Session, project_id: UUID):
+    def __init__(self, db: AsyncSession, project_id: UUID):
         self.db = db
         self.project_id = project_id
         self.policy_service = PolicyService(db, project_id)
         self.case_service = CaseService(db, project_id)
-        self.registry = JudgeRegistry()
+        self.pattern_set_service = PatternSetService(db, project_id)
+        self.registry = judge_registry
 
-    def _build_context(self, trace: Trace, request_payload: dict[str, Any] | None, response_payload: dict[str, Any] | None):
-        eval_rows = self.db.scalars(
-            select(Evaluation).where(and_(Evaluation.project_id == self.project_id, Evaluation.trace_id == trace.id))
-        ).all()
-        eval_map = {row.eval_name: {"score": row.score, "passed": row.passed, "eval_model": row.eval_model} for row in eval_rows}
-        overall = sum((row.score for row in eval_rows), 0.0) / len(eval_rows) if eval_rows else 0.8
-
-        context = {
+    def _context(
+        self,
+        trace: Trace,
+        evals: dict[str, Any],
+        input_text: str | None,
+        output_text: str | None,
+        request_payload: dict[str, Any] | None,
+        response_payload: dict[str, Any] | None,
+        heuristic_patterns: str | None,
+    ) -> dict[str, Any]:
+        return {
             "trace": {
                 "id": str(trace.id),
                 "status": trace.status,
@@ -46,19 +133,144 @@ class DecisionService:
             },
             "request": request_payload or {},
             "response": response_payload or {},
-            "input_text": trace.input_text,
-            "output_text": trace.output_text,
-            "evals": {
-                **eval_map,
-                "overall_score": overall,
-                "faithfulness_score": eval_map.get("faithfulness", {}).get("score", 0.8),
-            },
+            "input_text": input_text,
+            "output_text": output_text,
+            "evals": evals,
             "safety": (request_payload or {}).get("safety", {}),
+            # key of the compiled pattern set the heuristic judge scans with (see PatternSetService.active_key)
+            "heuristic_patterns": heuristic_patterns,
         }
-        return context
+
+    async def _build_context(self, trace: Trace, request_payload: dict[str, Any] | None, response_payload: dict[str, Any] | None):
+        eval_rows = (
+            await self.db.scalars(
+                select(Evaluation).where(and_(Evaluation.project_id == self.project_id, Evaluation.trace_id == trace.id))
+            )
+        ).all()
+        return self._context(
+            trace,
+            _eval_summary(eval_rows),
+            # judges see the full text, not the preview kept in the row
+            await resolve_text(self.project_id, trace.input_text, trace.input_text_blob),
+            await resolve_text(self.project_id, trace.output_text, trace.output_text_blob),
+            request_payload,
+            response_payload,
+            await self.pattern_set_service.active_key(),
+        )
+
+    def _judge_runs(self, trace_id: UUID, result: CascadeResult) -> list[JudgeRun]:
+        return [
+            JudgeRun(
+                project_id=self.project_id,
+                trace_id=trace_id,
+                provider=run.provider,
+                model=run.model,
+                action=run.output["action"],
+                reason_code=run.output["reason_code"],
+                confidence=run.output["confidence"],
+                output=run.output,
+                started_at=run.started_at,
+                latency_ms=run.latency_ms,
+                cost=run.cost,
+            )
+            for run in result.runs
+        ]
+
+    async def _route(self) -> JudgeRoute:
+        return JudgeRoute.from_config(await self.db.scalar(select(Project.judge_routing).where(Project.id == self.project_id)))
+
+    async def _judge(
+        self,
+        trace_id: UUID,
+        context: dict[str, Any],
+        route: JudgeRoute,
+        llm_slots: asyncio.Semaphore | None = None,
+        fallback: bool = True,
+    ) -> tuple[CascadeResult, list[JudgeRun]]:
+        """Run the project's judge cascade on `context`; the runs are returned, not added.
+
+        With `fallback`, a failing judge leaves the verdict to the stages that did answer (the result is then
+        not cacheable); otherwise the failure is raised.
+        """
+        result = await run_cascade(
+            self.registry,
+            route,
+            context,
+            remote_slots=llm_slots,
+            fallback=fallback,
+            speculative=settings.judge_speculative_llm,
+        )
+        return result, self._judge_runs(trace_id, result)
+
+    def _evaluate(self, engine: PolicyEngine, context: dict[str, Any], selected: dict[str, Any]) -> EvaluatedRule:
+        return engine.evaluate(
+            {
+                "request": context["request"],
+                "response": context["response"],
+                "evals": context["evals"],
+                "signals": selected.get("signals", {}),
+                "safety": context["safety"],
+            }
+        )
+
+    def _record_decision(
+        self,
+        trace_id: UUID,
+        policy_ver_key: str,
+        idempotency_key: str,
+        selected: dict[str, Any],
+        judge_model: str,
+        policy_result: EvaluatedRule,
+        now: datetime,
+    ) -> TraceDecision:
+        """Add the judge span, its event and the decision; the caller moves the trace's counters."""
+        judge_span_id = uuid.uuid4()
+        decision = TraceDecision(
+            project_id=self.project_id,
+            trace_id=trace_id,
+            action=policy_result.action or selected["action"],
+            reason_code=policy_result.reason_code or selected["reason_code"],
+            severity=policy_result.severity,
+            confidence=float(selected.get("confidence", 0.5)),
+            policy_version=policy_ver_key,
+            judge_model=judge_model,
+            signals=selected.get("signals", {}),
+            rationale=selected.get("rationale"),
+            idempotency_key=idempotency_key,
+        )
+        self.db.add_all(
+            [
+                Span(
+                    id=judge_span_id,
+                    project_id=self.project_id,
+                    trace_id=trace_id,
+                    parent_span_id=None,
+                    path=[judge_span_id],
+                    name="Decision Judge",
+                    span_type="judge",
+                    status="success",
+                    start_time=now,
+                    end_time=now,
+                    error=None,
+                    attributes={"policy_version": policy_ver_key},
+                    idempotency_key=f"judge-span:{idempotency_key}",
+                ),
+                SpanEvent(
+                    project_id=self.project_id,
+                    trace_id=trace_id,
+                    span_id=judge_span_id,
+                    event_type="EVENT",
+                    event_time=now,
+                    payload={"judge_output": selected, "policy_result": policy_result.__dict__},
+                    idempotency_key=f"judge-event:{idempotency_key}",
+                ),
+                decision,
+            ]
+        )
+        return decision
 
     async def decide(self, payload: DecideRequest) -> dict[str, Any]:
-        existing = self.db.scalar(
+        existing = await self.db.scalar(
             select(TraceDecision).where(
                 and_(TraceDecision.project_id == self.project_id, TraceDecision.idempotency_key == payload.idempotency_key)
             )
@@ -66,177 +278,230 @@ class DecisionService:
         if existing:
             return {
                 "decision": existing,
-                "judge_runs": self.db.scalars(
-                    select(JudgeRun).where(and_(JudgeRun.project_id == self.project_id, JudgeRun.trace_id == existing.trace_id))
+                "judge_runs": (
+                    await self.db.scalars(
+                        select(JudgeRun).where(and_(JudgeRun.project_id == self.project_id, JudgeRun.trace_id == existing.trace_id))
+                    )
                 ).all(),
             }
 
         if not payload.trace_id:
             raise HTTPException(status_code=400, detail="trace_id is required for MVP")
 
-        trace = self.db.scalar(select(Trace).where(and_(Trace.id == payload.trace_id, Trace.project_id == self.project_id)))
+        trace = await self.db.scalar(select(Trace).where(and_(Trace.id == payload.trace_id, Trace.project_id == self.project_id)))
         if not trace:
             raise HTTPException(status_code=404, detail="trace not found")
 
-        active_policy = self.policy_service.get_active_version(payload.force_policy_id, payload.force_policy_version)
+        active_policy = await self.policy_service.get_active_version(payload.force_policy_id, payload.force_policy_version)
         if not active_policy:
             raise HTTPException(status_code=400, detail="no active policy")
 
-        context = self._build_context(trace, payload.request_payload, payload.response_payload)
-        input_hash = stable_hash(
-            {
-                "trace_id": str(trace.id),
-                "input_text": trace.input_text,
-                "output_text": trace.output_text,
-                "request": payload.request_payload,
-                "response": payload.response_payload,
-                "evals": context["evals"],
-            }
-        )
+        context = await self._build_context(trace, payload.request_payload, payload.response_payload)
+        route = await self._route()
+        input_hash = _input_hash(context, payload.request_payload, payload.response_payload, route)
         policy_ver_key = f"{active_policy.policy_id}:v{active_policy.version}"
 
-        cached = self.db.scalar(
-            select(JudgeCache).where(
-                and_(
-                    JudgeCache.project_id == self.project_id,
-                    JudgeCache.input_hash == input_hash,
-                    JudgeCache.policy_version == policy_ver_key,
-                )
-            )
-        )
-        judge_runs: list[JudgeRun] = []
+        cached = (await judge_cache.lookup(self.db, self.project_id, {input_hash}, policy_ver_key)).get(input_hash)
         if cached:
-            selected = cached.decision
+            selected, judge_model = cached, CACHED_JUDGE_MODEL
         else:
-            heuristic_provider = self.registry.get("heuristic")
-            heuristic_out = await heuristic_provider.judge(context)
-            heuristic_run = JudgeRun(
-                project_id=self.project_id,
-                trace_id=trace.id,
-                provider="heuristic",
-                model="rules-v1",
-                action=heuristic_out["action"],
-                reason_code=heuristic_out["reason_code"],
-                confidence=heuristic_out["confidence"],
-                output=heuristic_out,
-            )
-            self.db.add(heuristic_run)
-            judge_runs.append(heuristic_run)
-
-            selected = heuristic_out
-            if not (
-                heuristic_out["action"] in {ActionEnum.BLOCK.value, ActionEnum.ESCALATE.value}
-                and heuristic_out["confidence"] >= 0.9
-            ):
-                llm_provider = self.registry.get("llm")
-                llm_out = await llm_provider.judge(context)
-                llm_run = JudgeRun(
-                    project_id=self.project_id,
-                    trace_id=trace.id,
-                    provider="llm",
-                    model="gpt-judge",
-                    action=llm_out["action"],
-                    reason_code=llm_out["reason_code"],
-                    confidence=llm_out["confidence"],
-                    output=llm_out,
-                )
-                self.db.add(llm_run)
-                judge_runs.append(llm_run)
-                selected = llm_out
-
-            self.db.add(
-                JudgeCache(
-                    project_id=self.project_id,
-                    input_hash=input_hash,
-                    policy_version=policy_ver_key,
-                    decision=selected,
-                )
-            )
-
-        engine = PolicyEngine(active_policy.definition)
-        policy_result = engine.evaluate(
-            {
-                "request": payload.request_payload or {},
-                "response": payload.response_payload or {},
-                "evals": context["evals"],
-                "signals": selected.get("signals", {}),
-                "safety": context["safety"],
-            }
-        )
+            result, judge_runs = await self._judge(trace.id, context, route)
+            selected, judge_model = result.selected, result.judge_model
+            self.db.add_all(judge_runs)
+            if result.cacheable:
+                await judge_cache.store(self.db, self.project_id, {input_hash: selected}, policy_ver_key)
 
-        final_action = policy_result.action or selected["action"]
-        reason_code = policy_result.reason_code or selected["reason_code"]
-        severity = policy_result.severity
-
-        judge_span_id = uuid.uuid4()
-        now = datetime.now(timezone.utc)
-        self.db.add(
-            Span(
-                id=judge_span_id,
-                project_id=self.project_id,
-                trace_id=trace.id,
-                parent_span_id=None,
-                name="Decision Judge",
-                span_type="judge",
-                status="success",
-                start_time=now,
-                end_time=now,
-                error=None,
-                attributes={"policy_version": policy_ver_key},
-                idempotency_key=f"judge-span:{payload.idempotency_key}",
-            )
-        )
-        self.db.add(
-            SpanEvent(
-                project_id=self.project_id,
-                trace_id=trace.id,
-                span_id=judge_span_id,
-                event_type="EVENT",
-                event_time=now,
-                payload={"judge_output": selected, "policy_result": policy_result.__dict__},
-                idempotency_key=f"judge-event:{payload.idempotency_key}",
-            )
+        policy_result = self._evaluate(compiled_policy(active_policy), context, selected)
+        decision = self._record_decision(
+            trace.id,
+            policy_ver_key,
+            payload.idempotency_key,
+            selected,
+            judge_model,
+            policy_result,
+            datetime.now(timezone.utc),
         )
 
-        decision = TraceDecision(
-            project_id=self.project_id,
-            trace_id=trace.id,
-            action=final_action,
-            reason_code=reason_code,
-            severity=severity,
-            confidence=float(selected.get("confidence", 0.5)),
-            policy_version=policy_ver_key,
-            judge_model="gpt-judge" if any(r.provider == "llm" for r in judge_runs) else "heuristic",
-            signals=selected.get("signals", {}),
-            rationale=selected.get("rationale"),
-            idempotency_key=payload.idempotency_key,
-        )
-        self.db.add(decision)
-
-        trace.decision = {
-            "action": decision.action,
-            "reason_code": decision.reason_code,
-            "severity": decision.severity,
-            "confidence": decision.confidence,
-            "policy_version": decision.policy_version,
-            "judge_model": decision.judge_model,
-        }
+        # the judge span is born ended, so both rollup counters move together (see TraceService._apply_trace_deltas)
+        trace.total_spans = Trace.total_spans + 1
+        trace.ended_spans = Trace.ended_spans + 1
+        trace.completion_rate = cast(Trace.ended_spans + 1, Float) / cast(Trace.total_spans + 1, Float)
+        trace.decision = _decision_summary(decision)
 
         try:
-            self.db.commit()
+            await self.db.commit()
         except IntegrityError:
-            self.db.rollback()
+            await self.db.rollback()
             raise HTTPException(status_code=409, detail="idempotency conflict")
 
-        self.db.refresh(decision)
+        await self.db.refresh(decision)
 
         if decision.action == ActionEnum.ESCALATE.value:
             await self.case_service.create_case_and_notify(trace.id, decision.reason_code)
 
-        recent_judge_runs = self.db.scalars(
-            select(JudgeRun)
-            .where(and_(JudgeRun.project_id == self.project_id, JudgeRun.trace_id == trace.id))
-            .order_by(JudgeRun.created_at.desc())
-            .limit(5)
+        recent_judge_runs = (
+            await self.db.scalars(
+                select(JudgeRun)
+                .where(and_(JudgeRun.project_id == self.project_id, JudgeRun.trace_id == trace.id))
+                .order_by(JudgeRun.created_at.desc())
+                .limit(5)
+            )
         ).all()
         return {"decision": decision, "judge_runs": recent_judge_runs}
+
+    async def decide_batch(
+        self,
+        trace_ids: list[UUID],
+        policy: PolicyVersion,
+        idempotency_prefix: str,
+        llm_concurrency: int,
+    ) -> dict[str, Any]:
+        """Decide every trace without a `{idempotency_prefix}:{trace_id}` decision yet, without committing.
+
+        Traces, evaluations, offloaded trace text and cached judge outputs are each read with one round
+        trip for the whole batch. Cache misses are judged concurrently with at most `llm_concurrency`
+        LLM calls in flight; a trace whose judge call fails is counted and left undecided. Rows are
+        added for one bulk flush and trace counters move in a single UPDATE. After committing, the
+        caller opens cases for `result["escalations"]` with `open_cases`.
+        """
+        keys = {trace_id: f"{idempotency_prefix}:{trace_id}" for trace_id in trace_ids}
+        result: dict[str, Any] = {
+            "decided": 0,
+            "cached": 0,
+            "skipped": 0,
+            "failed": 0,
+            "actions": Counter(),
+            "errors": [],
+            "escalations": [],
+        }
+        if not keys:
+            return result
+        done = set(
+            (
+                await self.db.scalars(
+                    select(TraceDecision.trace_id).where(
+                        and_(TraceDecision.project_id == self.project_id, TraceDecision.idempotency_key.in_(keys.values()))
+                    )
+                )
+            ).all()
+        )
+        pending = [trace_id for trace_id in keys if trace_id not in done]
+        traces = (
+            (await self.db.scalars(select(Trace).where(and_(Trace.project_id == self.project_id, Trace.id.in_(pending)))))
+            .all()
+            if pending
+            else []
+        )
+        # already decided by this batch's key, or deleted since the ids were collected
+        result["skipped"] = len(keys) - len(traces)
+        if not traces:
+            return result
+
+        evals: dict[UUID, list[Evaluation]] = defaultdict(list)
+        for row in (
+            await self.db.scalars(
+                select(Evaluation).where(
+                    and_(Evaluation.project_id == self.project_id, Evaluation.trace_id.in_([t.id for t in traces]))
+                )
+            )
+        ).all():
+            evals[row.trace_id].append(row)
+        texts = await load_blobs(
+            self.project_id, {digest for t in traces for digest in (t.input_text_blob, t.output_text_blob) if digest}
+        )
+        heuristic_patterns = await self.pattern_set_service.active_key()
+        contexts = {
+            trace.id: self._context(
+                trace,
+                _eval_summary(evals[trace.id]),
+                texts.get(trace.input_text_blob, trace.input_text),
+                texts.get(trace.output_text_blob, trace.output_text),
+                None,
+                None,
+                heuristic_patterns,
+            )
+            for trace in traces
+        }
+        route = await self._route()
+        hashes = {trace_id: _input_hash(context, None, None, route) for trace_id, context in contexts.items()}
+        policy_ver_key = f"{policy.policy_id}:v{policy.version}"
+        cached = await judge_cache.lookup(self.db, self.project_id, set(hashes.values()), policy_ver_key)
+
+        misses = [trace.id for trace in traces if hashes[trace.id] not in cached]
+        slots = asyncio.Semaphore(llm_concurrency)
+        outcomes = await asyncio.gather(
+            # no fallback: a trace one of its judges could not answer is left for a later run
+            *(self._judge(trace_id, contexts[trace_id], route, slots, fallback=False) for trace_id in misses),
+            return_exceptions=True,
+        )
+        judged: dict[UUID, tuple[CascadeResult, list[JudgeRun]]] = {}
+        for trace_id, outcome in zip(misses, outcomes):
+            if isinstance(outcome, Exception):
+                result["failed"] += 1
+                if len(result["errors"]) < MAX_BATCH_ERRORS:
+                    result["errors"].append({"trace_id": str(trace_id), "error": f"{type(outcome).__name__}: {outcome}"[:500]})
+            elif isinstance(outcome, BaseException):
+                raise outcome
+            else:
+                judged[trace_id] = outcome
+
+        engine = compiled_policy(policy)
+        now = datetime.now(timezone.utc)
+        new_cache_entries: dict[str, dict[str, Any]] = {}
+        summaries: dict[UUID, dict[str, Any]] = {}
+        for trace in traces:
+            if trace.id in judged:
+                cascade, judge_runs = judged[trace.id]
+                selected, judge_model = cascade.selected, cascade.judge_model
+                self.db.add_all(judge_runs)
+                if cascade.cacheable:
+                    new_cache_entries[hashes[trace.id]] = selected
+            elif hashes[trace.id] in cached:
+                selected, judge_model = cached[hashes[trace.id]], CACHED_JUDGE_MODEL
+                result["cached"] += 1
+            else:
+                continue
+            decision = self._record_decision(
+                trace.id,
+                policy_ver_key,
+                keys[trace.id],
+                selected,
+                judge_model,
+                self._evaluate(engine, contexts[trace.id], selected),
+                now,
+            )
+            summaries[trace.id] = _decision_summary(decision)
+            result["decided"] += 1
+            result["actions"][decision.action] += 1
+            if decision.action == ActionEnum.ESCALATE.value:
+                result["escalations"].append((trace.id, decision.reason_code))
+
+        await self.db.flush()
+        await judge_cache.store(self.db, self.project_id, new_cache_entries, policy_ver_key)
+        await self._apply_decisions_to_traces(summaries)
+        return result
+
+    async def _apply_decisions_to_traces(self, summaries: dict[UUID, dict[str, Any]]) -> None:
+        """Count each trace's judge span and store its decision summary in one UPDATE ... FROM (VALUES ...)."""
+        if not summaries:
+            return
+        rows = values(
+            column("trace_id", PG_UUID(as_uuid=True)),
+            column("decision", JSONB),
+            name="decided",
+        ).data(list(summaries.items()))
+        await self.db.execute(
+            update(Trace)
+            .where(and_(Trace.id == rows.c.trace_id, Trace.project_id == self.project_id))
+            .values(
+                total_spans=Trace.total_spans + 1,
+                ended_spans=Trace.ended_spans + 1,
+                completion_rate=cast(Trace.ended_spans + 1, Float) / cast(Trace.total_spans + 1, Float),
+                decision=rows.c.decision,
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    async def open_cases(self, escalations: list[tuple[UUID, str]]) -> None:
+        for trace_id, reason_code in escalations:
+            await self.case_service.create_case_and_notify(trace_id, reason_code)
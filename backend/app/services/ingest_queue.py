@@ -0,0 +1,399 @@
+"""Write-behind ingest queue.
+
+Validated ingest payloads are appended to a segmented append-only log on local disk and acknowledged
+with their queue offset. A dispatcher task drains the log in windows, merges consecutive span batches
+per project and applies them through `TraceService` with at most `writers` projects in flight. The committed offset only
+advances once a whole window is in Postgres, so a crash replays at most one window (ingest is idempotent).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import struct
+import threading
+import zlib
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.schemas.ingest import IngestSpansRequest, IngestTraceBatchRequest
+from app.services.trace_service import TraceService
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_SUFFIX = ".log"
+COMMIT_FILE = "commit.offset"
+DEAD_LETTER_FILE = "dead_letter.jsonl"
+
+
+class IngestQueueFull(Exception):
+    pass
+
+
+class _WriterStopped(Exception):
+    pass
+
+
+class SegmentedLog:
+    """Length-prefixed, CRC-checked records split across files named by their first offset."""
+
+    HEADER = struct.Struct(">QII")  # offset, payload length, crc32
+
+    def __init__(self, directory: str | Path, segment_bytes: int, fsync: bool = True):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._segments = sorted(int(p.stem) for p in self.directory.glob(f"*{SEGMENT_SUFFIX}"))
+        self.committed = self._read_commit()
+        self.next_offset = self._recover()
+        if not self._segments:
+            self._segments.append(self.next_offset)
+        self._file = open(self._segment_path(self._segments[-1]), "ab")
+        self._read_pos: tuple[int, int, int] | None = None  # (segment base, byte position, offset)
+
+    def _segment_path(self, base: int) -> Path:
+        return self.directory / f"{base:020d}{SEGMENT_SUFFIX}"
+
+    def _read_commit(self) -> int:
+        path = self.directory / COMMIT_FILE
+        if path.exists():
+            return int(path.read_text().strip() or 0)
+        return self._segments[0] if self._segments else 0
+
+    def _recover(self) -> int:
+        """Scan the tail segment, truncating a torn final write; returns the next offset to assign."""
+        if not self._segments:
+            return self.committed
+        base = self._segments[-1]
+        path = self._segment_path(base)
+        next_offset = base
+        valid_bytes = 0
+        with open(path, "rb") as fh:
+            for offset, _, end in self._frames(fh, 0):
+                next_offset = offset + 1
+                valid_bytes = end
+        if valid_bytes != path.stat().st_size:
+            logger.warning("truncating torn ingest log tail in %s at byte %d", path, valid_bytes)
+            with open(path, "r+b") as fh:
+                fh.truncate(valid_bytes)
+        return next_offset
+
+    def _frames(self, fh, position: int) -> Iterator[tuple[int, bytes, int]]:
+        fh.seek(position)
+        while True:
+            header = fh.read(self.HEADER.size)
+            if len(header) < self.HEADER.size:
+                return
+            offset, length, crc = self.HEADER.unpack(header)
+            data = fh.read(length)
+            if len(data) < length or zlib.crc32(data) != crc:
+                return
+            position += self.HEADER.size + length
+            yield offset, data, position
+
+    def append(self, data: bytes, max_depth: int | None = None) -> int:
+        """Append one record; with `max_depth`, raise `IngestQueueFull` instead once that many are pending."""
+        with self._lock:
+            # checked under the lock, so concurrent appends cannot overshoot the bound
+            if max_depth is not None and self.depth >= max_depth:
+                raise IngestQueueFull(f"ingest queue is full ({self.depth} pending records)")
+            offset = self.next_offset
+            if self._file.tell() >= self.segment_bytes:
+                self._file.close()
+                self._segments.append(offset)
+                self._file = open(self._segment_path(offset), "ab")
+            self._file.write(self.HEADER.pack(offset, len(data), zlib.crc32(data)) + data)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self.next_offset = offset + 1
+            return offset
+
+    def read(self, start: int, max_records: int) -> list[tuple[int, bytes]]:
+        with self._lock:
+            end = self.next_offset
+            segments = list(self._segments)
+        if start >= end:
+            return []
+
+        if self._read_pos and self._read_pos[2] == start and self._read_pos[0] in segments:
+            index, position = segments.index(self._read_pos[0]), self._read_pos[1]
+        else:
+            index, position = max(i for i, base in enumerate(segments) if base <= start), 0
+
+        records: list[tuple[int, bytes]] = []
+        while True:
+            with open(self._segment_path(segments[index]), "rb") as fh:
+                for offset, data, next_position in self._frames(fh, position):
+                    if offset >= end or len(records) >= max_records:
+                        break
+                    position = next_position
+                    if offset >= start:
+                        records.append((offset, data))
+            done = len(records) >= max_records or (records and records[-1][0] + 1 >= end)
+            if done or index + 1 >= len(segments):
+                break
+            index, position = index + 1, 0
+
+        if records:
+            self._read_pos = (segments[index], position, records[-1][0] + 1)
+        return records
+
+    def commit(self, offset: int) -> None:
+        """Mark everything below `offset` as applied and delete segments that are fully consumed."""
+        tmp = self.directory / f"{COMMIT_FILE}.tmp"
+        tmp.write_text(str(offset))
+        os.replace(tmp, self.directory / COMMIT_FILE)
+        with self._lock:
+            self.committed = offset
+            while len(self._segments) > 1 and self._segments[1] <= offset:
+                self._segment_path(self._segments.pop(0)).unlink(missing_ok=True)
+
+    @property
+    def depth(self) -> int:
+        return self.next_offset - self.committed
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+def _is_transient(exc: DBAPIError) -> bool:
+    """Connection loss and the like, which retrying fixes; a DataError or IntegrityError from a record never will."""
+    return exc.connection_invalidated or isinstance(exc, (OperationalError, InterfaceError))
+
+
+class IngestQueue:
+    def __init__(
+        self,
+        log: SegmentedLog,
+        max_depth: int,
+        batch_records: int,
+        writers: int,
+    ):
+        self.log = log
+        self.max_depth = max_depth
+        self.batch_records = batch_records
+        self.writers = writers
+        self.rejected = 0
+        # windows the dispatcher failed to apply in a row, and the last error; reset once a window commits
+        self.failing_windows = 0
+        self.last_error: str | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._committed: asyncio.Condition | None = None
+        self._stopping = False
+        self._task: asyncio.Task | None = None
+
+    def enqueue(self, kind: str, project_id: UUID, payload: dict[str, Any]) -> int:
+        """Blocking append (fsync); call it from a worker thread, not the event loop."""
+        record = {"kind": kind, "project_id": str(project_id), "payload": payload}
+        offset = self.log.append(json.dumps(record, separators=(",", ":")).encode("utf-8"), self.max_depth)
+        if self._loop and self._wakeup:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        return offset
+
+    async def wait_committed(self, offset: int, timeout: float) -> bool:
+        if self._committed is None:
+            return self.log.committed > offset
+        try:
+            async with self._committed:
+                await asyncio.wait_for(self._committed.wait_for(lambda: self.log.committed > offset), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "depth": self.log.depth,
+            "max_depth": self.max_depth,
+            "next_offset": self.log.next_offset,
+            "committed_offset": self.log.committed,
+            "rejected_records": self.rejected,
+            "running": self.running,
+            "failing_windows": self.failing_windows,
+            "last_error": self.last_error,
+        }
+
+    @property
+    def running(self) -> bool:
+        return bool(self._task and not self._task.done())
+
+    async def start(self) -> None:
+        if self._task:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._committed = asyncio.Condition()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(), name="ingest-dispatcher")
+
+    async def stop(self) -> None:
+        self._stopping = True
+        if self._wakeup:
+            self._wakeup.set()
+        if self._task:
+            await self._task
+            self._task = None
+        self.log.close()
+
+    async def _run(self) -> None:
+        semaphore = asyncio.Semaphore(self.writers)
+
+        async def bounded(project_id: UUID, records: list[tuple[int, dict[str, Any]]]) -> None:
+            async with semaphore:
+                await self._apply_project(project_id, records)
+
+        backoff = 0.5
+        while not self._stopping:
+            self._wakeup.clear()
+            try:
+                records = await asyncio.to_thread(self.log.read, self.log.committed, self.batch_records)
+                if not records:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), 0.5)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                groups: dict[UUID, list[tuple[int, dict[str, Any]]]] = {}
+                unreadable: list[tuple[int, bytes]] = []
+                for offset, data in records:
+                    try:
+                        record = json.loads(data)
+                        project_id = UUID(record["project_id"])
+                        if record["kind"] not in ("traces", "spans") or not isinstance(record["payload"], dict):
+                            raise ValueError(record["kind"])
+                    except (ValueError, KeyError, TypeError):
+                        unreadable.append((offset, data))
+                        continue
+                    groups.setdefault(project_id, []).append((offset, record))
+
+                # one task per project keeps per-trace ordering; projects are written concurrently
+                await asyncio.gather(*(bounded(pid, recs) for pid, recs in groups.items()))
+                # only once the window is through, so a retried window does not reject them again
+                for offset, data in unreadable:
+                    self._dead_letter_raw(offset, data)
+                await asyncio.to_thread(self.log.commit, records[-1][0] + 1)
+            except _WriterStopped:
+                return  # the uncommitted window is replayed on the next start
+            except Exception as exc:
+                # the window stays uncommitted and is retried; ingest is idempotent, so records applied
+                # before the failure are skipped the next time
+                self.failing_windows += 1
+                self.last_error = f"{type(exc).__name__}: {exc}"
+                logger.exception(
+                    "ingest dispatcher failed on the window at offset %d, retrying in %.1fs", self.log.committed, backoff
+                )
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+                continue
+            backoff = 0.5
+            self.failing_windows = 0
+            async with self._committed:
+                self._committed.notify_all()
+
+    async def _apply_project(self, project_id: UUID, records: list[tuple[int, dict[str, Any]]]) -> None:
+        for kind, batch in self._merge(records):
+            if kind == "traces":
+                apply = lambda service, b=batch: service.ingest_trace_batch(
+                    IngestTraceBatchRequest.model_validate(b[0][1]["payload"])
+                )
+            else:
+                apply = lambda service, b=batch: service.ingest_span_events(
+                    IngestSpansRequest(
+                        events=[e for _, r in b for e in r["payload"]["events"]],
+                        allow_missing_parent=b[0][1]["payload"].get("allow_missing_parent", True),
+                    )
+                )
+            try:
+                await self._with_retry(project_id, apply)
+            except (HTTPException, ValueError, KeyError, DBAPIError):
+                # a database error that got here is not transient (see _is_transient): the data is bad
+                if len(batch) == 1:
+                    self._dead_letter(batch[0], project_id)
+                    continue
+                # isolate the offending record(s) instead of dropping the whole merged batch
+                for single in batch:
+                    await self._apply_project(project_id, [single])
+
+    @staticmethod
+    def _merge(records: list[tuple[int, dict[str, Any]]]) -> Iterator[tuple[str, list[tuple[int, dict[str, Any]]]]]:
+        """Coalesce consecutive span batches that share `allow_missing_parent`; trace batches stay single."""
+        run: list[tuple[int, dict[str, Any]]] = []
+        for item in records:
+            record = item[1]
+            if record["kind"] == "spans":
+                if run and run[0][1]["payload"].get("allow_missing_parent") == record["payload"].get("allow_missing_parent"):
+                    run.append(item)
+                    continue
+                if run:
+                    yield "spans", run
+                run = [item]
+                continue
+            if run:
+                yield "spans", run
+                run = []
+            yield record["kind"], [item]
+        if run:
+            yield "spans", run
+
+    async def _with_retry(self, project_id: UUID, apply) -> None:
+        backoff = 0.5
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    await apply(TraceService(db, project_id))
+                return
+            except DBAPIError as exc:
+                if not _is_transient(exc):
+                    raise
+                if self._stopping:
+                    raise _WriterStopped() from exc
+                logger.warning("ingest writer database error, retrying in %.1fs: %s", backoff, exc)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    def _dead_letter(self, item: tuple[int, dict[str, Any]], project_id: UUID) -> None:
+        offset, record = item
+        self.rejected += 1
+        logger.error("ingest record %d for project %s rejected", offset, project_id)
+        with open(self.log.directory / DEAD_LETTER_FILE, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps({"offset": offset, **record}) + "\n")
+
+    def _dead_letter_raw(self, offset: int, data: bytes) -> None:
+        """A record that is not a queued ingest payload at all; kept as text for inspection."""
+        self.rejected += 1
+        logger.error("ingest record %d is unreadable, rejected", offset)
+        with open(self.log.directory / DEAD_LETTER_FILE, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps({"offset": offset, "raw": data.decode("utf-8", errors="replace")}) + "\n")
+
+
+_queue: IngestQueue | None = None
+
+
+def get_ingest_queue() -> IngestQueue:
+    global _queue
+    if _queue is None:
+        _queue = IngestQueue(
+            SegmentedLog(settings.ingest_queue_dir, settings.ingest_queue_segment_bytes, settings.ingest_queue_fsync),
+            max_depth=settings.ingest_queue_max_depth,
+            batch_records=settings.ingest_queue_batch_records,
+            writers=settings.ingest_queue_writers,
+        )
+    return _queue
+
+
+def queue_enabled() -> bool:
+    return settings.ingest_mode == "queue"
@@ -0,0 +1,317 @@
+"""Two-tier cache of judge outputs keyed by (project, input hash, policy version).
+
+The first tier is a per-worker TTL/LRU map; the second is the `judge_cache` table, read with one
+query for all the hashes a decide call or batch slice misses in memory. Table rows older than
+`judge_cache_ttl_sec` count as misses and `run_judge_cache_sweeper` deletes them, along with each
+project's oldest rows past `judge_cache_max_rows_per_project`. Activating a policy version deletes
+the cached outputs of the policy's other versions and publishes the change on `JUDGE_CACHE_CHANNEL`,
+which `project_cache.listen_for_invalidations` relays to every worker's memory tier. Writes and
+invalidations reach this worker's memory tier only once the caller's transaction commits, so a rolled
+back decide never leaves a verdict in memory that the table does not have.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from collections.abc import Callable
+from typing import Any
+from uuid import UUID, uuid4
+
+from sqlalchemy import and_, delete, event, func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import async_engine
+from app.models import JudgeCache
+from app.services.utils import utcnow
+
+logger = logging.getLogger(__name__)
+
+JUDGE_CACHE_CHANNEL = "judge_cache_invalidate"
+# arbitrary, only has to be unique among the advisory locks this app takes
+SWEEP_LOCK_KEY = 0x6A636368
+SWEEP_BATCH_ROWS = 10_000
+
+CacheKey = tuple[UUID, str, str]
+# Session.info key of the memory-tier changes waiting for the session's transaction to commit
+PENDING_MEMORY_KEY = "judge_cache_pending"
+
+
+def _apply_pending(session: Session) -> None:
+    pending = session.info.get(PENDING_MEMORY_KEY)
+    if pending:
+        changes = list(pending)
+        pending.clear()
+        for change in changes:
+            change()
+
+
+def _drop_pending(session: Session) -> None:
+    pending = session.info.get(PENDING_MEMORY_KEY)
+    if pending:
+        pending.clear()
+
+
+def _after_commit(db: AsyncSession, change: Callable[[], None]) -> None:
+    """Run `change` once `db`'s current transaction commits; dropped if it rolls back."""
+    session = db.sync_session
+    pending = session.info.get(PENDING_MEMORY_KEY)
+    if pending is None:
+        pending = session.info[PENDING_MEMORY_KEY] = []
+        event.listen(session, "after_commit", _apply_pending)
+        event.listen(session, "after_rollback", _drop_pending)
+    pending.append(change)
+
+
+class MemoryJudgeCache:
+    def __init__(self, max_entries: int, ttl_sec: float):
+        self.max_entries = max_entries
+        self.ttl_sec = ttl_sec
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[CacheKey, tuple[float, dict[str, Any]]] = OrderedDict()
+
+    def get_many(self, project_id: UUID, input_hashes: set[str], policy_version: str) -> dict[str, dict[str, Any]]:
+        found = {}
+        now = time.monotonic()
+        with self._lock:
+            for input_hash in input_hashes:
+                key = (project_id, input_hash, policy_version)
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] <= now:
+                    del self._entries[key]
+                    self.expirations += 1
+                    entry = None
+                if entry is None:
+                    self.misses += 1
+                    continue
+                self._entries.move_to_end(key)
+                self.hits += 1
+                found[input_hash] = entry[1]
+        return found
+
+    def put_many(self, project_id: UUID, decisions: dict[str, dict[str, Any]], policy_version: str) -> None:
+        expires_at = time.monotonic() + self.ttl_sec
+        with self._lock:
+            for input_hash, decision in decisions.items():
+                key = (project_id, input_hash, policy_version)
+                self._entries[key] = (expires_at, decision)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_policy(self, project_id: UUID, policy_id: UUID, keep_version: str | None) -> None:
+        """Drop the project's entries for versions of `policy_id` other than `keep_version`."""
+        prefix = f"{policy_id}:v"
+        with self._lock:
+            stale = [
+                key
+                for key in self._entries
+                if key[0] == project_id and key[2].startswith(prefix) and key[2] != keep_version
+            ]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict[str, int | float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_sec": self.ttl_sec,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+class TieredJudgeCache:
+    def __init__(self, memory: MemoryJudgeCache):
+        self.memory = memory
+        # table-tier counters are per worker, like the memory tier's
+        self.db_hits = 0
+        self.db_misses = 0
+        self.db_expired_evictions = 0
+        self.db_size_evictions = 0
+        self.db_invalidations = 0
+
+    async def lookup(
+        self, db: AsyncSession, project_id: UUID, input_hashes: set[str], policy_version: str
+    ) -> dict[str, dict[str, Any]]:
+        found = self.memory.get_many(project_id, input_hashes, policy_version)
+        missing = input_hashes - found.keys()
+        if not missing:
+            return found
+        conditions = [
+            JudgeCache.project_id == project_id,
+            JudgeCache.input_hash.in_(missing),
+            JudgeCache.policy_version == policy_version,
+        ]
+        if settings.judge_cache_ttl_sec is not None:
+            # rows the sweeper has not reached yet are already expired
+            conditions.append(JudgeCache.created_at >= utcnow() - timedelta(seconds=settings.judge_cache_ttl_sec))
+        loaded = dict((await db.execute(select(JudgeCache.input_hash, JudgeCache.decision).where(and_(*conditions)))).all())
+        self.db_hits += len(loaded)
+        self.db_misses += len(missing) - len(loaded)
+        self.memory.put_many(project_id, loaded, policy_version)
+        return {**found, **loaded}
+
+    async def store(
+        self, db: AsyncSession, project_id: UUID, decisions: dict[str, dict[str, Any]], policy_version: str
+    ) -> None:
+        """Upsert in the caller's transaction; an expired row that was not swept yet is overwritten. The
+        memory tier gets the decisions when that transaction commits."""
+        if not decisions:
+            return
+        now = utcnow()
+        stmt = pg_insert(JudgeCache).values(
+            [
+                {
+                    "id": uuid4(),
+                    "project_id": project_id,
+                    "input_hash": input_hash,
+                    "policy_version": policy_version,
+                    "decision": decision,
+                    "created_at": now,
+                }
+                for input_hash, decision in decisions.items()
+            ]
+        )
+        await db.execute(
+            stmt.on_conflict_do_update(
+                constraint="uq_judge_cache_lookup",
+                set_={"decision": stmt.excluded.decision, "created_at": stmt.excluded.created_at},
+            )
+        )
+        _after_commit(db, lambda: self.memory.put_many(project_id, decisions, policy_version))
+
+    async def invalidate_policy(self, db: AsyncSession, project_id: UUID, policy_id: UUID, keep_version: str | None) -> None:
+        """Delete cached outputs of `policy_id`'s versions other than `keep_version`, in the caller's transaction.
+
+        This worker's memory entries are dropped when the transaction commits, other workers' when the
+        NOTIFY is delivered.
+        """
+        conditions = [JudgeCache.project_id == project_id, JudgeCache.policy_version.startswith(f"{policy_id}:v")]
+        if keep_version is not None:
+            conditions.append(JudgeCache.policy_version != keep_version)
+        result = await db.execute(delete(JudgeCache).where(and_(*conditions)))
+        self.db_invalidations += result.rowcount
+        await db.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": JUDGE_CACHE_CHANNEL, "payload": f"{project_id}:{policy_id}:{keep_version or ''}"},
+        )
+        _after_commit(db, lambda: self.memory.invalidate_policy(project_id, policy_id, keep_version))
+
+    def handle_notification(self, payload: str) -> None:
+        """Apply an invalidation published by `invalidate_policy` on any worker."""
+        try:
+            project_id, policy_id, keep_version = payload.split(":", 2)
+            self.memory.invalidate_policy(UUID(project_id), UUID(policy_id), keep_version or None)
+        except ValueError:
+            self.memory.clear()
+
+    async def sweep(self) -> dict[str, int] | None:
+        """Delete expired rows, then each project's oldest rows past the size bound; None if another worker holds the lock."""
+        expired = over_size = 0
+        async with async_engine.connect() as conn:
+            if not await conn.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": SWEEP_LOCK_KEY}):
+                await conn.rollback()
+                return None
+            try:
+                if settings.judge_cache_ttl_sec is not None:
+                    cutoff = utcnow() - timedelta(seconds=settings.judge_cache_ttl_sec)
+                    expired = await self._delete_batches(conn, JudgeCache.created_at < cutoff)
+                max_rows = settings.judge_cache_max_rows_per_project
+                if max_rows is not None:
+                    crowded = (
+                        await conn.execute(
+                            select(JudgeCache.project_id).group_by(JudgeCache.project_id).having(func.count() > max_rows)
+                        )
+                    ).scalars().all()
+                    for project_id in crowded:
+                        # created_at of the newest row that no longer fits
+                        cutoff = await conn.scalar(
+                            select(JudgeCache.created_at)
+                            .where(JudgeCache.project_id == project_id)
+                            .order_by(JudgeCache.created_at.desc())
+                            .offset(max_rows)
+                            .limit(1)
+                        )
+                        if cutoff is not None:
+                            over_size += await self._delete_batches(
+                                conn, and_(JudgeCache.project_id == project_id, JudgeCache.created_at <= cutoff)
+                            )
+            finally:
+                await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SWEEP_LOCK_KEY})
+                await conn.commit()
+        self.db_expired_evictions += expired
+        self.db_size_evictions += over_size
+        return {"expired": expired, "over_size": over_size}
+
+    @staticmethod
+    async def _delete_batches(conn: AsyncConnection, condition) -> int:
+        """Delete the rows matching `condition` in batches, committing each so no lock is held for long."""
+        deleted = 0
+        while True:
+            victims = select(JudgeCache.id).where(condition).limit(SWEEP_BATCH_ROWS).scalar_subquery()
+            result = await conn.execute(delete(JudgeCache).where(JudgeCache.id.in_(victims)))
+            await conn.commit()
+            deleted += result.rowcount
+            if result.rowcount < SWEEP_BATCH_ROWS:
+                return deleted
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.db_hits + self.db_misses
+        return {
+            "memory": self.memory.stats(),
+            "table": {
+                "ttl_sec": settings.judge_cache_ttl_sec,
+                "max_rows_per_project": settings.judge_cache_max_rows_per_project,
+                "hits": self.db_hits,
+                "misses": self.db_misses,
+                "hit_rate": round(self.db_hits / lookups, 4) if lookups else 0.0,
+                "expired_evictions": self.db_expired_evictions,
+                "size_evictions": self.db_size_evictions,
+                "invalidations": self.db_invalidations,
+            },
+        }
+
+
+judge_cache = TieredJudgeCache(
+    MemoryJudgeCache(settings.judge_cache_memory_max_entries, settings.judge_cache_memory_ttl_sec)
+)
+
+
+async def run_judge_cache_sweeper() -> None:
+    """Runs for the lifetime of the worker."""
+    while True:
+        try:
+            result = await judge_cache.sweep()
+            if result and (result["expired"] or result["over_size"]):
+                logger.info("judge cache sweep: %s", result)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("judge cache sweep failed")
+        await asyncio.sleep(settings.judge_cache_sweep_interval_sec)
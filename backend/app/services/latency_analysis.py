@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+import numpy as np
+
+PERCENTILES = (50, 95, 99)
+
+
+@dataclass(slots=True)
+class SpanTiming:
+    id: UUID
+    parent_id: UUID | None
+    name: str
+    span_type: str
+    node_name: str | None
+    start: datetime
+    end: datetime | None
+
+
+def analyze_trace(spans: list[SpanTiming]) -> dict[str, Any]:
+    """Self time and critical path for one trace.
+
+    Times are milliseconds from the earliest span start. Open spans are treated as running until the
+    latest timestamp seen in the trace, and children are clipped to their parent's interval. A
+    virtual root spans all top-level spans; its critical-path time (`span_id=None`) is time when no
+    top-level span was running.
+    """
+    if not spans:
+        return {"duration_ms": 0.0, "critical_path": [], "spans": []}
+    origin = min(s.start for s in spans)
+    as_of = max(max(s.start, s.end or s.start) for s in spans)
+    n = len(spans)
+    index = {s.id: i for i, s in enumerate(spans)}
+    # slot n is the virtual root
+    start = [(s.start - origin).total_seconds() * 1000 for s in spans] + [0.0]
+    end = [((s.end or as_of) - origin).total_seconds() * 1000 for s in spans] + [(as_of - origin).total_seconds() * 1000]
+    children: list[list[int]] = [[] for _ in range(n + 1)]
+    for i, s in enumerate(spans):
+        parent = index.get(s.parent_id, n) if s.parent_id else n
+        children[parent if parent != i else n].append(i)
+
+    # effective (clipped) interval per span, filled top-down
+    lo = start[:]
+    hi = end[:]
+    self_ms = [0.0] * (n + 1)
+    order = [n]
+    for p in order:
+        kids = children[p]
+        for c in kids:
+            lo[c] = min(max(start[c], lo[p]), hi[p])
+            hi[c] = max(min(end[c], hi[p]), lo[c])
+            order.append(c)
+        # union of child intervals in one sweep
+        covered = 0.0
+        run_lo = run_hi = None
+        for c in sorted(kids, key=lambda k: lo[k]):
+            if run_hi is None or lo[c] > run_hi:
+                if run_hi is not None:
+                    covered += run_hi - run_lo
+                run_lo, run_hi = lo[c], hi[c]
+            else:
+                run_hi = max(run_hi, hi[c])
+        if run_hi is not None:
+            covered += run_hi - run_lo
+        self_ms[p] = max(hi[p] - lo[p] - covered, 0.0)
+
+    critical = [0.0] * (n + 1)
+    segments = _critical_segments(children, lo, hi, n)
+    for span, seg_lo, seg_hi in segments:
+        critical[span] += seg_hi - seg_lo
+
+    path: list[dict[str, Any]] = []
+    for span, seg_lo, seg_hi in segments:
+        span_id = spans[span].id if span < n else None
+        if path and path[-1]["span_id"] == span_id and path[-1]["end_ms"] == seg_lo:
+            path[-1]["end_ms"] = seg_hi
+        else:
+            path.append({"span_id": span_id, "start_ms": seg_lo, "end_ms": seg_hi})
+    for step in path:
+        step["ms"] = step["end_ms"] - step["start_ms"]
+
+    return {
+        "duration_ms": hi[n] - lo[n],
+        "critical_path": path,
+        "spans": [
+            {
+                "span_id": s.id,
+                "name": s.name,
+                "span_type": s.span_type,
+                "node_name": s.node_name,
+                "duration_ms": hi[i] - lo[i],
+                "self_ms": self_ms[i],
+                "critical_ms": critical[i],
+            }
+            for i, s in enumerate(spans)
+        ],
+    }
+
+
+def _critical_segments(children: list[list[int]], lo: list[float], hi: list[float], root: int) -> list[tuple[int, float, float]]:
+    """Walk back from the root's end, always descending into the child that finished last.
+
+    Time not covered by the chosen child belongs to the parent. Iterative, so deep trees cannot hit
+    the recursion limit; segments come out in chronological order.
+    """
+    by_end = [sorted(kids, key=lambda k: hi[k], reverse=True) for kids in children]
+    segments: list[tuple[int, float, float]] = []
+    # frame: (span, next child position, cursor)
+    stack = [(root, 0, hi[root])]
+    while stack:
+        span, i, cursor = stack.pop()
+        kids = by_end[span]
+        while i < len(kids):
+            child = kids[i]
+            i += 1
+            child_hi = min(hi[child], cursor)
+            if lo[child] >= child_hi:
+                continue
+            if child_hi < cursor:
+                segments.append((span, child_hi, cursor))
+            stack.append((span, i, lo[child]))
+            stack.append((child, 0, child_hi))
+            break
+        else:
+            if cursor > lo[span]:
+                segments.append((span, lo[span], cursor))
+    segments.reverse()
+    return segments
+
+
+def self_time_percentiles(keys: list[str], self_ms: list[float], percentiles: tuple[int, ...] = PERCENTILES) -> list[dict[str, Any]]:
+    """Per-key count, mean and percentiles (linear interpolation) in one vectorized pass.
+
+    Values are sorted once by (key, value); each percentile is then a gather at per-group offsets.
+    """
+    if not keys:
+        return []
+    labels, codes = np.unique(np.asarray(keys, dtype=object), return_inverse=True)
+    values = np.asarray(self_ms, dtype=np.float64)
+    order = np.lexsort((values, codes))
+    values = values[order]
+    codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    counts = np.diff(np.r_[starts, len(values)])
+    sums = np.add.reduceat(values, starts)
+
+    result = {
+        "key": labels[codes[starts]],
+        "count": counts,
+        "mean_ms": sums / counts,
+        "total_ms": sums,
+    }
+    for p in percentiles:
+        rank = (counts - 1) * (p / 100.0)
+        below = np.floor(rank).astype(np.int64)
+        above = np.minimum(below + 1, counts - 1)
+        frac = rank - below
+        result[f"p{p}_ms"] = values[starts + below] * (1 - frac) + values[starts + above] * frac
+
+    rows = [
+        {name: (column[i].item() if hasattr(column[i], "item") else column[i]) for name, column in result.items()}
+        for i in range(len(starts))
+    ]
+    rows.sort(key=lambda row: row["total_ms"], reverse=True)
+    return rows
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import json
+from datetime import timedelta
+from typing import Any
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import and_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Span, Trace, TraceLatencyAnalysis
+from app.services.latency_analysis import SpanTiming, analyze_trace, self_time_percentiles
+from app.services.utils import utcnow
+
+# Keeps `IN (...)` lists and multi-row upserts well below the bind-parameter limit.
+CHUNK_SIZE = 1000
+GROUP_KEYS = ("name", "node_name", "span_type")
+
+
+class LatencyService:
+    def __init__(self, db: AsyncSession, project_id: UUID):
+        self.db = db
+        self.project_id = project_id
+
+    async def trace_latency(self, trace_id: UUID) -> dict[str, Any]:
+        trace = (
+            await self.db.execute(
+                select(Trace.has_open_spans, Trace.total_spans).where(
+                    and_(Trace.id == trace_id, Trace.project_id == self.project_id)
+                )
+            )
+        ).first()
+        if not trace:
+            raise HTTPException(status_code=404, detail="trace not found")
+        cached = await self._cached([trace_id])
+        entry = cached.get(trace_id)
+        if entry and not trace.has_open_spans and entry[0] == trace.total_spans:
+            return {"trace_id": trace_id, "cached": True, **entry[1]}
+
+        analysis = (await self._analyze([trace_id]))[trace_id]
+        if not trace.has_open_spans:
+            await self._store({trace_id: (trace.total_spans, analysis)})
+        return {"trace_id": trace_id, "cached": False, **analysis}
+
+    async def project_latency(self, last_hours: int = 24, group_by: str = "name", max_traces: int = 5000) -> dict[str, Any]:
+        """Self-time percentiles per span name, LangGraph node_name or span_type over completed traces.
+
+        Uses each trace's cached analysis, computing and caching the missing or stale ones first.
+        """
+        if group_by not in GROUP_KEYS:
+            raise HTTPException(status_code=400, detail=f"group_by must be one of {', '.join(GROUP_KEYS)}")
+        window_start = utcnow() - timedelta(hours=last_hours)
+        traces = (
+            await self.db.execute(
+                select(Trace.id, Trace.total_spans)
+                .where(
+                    and_(
+                        Trace.project_id == self.project_id,
+                        Trace.start_time >= window_start,
+                        Trace.has_open_spans.is_(False),
+                    )
+                )
+                .order_by(Trace.start_time.desc())
+                .limit(max_traces + 1)
+            )
+        ).all()
+        truncated = len(traces) > max_traces
+        total_spans = {trace_id: n for trace_id, n in traces[:max_traces]}
+
+        analyses = {
+            trace_id: analysis
+            for trace_id, (n, analysis) in (await self._cached(list(total_spans))).items()
+            if n == total_spans[trace_id]
+        }
+        missing = [trace_id for trace_id in total_spans if trace_id not in analyses]
+        if missing:
+            fresh = await self._analyze(missing)
+            await self._store({trace_id: (total_spans[trace_id], fresh[trace_id]) for trace_id in missing})
+            analyses.update(fresh)
+
+        keys: list[str] = []
+        self_ms: list[float] = []
+        for analysis in analyses.values():
+            for span in analysis["spans"]:
+                key = span["node_name"] if group_by == "node_name" else span[group_by]
+                keys.append(key or span["name"])
+                self_ms.append(span["self_ms"])
+        return {
+            "window_hours": last_hours,
+            "group_by": group_by,
+            "traces_analyzed": len(analyses),
+            "truncated": truncated,
+            "groups": self_time_percentiles(keys, self_ms),
+        }
+
+    async def _cached(self, trace_ids: list[UUID]) -> dict[UUID, tuple[int, dict[str, Any]]]:
+        found: dict[UUID, tuple[int, dict[str, Any]]] = {}
+        for i in range(0, len(trace_ids), CHUNK_SIZE):
+            rows = await self.db.execute(
+                select(TraceLatencyAnalysis.trace_id, TraceLatencyAnalysis.total_spans, TraceLatencyAnalysis.analysis).where(
+                    and_(
+                        TraceLatencyAnalysis.project_id == self.project_id,
+                        TraceLatencyAnalysis.trace_id.in_(trace_ids[i : i + CHUNK_SIZE]),
+                    )
+                )
+            )
+            found.update({trace_id: (n, analysis) for trace_id, n, analysis in rows.all()})
+        return found
+
+    async def _analyze(self, trace_ids: list[UUID]) -> dict[UUID, dict[str, Any]]:
+        timings: dict[UUID, list[SpanTiming]] = {trace_id: [] for trace_id in trace_ids}
+        for i in range(0, len(trace_ids), CHUNK_SIZE):
+            rows = await self.db.execute(
+                select(
+                    Span.trace_id,
+                    Span.id,
+                    Span.parent_span_id,
+                    Span.name,
+                    Span.span_type,
+                    Span.attributes["node_name"].astext,
+                    Span.start_time,
+                    Span.end_time,
+                ).where(and_(Span.project_id == self.project_id, Span.trace_id.in_(trace_ids[i : i + CHUNK_SIZE])))
+            )
+            for trace_id, *fields in rows.all():
+                timings[trace_id].append(SpanTiming(*fields))
+        # JSON-ready, the same shape a cached row comes back in
+        return {trace_id: json.loads(json.dumps(analyze_trace(spans), default=str)) for trace_id, spans in timings.items()}
+
+    async def _store(self, entries: dict[UUID, tuple[int, dict[str, Any]]]) -> None:
+        rows = [
+            {
+                "trace_id": trace_id,
+                "project_id": self.project_id,
+                "total_spans": n,
+                "analysis": analysis,
+                "computed_at": utcnow(),
+            }
+            for trace_id, (n, analysis) in entries.items()
+        ]
+        for i in range(0, len(rows), CHUNK_SIZE):
+            stmt = pg_insert(TraceLatencyAnalysis).values(rows[i : i + CHUNK_SIZE])
+            await self.db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[TraceLatencyAnalysis.trace_id],
+                    set_={
+                        "total_spans": stmt.excluded.total_spans,
+                        "analysis": stmt.excluded.analysis,
+                        "computed_at": stmt.excluded.computed_at,
+                    },
+                )
+            )
+        await self.db.commit()
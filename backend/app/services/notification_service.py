@@ -0,0 +1,331 @@
+"""Case webhook delivery through a transactional outbox.
+
+`CaseService.create_case_and_notify` commits a pending `notifications` row in the same transaction as its
+case, so a webhook is owed exactly when the case exists. `NotificationDispatcher` runs in every worker: it
+claims due notifications with `FOR UPDATE SKIP LOCKED`, moving their `next_attempt_at` to the end of a
+lease, and delivers them concurrently over one pooled client. An outcome is written only while the row
+still carries the lease it was claimed with, so a worker that lost its lease cannot overwrite a newer
+attempt. A receiver may still see a notification twice (a worker stopping between the request and the
+commit), so every request carries the notification id as `Idempotency-Key`.
+
+Network errors, timeouts, 408/425/429 and 5xx are retried with jittered exponential backoff until
+`webhook_max_attempts`, after which the notification is dead; any other 4xx makes it dead at once. Dead
+notifications stay in the table until requeued with `NotificationService.retry`. Each target host has a
+token bucket, which spaces out requests within the lease, and a circuit breaker, which puts notifications
+back without spending an attempt while the host is failing.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any
+from urllib.parse import urlsplit
+from uuid import UUID
+
+import httpx
+from fastapi import HTTPException
+from sqlalchemy import and_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.judge.execution import CircuitBreaker
+from app.models import Notification
+from app.services.utils import utcnow
+
+logger = logging.getLogger(__name__)
+
+# 4xx answers that are worth retrying; every other 4xx means the receiver will not take the notification
+RETRYABLE_CLIENT_STATUSES = {408, 425, 429}
+MAX_SNIPPET_CHARS = 500
+
+
+class NotificationService:
+    def __init__(self, db: AsyncSession, project_id: UUID):
+        self.db = db
+        self.project_id = project_id
+
+    async def list_notifications(self, status: str | None, case_id: UUID | None, limit: int) -> list[Notification]:
+        q = select(Notification).where(Notification.project_id == self.project_id)
+        if status:
+            q = q.where(Notification.status == status)
+        if case_id:
+            q = q.where(Notification.case_id == case_id)
+        return (await self.db.scalars(q.order_by(Notification.created_at.desc()).limit(limit))).all()
+
+    async def retry(self, notification_id: UUID) -> Notification:
+        """Requeue a dead notification with a fresh set of attempts."""
+        notification = await self.db.scalar(
+            select(Notification).where(and_(Notification.id == notification_id, Notification.project_id == self.project_id))
+        )
+        if not notification:
+            raise HTTPException(status_code=404, detail="notification not found")
+        if notification.status != "dead":
+            raise HTTPException(status_code=409, detail=f"notification is {notification.status}")
+        notification.status = "pending"
+        notification.attempts = 0
+        notification.next_attempt_at = utcnow()
+        await self.db.commit()
+        await self.db.refresh(notification)
+        notification_dispatcher.wake()
+        return notification
+
+
+class TokenBucket:
+    def __init__(self, rate_per_sec: float, burst: float):
+        self.rate_per_sec = rate_per_sec
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """Take a token, possibly one not refilled yet; returns the seconds until it is."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate_per_sec) - 1
+        self.updated = now
+        return max(0.0, -self.tokens / self.rate_per_sec)
+
+    def give_back(self) -> None:
+        self.tokens += 1
+
+
+@dataclass
+class Target:
+    bucket: TokenBucket
+    breaker: CircuitBreaker
+    sent: int = 0
+    failed: int = 0
+
+
+@dataclass
+class Delivery:
+    id: UUID
+    target_url: str
+    payload: dict[str, Any]
+    attempts: int
+    # next_attempt_at as claimed; the row is ours while it still holds this value
+    lease: datetime
+
+
+def backoff_sec(attempts: int) -> float:
+    delay = min(settings.webhook_backoff_max_sec, settings.webhook_backoff_base_sec * 2 ** (attempts - 1))
+    # jittered so notifications that failed together do not retry together
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _retry_after_sec(response: httpx.Response) -> float | None:
+    try:
+        return float(response.headers["retry-after"])
+    except (KeyError, ValueError):
+        return None
+
+
+class NotificationDispatcher:
+    def __init__(self):
+        self.targets: dict[str, Target] = {}
+        self.sent = 0
+        self.retried = 0
+        self.dead = 0
+        self.deferred = 0
+        self._client: httpx.AsyncClient | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._wake = asyncio.Event()
+        self._deliveries: set[asyncio.Task] = set()
+
+    def wake(self) -> None:
+        """Look for due notifications now instead of at the next poll (e.g. after committing one)."""
+        self._wake.set()
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=settings.webhook_timeout_sec,
+                limits=httpx.Limits(
+                    max_connections=settings.webhook_max_connections,
+                    max_keepalive_connections=settings.webhook_max_connections,
+                ),
+            )
+        return self._client
+
+    def _target(self, url: str) -> Target:
+        host = urlsplit(url).netloc
+        target = self.targets.get(host)
+        if target is None:
+            rate = settings.webhook_target_rate_per_sec
+            target = self.targets[host] = Target(
+                bucket=TokenBucket(rate, max(1.0, rate)),
+                breaker=CircuitBreaker(settings.webhook_breaker_failures, settings.webhook_breaker_reset_sec),
+            )
+        return target
+
+    async def run(self) -> None:
+        """Runs for the lifetime of the worker."""
+        self._slots = asyncio.Semaphore(settings.webhook_concurrency)
+        try:
+            while True:
+                self._wake.clear()
+                room = settings.webhook_claim_batch - len(self._deliveries)
+                if room > 0:
+                    claimed: list[Delivery] = []
+                    try:
+                        claimed = await self._claim(room)
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception:
+                        logger.exception("claiming notifications failed")
+                    for delivery in claimed:
+                        task = asyncio.create_task(self._deliver(delivery))
+                        self._deliveries.add(task)
+                        task.add_done_callback(self._deliveries.discard)
+                    if claimed and len(claimed) == room:
+                        # more may be due
+                        continue
+                # with no room, until a delivery ends; otherwise until woken or the next poll
+                wake = asyncio.create_task(self._wake.wait())
+                await asyncio.wait(
+                    {wake, *self._deliveries} if room <= 0 else {wake},
+                    timeout=settings.webhook_poll_interval_sec,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                wake.cancel()
+        finally:
+            # deliveries cut short are claimed again once their lease runs out
+            for task in self._deliveries:
+                task.cancel()
+            await asyncio.gather(*self._deliveries, return_exceptions=True)
+
+    async def _claim(self, limit: int) -> list[Delivery]:
+        now = utcnow()
+        lease = now + timedelta(seconds=settings.webhook_lease_sec)
+        due = (
+            select(Notification.id)
+            .where(and_(Notification.status == "pending", Notification.next_attempt_at <= now))
+            .order_by(Notification.next_attempt_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        async with AsyncSessionLocal() as db:
+            rows = (
+                await db.execute(
+                    update(Notification)
+                    .where(Notification.id.in_(due))
+                    .values(next_attempt_at=lease)
+                    .returning(Notification.id, Notification.target_url, Notification.payload, Notification.attempts)
+                    .execution_options(synchronize_session=False)
+                )
+            ).all()
+            await db.commit()
+        return [Delivery(row.id, row.target_url, row.payload, row.attempts, lease) for row in rows]
+
+    async def _record(self, delivery: Delivery, **values: Any) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(Notification)
+                .where(
+                    and_(
+                        Notification.id == delivery.id,
+                        Notification.status == "pending",
+                        Notification.next_attempt_at == delivery.lease,
+                    )
+                )
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+
+    async def _deliver(self, delivery: Delivery) -> None:
+        try:
+            await self._attempt(delivery)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("delivering notification %s failed", delivery.id)
+
+    async def _attempt(self, delivery: Delivery) -> None:
+        target = self._target(delivery.target_url)
+        wait = target.bucket.reserve()
+        # the wait, the request and recording its outcome must all fit in the lease
+        if wait + settings.webhook_timeout_sec * 2 > settings.webhook_lease_sec:
+            target.bucket.give_back()
+            self.deferred += 1
+            await self._record(delivery, next_attempt_at=utcnow() + timedelta(seconds=wait))
+            return
+        await asyncio.sleep(wait)
+        if not target.breaker.allow():
+            self.deferred += 1
+            await self._record(delivery, next_attempt_at=utcnow() + timedelta(seconds=settings.webhook_breaker_reset_sec))
+            return
+
+        response: httpx.Response | None = None
+        try:
+            async with self._slots:
+                response = await self._http().post(
+                    delivery.target_url,
+                    json=delivery.payload,
+                    headers={"Idempotency-Key": str(delivery.id)},
+                )
+            snippet = response.text[:MAX_SNIPPET_CHARS]
+        except asyncio.CancelledError:
+            target.breaker.release()
+            raise
+        except Exception as exc:
+            snippet = f"{type(exc).__name__}: {exc}"[:MAX_SNIPPET_CHARS]
+
+        now = utcnow()
+        attempts = delivery.attempts + 1
+        outcome: dict[str, Any] = {"attempts": attempts, "last_attempt_at": now, "response_snippet": snippet}
+        if response is not None and response.status_code < 300:
+            target.breaker.record_success()
+            target.sent += 1
+            self.sent += 1
+            await self._record(delivery, status="sent", delivered_at=now, next_attempt_at=None, **outcome)
+            return
+        if response is not None and response.status_code < 500 and response.status_code not in RETRYABLE_CLIENT_STATUSES:
+            # the host is up and refused this notification; sending it again would not change that
+            target.breaker.record_success()
+            target.failed += 1
+            self.dead += 1
+            await self._record(delivery, status="dead", next_attempt_at=None, **outcome)
+            return
+
+        target.breaker.record_failure()
+        target.failed += 1
+        if attempts >= settings.webhook_max_attempts:
+            self.dead += 1
+            await self._record(delivery, status="dead", next_attempt_at=None, **outcome)
+            return
+        delay = backoff_sec(attempts)
+        if response is not None and (retry_after := _retry_after_sec(response)) is not None:
+            delay = min(max(delay, retry_after), settings.webhook_backoff_max_sec)
+        self.retried += 1
+        await self._record(delivery, next_attempt_at=now + timedelta(seconds=delay), **outcome)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "sent": self.sent,
+            "retried": self.retried,
+            "dead": self.dead,
+            "deferred": self.deferred,
+            "in_flight": len(self._deliveries),
+            "targets": {
+                host: {"breaker": target.breaker.state, "sent": target.sent, "failed": target.failed}
+                for host, target in self.targets.items()
+            },
+        }
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+notification_dispatcher = NotificationDispatcher()
+
+
+async def run_notification_dispatcher() -> None:
+    await notification_dispatcher.run()
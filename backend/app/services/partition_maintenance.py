@@ -0,0 +1,170 @@
+"""Daily partitions and retention for `span_events`.
+
+`span_events` is range-partitioned by `event_time` into UTC days named `span_events_pYYYYMMDD`, plus
+`span_events_default` for timestamps outside them (migration 0010). Maintenance keeps
+`partition_premake_days` future days created and applies retention:
+
+* a day older than every project's retention is dropped as a whole partition;
+* a project whose retention is shorter than that has its rows deleted from the older days only, one
+  partition at a time, so the global drop never waits on it.
+
+Every worker runs `run_partition_maintenance`; a session advisory lock makes one of them do the work.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.config import settings
+from app.db.session import async_engine
+from app.models import SpanEvent
+from app.services.utils import utcnow
+
+logger = logging.getLogger(__name__)
+
+PARENT = "span_events"
+DEFAULT_PARTITION = "span_events_default"
+PARTITION_PREFIX = "span_events_p"
+# every stored column moved out of the default partition; generated ones (search_vector) are recomputed
+COLUMNS = ", ".join(column.name for column in SpanEvent.__table__.columns if column.computed is None)
+# arbitrary, only has to be unique among the advisory locks this app takes
+MAINTENANCE_LOCK_KEY = 0x7370616E
+
+
+def partition_name(day: date) -> str:
+    return f"{PARTITION_PREFIX}{day:%Y%m%d}"
+
+
+def _bounds(day: date) -> tuple[datetime, datetime]:
+    lo = datetime.combine(day, time.min, tzinfo=timezone.utc)
+    return lo, lo + timedelta(days=1)
+
+
+async def list_partitions(conn: AsyncConnection) -> dict[date, str]:
+    rows = await conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = CAST(:parent AS regclass)"
+        ),
+        {"parent": PARENT},
+    )
+    partitions: dict[date, str] = {}
+    for (name,) in rows.all():
+        if name.startswith(PARTITION_PREFIX):
+            partitions[datetime.strptime(name.removeprefix(PARTITION_PREFIX), "%Y%m%d").date()] = name
+    return partitions
+
+
+async def create_partition(conn: AsyncConnection, day: date) -> None:
+    """Create the day's partition, first moving any of its rows out of the default partition."""
+    name = partition_name(day)
+    lo, hi = _bounds(day)
+    bounds = {"lo": lo, "hi": hi}
+    # DDL cannot take bind parameters; the bounds are rendered from datetimes we built above
+    spec = f"FOR VALUES FROM ('{lo.isoformat()}') TO ('{hi.isoformat()}')"
+    stranded = await conn.scalar(
+        text(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE event_time >= :lo AND event_time < :hi)"), bounds
+    )
+    if not stranded:
+        await conn.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT} {spec}"))
+        return
+    await conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS INCLUDING GENERATED)"))
+    await conn.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE event_time >= :lo AND event_time < :hi "
+            f"RETURNING {COLUMNS}) INSERT INTO {name} ({COLUMNS}) SELECT {COLUMNS} FROM moved"
+        ),
+        bounds,
+    )
+    await conn.execute(text(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} {spec}"))
+
+
+async def ensure_partitions(conn: AsyncConnection, today: date, premake_days: int) -> list[str]:
+    return await ensure_days(conn, {today + timedelta(days=offset) for offset in range(premake_days + 1)})
+
+
+async def ensure_days(conn: AsyncConnection, days: set[date]) -> list[str]:
+    existing = await list_partitions(conn)
+    created = []
+    for day in sorted(days - existing.keys()):
+        await create_partition(conn, day)
+        created.append(partition_name(day))
+    return created
+
+
+async def apply_retention(conn: AsyncConnection, now: datetime) -> dict[str, Any]:
+    default_days = settings.span_event_retention_days
+    retention = {
+        project_id: days if days is not None else default_days
+        for project_id, days in (await conn.execute(text("SELECT id, retention_days FROM projects"))).all()
+    }
+    if not retention:
+        return {"dropped": [], "pruned_rows": 0}
+    # None means keep forever
+    keep_days = None if None in retention.values() else max(retention.values())
+
+    partitions = await list_partitions(conn)
+    dropped = []
+    if keep_days is not None:
+        cutoff = now - timedelta(days=keep_days)
+        for day, name in sorted(partitions.items()):
+            if _bounds(day)[1] <= cutoff:
+                await conn.execute(text(f"DROP TABLE {name}"))
+                dropped.append(name)
+                del partitions[day]
+        await conn.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE event_time < :cutoff"), {"cutoff": cutoff})
+
+    pruned = 0
+    for project_id, days in retention.items():
+        if days is None or (keep_days is not None and days >= keep_days):
+            continue
+        cutoff = now - timedelta(days=days)
+        for day, name in sorted(partitions.items()):
+            if _bounds(day)[1] > cutoff:
+                break
+            result = await conn.execute(text(f"DELETE FROM {name} WHERE project_id = :project_id"), {"project_id": project_id})
+            pruned += result.rowcount
+        result = await conn.execute(
+            text(f"DELETE FROM {DEFAULT_PARTITION} WHERE project_id = :project_id AND event_time < :cutoff"),
+            {"project_id": project_id, "cutoff": cutoff},
+        )
+        pruned += result.rowcount
+    return {"dropped": dropped, "pruned_rows": pruned}
+
+
+async def maintain_partitions() -> dict[str, Any] | None:
+    """One maintenance pass; returns None when another worker holds the lock."""
+    async with async_engine.connect() as conn:
+        if not await conn.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY}):
+            await conn.rollback()
+            return None
+        try:
+            now = utcnow()
+            created = await ensure_partitions(conn, now.date(), settings.partition_premake_days)
+            await conn.commit()
+            retention = await apply_retention(conn, now)
+            await conn.commit()
+        finally:
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MAINTENANCE_LOCK_KEY})
+            await conn.commit()
+    return {"created": created, **retention}
+
+
+async def run_partition_maintenance() -> None:
+    """Runs for the lifetime of the worker."""
+    while True:
+        try:
+            result = await maintain_partitions()
+            if result and (result["created"] or result["dropped"] or result["pruned_rows"]):
+                logger.info("span_events partition maintenance: %s", result)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("span_events partition maintenance failed")
+        await asyncio.sleep(settings.partition_maintenance_interval_sec)
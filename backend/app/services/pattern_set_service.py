@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.judge.patterns import DEFAULT_PATTERNS, CompiledPatternSet, PatternError, compile_pattern_set, compiled_pattern_set
+from app.models import HeuristicPatternSet
+from app.schemas.judge import HeuristicPatternSetIn
+
+
+class PatternSetService:
+    def __init__(self, db: AsyncSession, project_id: UUID):
+        self.db = db
+        self.project_id = project_id
+
+    async def current(self) -> dict:
+        row = await self.db.scalar(
+            select(HeuristicPatternSet)
+            .where(HeuristicPatternSet.project_id == self.project_id)
+            .order_by(HeuristicPatternSet.version.desc())
+            .limit(1)
+        )
+        if row is None:
+            return {"id": None, "version": 0, "patterns": DEFAULT_PATTERNS, "created_at": None}
+        return {"id": row.id, "version": row.version, "patterns": row.patterns, "created_at": row.created_at}
+
+    async def create_version(self, payload: HeuristicPatternSetIn) -> HeuristicPatternSet:
+        patterns = [pattern.model_dump() for pattern in payload.patterns]
+        names = [pattern["name"] for pattern in patterns]
+        if len(set(names)) != len(names):
+            raise HTTPException(status_code=400, detail="pattern names must be unique")
+        try:
+            CompiledPatternSet(patterns)
+        except PatternError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+
+        latest = await self.db.scalar(
+            select(func.max(HeuristicPatternSet.version)).where(HeuristicPatternSet.project_id == self.project_id)
+        )
+        row = HeuristicPatternSet(project_id=self.project_id, version=(latest or 0) + 1, patterns=patterns)
+        self.db.add(row)
+        try:
+            await self.db.commit()
+        except IntegrityError:
+            await self.db.rollback()
+            raise HTTPException(status_code=409, detail="pattern set version conflict")
+        await self.db.refresh(row)
+        return row
+
+    async def active_key(self) -> str | None:
+        """Key of the project's current pattern set for the heuristic judge (None: built-in patterns),
+        compiled into this process's cache. The patterns are only read when the version is not compiled yet."""
+        latest = (
+            await self.db.execute(
+                select(HeuristicPatternSet.id)
+                .where(HeuristicPatternSet.project_id == self.project_id)
+                .order_by(HeuristicPatternSet.version.desc())
+                .limit(1)
+            )
+        ).scalar_one_or_none()
+        if latest is None:
+            return None
+        key = str(latest)
+        if compiled_pattern_set(key) is None:
+            patterns = await self.db.scalar(select(HeuristicPatternSet.patterns).where(HeuristicPatternSet.id == latest))
+            try:
+                compile_pattern_set(key, patterns)
+            except PatternError as exc:
+                # a version saved before regexes were compiled with RE2 may use `re`-only syntax
+                raise HTTPException(
+                    status_code=409, detail=f"heuristic pattern set needs a new version: {exc}"
+                ) from None
+        return key
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Sequence
+from typing import Any
+
+import numpy as np
+
+from app.services.policy_engine import DEFAULT_OUTCOME, comparator, ordered_rules, rule_outcome
+
+# ufuncs that match the scalar comparator when both sides are real numbers
+NUMERIC_OPS = {
+    "eq": np.equal,
+    "ne": np.not_equal,
+    "lt": np.less,
+    "lte": np.less_equal,
+    "gt": np.greater,
+    "gte": np.greater_equal,
+}
+
+
+def _is_real(value: Any) -> bool:
+    # bool is an int: True < 2, True == 1.0 and True in [1] hold for the scalar engine as well
+    return isinstance(value, (int, float))
+
+
+def _safe(compare, value: Any) -> bool:
+    # a comparison the scalar engine would raise on (e.g. "abc" < 0.5) counts as not matching
+    try:
+        return bool(compare(value))
+    except TypeError:
+        return False
+
+
+def _factor_key(value: Any) -> Any:
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return ("unhashable", json.dumps(value, sort_keys=True, default=str))
+
+
+class Column:
+    """One context field over all rows: real numbers in `numbers`, other values factorized into `codes`.
+
+    Code 0 marks a numeric row; `uniques[k]` is the value behind code k > 0.
+    """
+
+    def __init__(self, values: Sequence[Any]):
+        n = len(values)
+        numbers = [np.nan] * n
+        codes = [0] * n
+        self.uniques: list[Any] = [None]
+        index: dict[Any, int] = {}
+        for i, value in enumerate(values):
+            if _is_real(value):
+                numbers[i] = value
+                continue
+            key = _factor_key(value)
+            code = index.get(key)
+            if code is None:
+                code = index[key] = len(self.uniques)
+                self.uniques.append(value)
+            codes[i] = code
+        self.numbers = np.array(numbers, dtype=np.float64)
+        self.codes = np.array(codes, dtype=np.int32)
+        self.numeric = self.codes == 0
+        self._number_index: tuple[np.ndarray, np.ndarray] | None = None
+
+    def mask(self, op: str, expected: Any) -> np.ndarray:
+        """Rows where `comparator(op, expected)` holds."""
+        compare = comparator(op, expected)
+        table = np.array([False] + [_safe(compare, value) for value in self.uniques[1:]], dtype=bool)
+        result = table[self.codes]
+        if self.numeric.any():
+            result |= self.numeric & self._numeric_mask(op, expected, compare)
+        return result
+
+    def _numeric_mask(self, op: str, expected: Any, compare) -> np.ndarray:
+        if op in NUMERIC_OPS and _is_real(expected):
+            with np.errstate(invalid="ignore"):
+                return NUMERIC_OPS[op](self.numbers, float(expected))
+        if op == "contains":
+            return np.zeros(len(self.numbers), dtype=bool)
+        if op == "in" and isinstance(expected, (list, tuple, set, frozenset)):
+            # a number only equals a real member
+            return np.isin(self.numbers, [float(m) for m in expected if _is_real(m)])
+        # anything else is decided once per distinct number
+        if self._number_index is None:
+            self._number_index = np.unique(self.numbers, return_inverse=True)
+        distinct, inverse = self._number_index
+        return np.array([_safe(compare, float(value)) for value in distinct], dtype=bool)[inverse.reshape(-1)]
+
+
+def evaluate_columns(
+    definition: dict[str, Any], columns: dict[str, Column], n_rows: int
+) -> tuple[np.ndarray, list[tuple[str, str, str]]]:
+    """For each row, the index into `outcomes` of what `PolicyEngine.evaluate` returns on it.
+
+    `outcomes` holds each rule's (action, reason_code, severity) in evaluation order, then the default.
+    Rules are applied as boolean masks over the rows still unmatched; a field without a column is None.
+    """
+    rules = ordered_rules(definition)
+    outcomes = [rule_outcome(rule) for rule in rules] + [DEFAULT_OUTCOME]
+    chosen = np.full(n_rows, len(rules), dtype=np.int32)
+    unmatched = np.ones(n_rows, dtype=bool)
+    masks: dict[tuple[str, str, str], np.ndarray] = {}
+
+    def condition_mask(condition: dict[str, Any]) -> np.ndarray:
+        field = condition.get("field") or ""
+        op = condition.get("op", "eq")
+        expected = condition.get("value")
+        key = (field, op, json.dumps(expected, sort_keys=True, default=str))
+        if key not in masks:
+            column = columns.get(field)
+            if column is None:
+                masks[key] = np.full(n_rows, _safe(comparator(op, expected), None), dtype=bool)
+            else:
+                masks[key] = column.mask(op, expected)
+        return masks[key]
+
+    for position, rule in enumerate(rules):
+        if not unmatched.any():
+            break
+        when = rule.get("when", {})
+        hit = unmatched.copy()
+        for condition in when.get("all") or []:
+            hit &= condition_mask(condition)
+            if not hit.any():
+                break
+        any_conditions = when.get("any") or []
+        if any_conditions and hit.any():
+            any_hit = np.zeros(n_rows, dtype=bool)
+            for condition in any_conditions:
+                any_hit |= condition_mask(condition)
+            hit &= any_hit
+        chosen[hit] = position
+        unmatched &= ~hit
+    return chosen, outcomes
+
+
+def _factorize(values: np.ndarray) -> tuple[list[Any], np.ndarray]:
+    # a dict pass instead of np.unique: sorting a million-row object array is the slow part otherwise
+    index: dict[Any, int] = {}
+    codes = np.fromiter((index.setdefault(v, len(index)) for v in values), dtype=np.int64, count=len(values))
+    return list(index), codes
+
+
+def confusion_matrix(
+    old_actions: np.ndarray, new_actions: np.ndarray, groups: np.ndarray | None = None
+) -> dict[str, Any]:
+    """Counts of (old action, new action), overall or per group label, as nested dicts without zero cells."""
+    old_labels, old_codes = _factorize(old_actions)
+    new_labels, new_codes = _factorize(new_actions)
+    cells = len(old_labels) * len(new_labels)
+    flat = old_codes * len(new_labels) + new_codes
+
+    def nest(counts: np.ndarray) -> dict[str, dict[str, int]]:
+        matrix: dict[str, dict[str, int]] = {}
+        for cell in np.flatnonzero(counts):
+            old, new = divmod(int(cell), len(new_labels))
+            matrix.setdefault(str(old_labels[old]), {})[str(new_labels[new])] = int(counts[cell])
+        return matrix
+
+    if groups is None:
+        return nest(np.bincount(flat, minlength=cells))
+    group_labels, group_codes = _factorize(groups)
+    counts = np.bincount(group_codes * cells + flat, minlength=len(group_labels) * cells)
+    return {str(label): nest(counts[g * cells : (g + 1) * cells]) for g, label in enumerate(group_labels)}
+
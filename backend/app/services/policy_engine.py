@@ -1,10 +1,21 @@
 from __future__ import annotations
 
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
 from dataclasses import dataclass
 from typing import Any
+from uuid import UUID
 
+from app.models import PolicyVersion
 from app.schemas.common import ActionEnum
-from app.services.utils import get_nested
+
+# compiled policies kept per worker; a PolicyVersion's definition never changes, so entries never go stale
+COMPILED_CACHE_MAX_ENTRIES = 256
+
+Predicate = Callable[[dict[str, Any]], bool]
+# (action, reason_code, severity) when no rule matches
+DEFAULT_OUTCOME = (ActionEnum.ALLOW_ANSWER.value, "DEFAULT_ALLOW", "low")
 
 
 @dataclass
@@ -15,55 +26,138 @@ class EvaluatedRule:
     severity: str = "medium"
 
 
+def field_accessor(field: str | None) -> Callable[[dict[str, Any]], Any]:
+    """`get_nested(context, field)` with the path split once."""
+    if not field:
+        return lambda context: None
+    parts = tuple(field.split("."))
+    if len(parts) == 1:
+        (key,) = parts
+        return lambda context: context.get(key)
+    if len(parts) == 2:
+        outer, inner = parts
+
+        def get2(context: dict[str, Any]) -> Any:
+            current = context.get(outer)
+            return current.get(inner) if isinstance(current, dict) else None
+
+        return get2
+
+    def get(context: dict[str, Any]) -> Any:
+        current: Any = context
+        for part in parts:
+            if not isinstance(current, dict):
+                return None
+            current = current.get(part)
+        return current
+
+    return get
+
+
+def _membership(expected: Any) -> Callable[[Any], bool]:
+    if not isinstance(expected, (list, tuple, set, frozenset)):
+        return lambda actual: actual in expected
+    try:
+        members = frozenset(expected)
+    except TypeError:
+        # unhashable operands (objects, nested lists) keep the sequence scan
+        return lambda actual: actual in expected
+    items = tuple(expected)
+
+    def contains(actual: Any) -> bool:
+        try:
+            return actual in members
+        except TypeError:
+            return actual in items
+
+    return contains
+
+
+def comparator(op: str, expected: Any) -> Callable[[Any], bool]:
+    """`op` bound to `expected`, applied to a field's value (None when the field is missing)."""
+    if op == "eq":
+        return lambda actual: actual == expected
+    if op == "ne":
+        return lambda actual: actual != expected
+    if op == "lt":
+        return lambda actual: actual is not None and actual < expected
+    if op == "lte":
+        return lambda actual: actual is not None and actual <= expected
+    if op == "gt":
+        return lambda actual: actual is not None and actual > expected
+    if op == "gte":
+        return lambda actual: actual is not None and actual >= expected
+    if op == "contains":
+        needle = str(expected).lower()
+        return lambda actual: isinstance(actual, str) and needle in actual.lower()
+    if op == "in":
+        return _membership(expected)
+    return lambda actual: False
+
+
+def _compile_condition(condition: dict[str, Any]) -> Predicate:
+    get = field_accessor(condition.get("field"))
+    compare = comparator(condition.get("op", "eq"), condition.get("value"))
+    return lambda context: compare(get(context))
+
+
+def ordered_rules(definition: dict[str, Any]) -> list[dict[str, Any]]:
+    """Rules in evaluation order: ascending priority, definition order among equals."""
+    return sorted(definition.get("rules", []), key=lambda x: x.get("priority", 9999))
+
+
+def rule_outcome(rule: dict[str, Any]) -> tuple[str, str, str]:
+    then = rule.get("then", {})
+    return (
+        then.get("action", ActionEnum.ALLOW_ANSWER.value),
+        then.get("reason_code", "POLICY_MATCH"),
+        then.get("severity", "medium"),
+    )
+
+
 class PolicyEngine:
+    """A policy definition compiled into per-condition closures; rules are tried in priority order."""
+
     def __init__(self, definition: dict[str, Any]):
         self.definition = definition
-        self.rules = sorted(definition.get("rules", []), key=lambda x: x.get("priority", 9999))
-
-    @staticmethod
-    def _compare(op: str, actual: Any, expected: Any) -> bool:
-        if op == "eq":
-            return actual == expected
-        if op == "ne":
-            return actual != expected
-        if op == "lt":
-            return actual is not None and actual < expected
-        if op == "lte":
-            return actual is not None and actual <= expected
-        if op == "gt":
-            return actual is not None and actual > expected
-        if op == "gte":
-            return actual is not None and actual >= expected
-        if op == "contains" and isinstance(actual, str):
-            return str(expected).lower() in actual.lower()
-        if op == "in":
-            return actual in expected
-        return False
-
-    def _condition_match(self, condition: dict[str, Any], context: dict[str, Any]) -> bool:
-        field = condition.get("field")
-        op = condition.get("op", "eq")
-        expected = condition.get("value")
-        actual = get_nested(context, field) if field else None
-        return self._compare(op, actual, expected)
-
-    def evaluate(self, context: dict[str, Any]) -> EvaluatedRule:
-        for rule in self.rules:
+        self.rules: list[tuple[tuple[Predicate, ...], tuple[Predicate, ...], tuple[str, str, str]]] = []
+        for rule in ordered_rules(definition):
             when = rule.get("when", {})
-            all_conditions = when.get("all", [])
-            any_conditions = when.get("any", [])
-
-            all_ok = all(self._condition_match(c, context) for c in all_conditions) if all_conditions else True
-            any_ok = any(self._condition_match(c, context) for c in any_conditions) if any_conditions else True
-
-            if all_ok and any_ok:
-                then = rule.get("then", {})
-                action = then.get("action", ActionEnum.ALLOW_ANSWER.value)
-                return EvaluatedRule(
-                    matched=True,
-                    action=action,
-                    reason_code=then.get("reason_code", "POLICY_MATCH"),
-                    severity=then.get("severity", "medium"),
+            self.rules.append(
+                (
+                    tuple(_compile_condition(c) for c in when.get("all") or []),
+                    tuple(_compile_condition(c) for c in when.get("any") or []),
+                    rule_outcome(rule),
                 )
+            )
+
+    def evaluate(self, context: dict[str, Any]) -> EvaluatedRule:
+        for all_conditions, any_conditions, (action, reason_code, severity) in self.rules:
+            for predicate in all_conditions:
+                if not predicate(context):
+                    break
+            else:
+                if not any_conditions or any(predicate(context) for predicate in any_conditions):
+                    return EvaluatedRule(matched=True, action=action, reason_code=reason_code, severity=severity)
+
+        action, reason_code, severity = DEFAULT_OUTCOME
+        return EvaluatedRule(matched=False, action=action, reason_code=reason_code, severity=severity)
+
+
+_compiled: OrderedDict[UUID, PolicyEngine] = OrderedDict()
+_compiled_lock = threading.Lock()
+
 
-        return EvaluatedRule(matched=False, action=ActionEnum.ALLOW_ANSWER.value, reason_code="DEFAULT_ALLOW", severity="low")
+def compiled_policy(version: PolicyVersion) -> PolicyEngine:
+    """The version's engine, compiled on first use and cached by version id."""
+    with _compiled_lock:
+        engine = _compiled.get(version.id)
+        if engine is not None:
+            _compiled.move_to_end(version.id)
+            return engine
+    engine = PolicyEngine(version.definition)
+    with _compiled_lock:
+        _compiled[version.id] = engine
+        while len(_compiled) > COMPILED_CACHE_MAX_ENTRIES:
+            _compiled.popitem(last=False)
+    return engine
@@ -0,0 +1,130 @@
+"""In-process cache of authenticated projects.
+
+`get_project` runs on every request, including each SDK flush, so API-key lookups are served from a
+small TTL/LRU map of `ProjectSnapshot`s keyed by key hash (or project id for admin-scoped calls).
+`ProjectService` invalidates the local entries and issues `NOTIFY` on `PROJECT_CACHE_CHANNEL` in the
+same transaction; every worker runs `listen_for_invalidations` and drops the project when the
+notification arrives. The TTL bounds staleness if the listener connection is down.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from uuid import UUID
+
+import psycopg
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.judge_cache import JUDGE_CACHE_CHANNEL, judge_cache
+
+logger = logging.getLogger(__name__)
+
+PROJECT_CACHE_CHANNEL = "project_cache_invalidate"
+
+
+@dataclass(frozen=True, slots=True)
+class ProjectSnapshot:
+    id: UUID
+    is_active: bool
+    key_activated: bool
+
+
+class ProjectCache:
+    def __init__(self, max_entries: int, ttl_sec: float):
+        self.max_entries = max_entries
+        self.ttl_sec = ttl_sec
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[float, ProjectSnapshot]] = OrderedDict()
+
+    def get(self, key: str) -> ProjectSnapshot | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, snapshot: ProjectSnapshot) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_sec, snapshot)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_project(self, project_id: UUID) -> None:
+        with self._lock:
+            stale = [key for key, (_, snapshot) in self._entries.items() if snapshot.id == project_id]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict[str, int | float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_sec": self.ttl_sec,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+
+project_cache = ProjectCache(settings.project_cache_max_entries, settings.project_cache_ttl_sec)
+
+
+def notify_project_changed(db: Session, project_id: UUID) -> None:
+    """Queue a cross-worker invalidation; Postgres delivers it when `db` commits."""
+    db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": PROJECT_CACHE_CHANNEL, "payload": str(project_id)})
+
+
+async def listen_for_invalidations() -> None:
+    """Drop cached projects named on `PROJECT_CACHE_CHANNEL` and judge outputs invalidated on
+    `JUDGE_CACHE_CHANNEL`; runs for the lifetime of the worker."""
+    conninfo = make_url(settings.database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+    backoff = 1.0
+    while True:
+        try:
+            async with await psycopg.AsyncConnection.connect(conninfo, autocommit=True) as conn:
+                await conn.execute(f"LISTEN {PROJECT_CACHE_CHANNEL}")
+                await conn.execute(f"LISTEN {JUDGE_CACHE_CHANNEL}")
+                # anything published while we were disconnected was missed
+                project_cache.clear()
+                judge_cache.memory.clear()
+                backoff = 1.0
+                async for notification in conn.notifies():
+                    if notification.channel == JUDGE_CACHE_CHANNEL:
+                        judge_cache.handle_notification(notification.payload)
+                        continue
+                    try:
+                        project_cache.invalidate_project(UUID(notification.payload))
+                    except ValueError:
+                        project_cache.clear()
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.warning("project cache listener disconnected, retrying in %.0fs: %s", backoff, exc)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
@@ -8,7 +8,10 @@ from fastapi import HTTPException
 from sqlalchemy import and_, func, select
 from sqlalchemy.orm import Session
 
+from app.judge.registry import judge_registry
 from app.models import Case, Project, Trace
+from app.schemas.project import JudgeRoutingIn
+from app.services.project_cache import notify_project_changed, project_cache
 
 
 class ProjectService:
@@ -33,6 +36,8 @@ class ProjectService:
                     "name": project.name,
                     "is_active": bool(project.is_active),
                     "key_activated": bool(project.key_activated),
+                    "retention_days": project.retention_days,
+                    "judge_routing": project.judge_routing,
                     "created_at": project.created_at,
                     "trace_count": int(trace_count),
                     "open_case_count": int(open_case_count),
@@ -67,7 +72,9 @@ class ProjectService:
         project.api_key_hash = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
         project.current_api_key = api_key
         project.key_activated = True
+        notify_project_changed(self.db, project.id)
         self.db.commit()
+        project_cache.invalidate_project(project.id)
         self.db.refresh(project)
         return {
             "id": project.id,
@@ -85,10 +92,30 @@ class ProjectService:
             "api_key": project.current_api_key,
         }
 
+    def set_retention(self, project_id: UUID, retention_days: int | None) -> dict:
+        """Applied by the next partition maintenance pass, not immediately."""
+        project = self._get_project(project_id)
+        project.retention_days = retention_days
+        self.db.commit()
+        return {"id": project.id, "name": project.name, "retention_days": project.retention_days}
+
+    def set_judge_routing(self, project_id: UUID, routing: JudgeRoutingIn | None) -> dict:
+        """Used from the next /decide call or decision job batch on."""
+        project = self._get_project(project_id)
+        if routing is not None:
+            unknown = sorted({stage.provider for stage in routing.stages} - judge_registry.executors.keys())
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"unknown judge provider: {', '.join(unknown)}")
+        project.judge_routing = routing.model_dump(mode="json") if routing is not None else None
+        self.db.commit()
+        return {"id": project.id, "name": project.name, "judge_routing": project.judge_routing}
+
     def set_project_active(self, project_id: UUID, is_active: bool) -> dict:
         project = self._get_project(project_id)
         project.is_active = is_active
+        notify_project_changed(self.db, project.id)
         self.db.commit()
+        project_cache.invalidate_project(project.id)
         self.db.refresh(project)
         return {
             "id": project.id,
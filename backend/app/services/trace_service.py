@@ -1,47 +1,246 @@
 from __future__ import annotations
 
-from datetime import datetime
+import base64
+import json
+import re
+from collections.abc import Iterator
+from datetime import datetime, timedelta
 from typing import Any
-from uuid import NAMESPACE_URL, UUID, uuid5
+from uuid import NAMESPACE_URL, UUID, uuid4, uuid5
 
 from fastapi import HTTPException
-from sqlalchemy import Text, and_, func, or_, select
+from sqlalchemy import (
+    DateTime,
+    Float,
+    Integer,
+    Text,
+    and_,
+    case,
+    cast,
+    column,
+    func,
+    literal,
+    literal_column,
+    or_,
+    select,
+    true,
+    tuple_,
+    union_all,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by, array
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
-from app.models import Evaluation, JudgeRun, Span, SpanEvent, Trace, TraceDecision
+from app.core.config import settings
+from app.models import (
+    DecisionRollupHourly,
+    Evaluation,
+    JudgeRun,
+    Span,
+    SpanEvent,
+    SpanRollupHourly,
+    Trace,
+    TraceDecision,
+    TraceRollupHourly,
+)
 from app.schemas.ingest import IngestSpansRequest, IngestTraceBatchRequest, LangGraphRunIn, SpanEventType
+from app.services.blob_store import EVENT_ENVELOPE_KEYS, EVENT_INLINE_KEYS, PayloadBlobs, load_blobs, resolve, resolve_text
+from app.services.utils import utcnow
+
+# Keeps multi-row INSERTs well below the 65535 bind-parameter limit of the Postgres protocol.
+INSERT_CHUNK_SIZE = 1000
+# count="estimate" falls back to an exact count when the planner expects fewer rows than this.
+EXACT_COUNT_THRESHOLD = 10_000
+# Timeline entries returned with a trace detail or per timeline page unless the caller asks otherwise.
+DEFAULT_TIMELINE_LIMIT = 500
+TIMELINE_FIELDS = ("timestamp", "source", "source_id", "event_type", "payload")
+# Guards the critical-path walk against parent cycles in ingested data.
+MAX_CRITICAL_PATH_STEPS = 10_000
+# span_events is partitioned by event_time; lookups bound it to this long before the trace's start so
+# only the partitions the trace can live in are scanned. Events recorded further back are not shown.
+EVENT_CLOCK_SKEW = timedelta(days=1)
+# Must match the ix_traces_text_search expression verbatim, or the planner will not use the index.
+TRACE_TEXT_VECTOR = literal_column("to_tsvector('simple', coalesce(traces.input_text,'') || ' ' || coalesce(traces.output_text,''))")
+
+
+def blob_search_vector(texts: list[str]):
+    """tsvector of the text a row had offloaded, cut to blob_search_text_max_chars; None if there is none."""
+    text = " ".join(t for t in texts if t)[: settings.blob_search_text_max_chars]
+    return func.to_tsvector(literal_column("'simple'"), text) if text else None
+
+
+def _settled_status(total, ended):
+    """A running trace that has ended and has no open spans left is a success."""
+    return case(
+        (and_(Trace.end_time.is_not(None), total <= ended, Trace.status == "running"), "success"),
+        else_=Trace.status,
+    )
 
 
 class TraceService:
-    def __init__(self, db: Session, project_id: UUID):
+    def __init__(self, db: AsyncSession, project_id: UUID):
         self.db = db
         self.project_id = project_id
+        self.blobs = PayloadBlobs(project_id)
 
-    def _recalculate_trace_metrics(self, trace_id: UUID) -> None:
-        counts = self.db.execute(
+    async def _apply_trace_deltas(self, deltas: dict[UUID, list[int]]) -> None:
+        """Apply `[new_spans, newly_ended_spans]` per trace as one atomic UPDATE ... FROM (VALUES ...)."""
+        if not deltas:
+            return
+        await self.db.flush()
+        delta_rows = values(
+            column("trace_id", PG_UUID(as_uuid=True)),
+            column("new_spans", Integer),
+            column("new_ended", Integer),
+            name="deltas",
+        ).data([(trace_id, d[0], d[1]) for trace_id, d in deltas.items()])
+        total = Trace.total_spans + delta_rows.c.new_spans
+        ended = Trace.ended_spans + delta_rows.c.new_ended
+        await self.db.execute(
+            update(Trace)
+            .where(and_(Trace.id == delta_rows.c.trace_id, Trace.project_id == self.project_id))
+            .values(
+                total_spans=total,
+                ended_spans=ended,
+                has_open_spans=total > ended,
+                completion_rate=case((total > 0, cast(ended, Float) / cast(total, Float)), else_=1.0),
+                status=_settled_status(total, ended),
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    async def repair_trace_metrics(self, trace_ids: list[UUID] | None = None) -> list[UUID]:
+        """Recount span rollups from `spans` and rewrite traces whose stored counters drifted."""
+        counts = (
             select(
+                Trace.id.label("trace_id"),
                 func.count(Span.id).label("total"),
                 func.count(Span.id).filter(Span.end_time.is_not(None)).label("ended"),
-            ).where(and_(Span.project_id == self.project_id, Span.trace_id == trace_id))
-        ).one()
+            )
+            .select_from(Trace)
+            .outerjoin(Span, and_(Span.trace_id == Trace.id, Span.project_id == self.project_id))
+            .where(Trace.project_id == self.project_id)
+            .group_by(Trace.id)
+        )
+        if trace_ids is not None:
+            counts = counts.where(Trace.id.in_(trace_ids))
+        counts = counts.subquery()
 
-        trace = self.db.get(Trace, trace_id)
-        if not trace:
-            return
+        total = counts.c.total
+        ended = counts.c.ended
+        repaired = (
+            await self.db.scalars(
+                update(Trace)
+                .where(
+                    and_(
+                        Trace.id == counts.c.trace_id,
+                        or_(
+                            Trace.total_spans.is_distinct_from(total),
+                            Trace.ended_spans.is_distinct_from(ended),
+                            Trace.status.is_distinct_from(_settled_status(total, ended)),
+                        ),
+                    )
+                )
+                .values(
+                    total_spans=total,
+                    ended_spans=ended,
+                    has_open_spans=total > ended,
+                    completion_rate=case((total > 0, cast(ended, Float) / cast(total, Float)), else_=1.0),
+                    status=_settled_status(total, ended),
+                )
+                .returning(Trace.id)
+                .execution_options(synchronize_session=False)
+            )
+        ).all()
+        await self.db.commit()
+        return list(repaired)
+
+    async def repair_span_tree(self, trace_ids: list[UUID] | None = None) -> list[UUID]:
+        """Rebuild `path`/`depth`/`child_count` from `parent_span_id`; returns traces that had drifted.
 
-        total = int(counts.total or 0)
-        ended = int(counts.ended or 0)
-        trace.total_spans = total
-        trace.ended_spans = ended
-        trace.has_open_spans = total > ended
-        trace.completion_rate = float(ended / total) if total else 1.0
-        if trace.end_time and not trace.has_open_spans:
-            trace.status = "success" if trace.status == "running" else trace.status
+        Ingest maintains these incrementally; a child and its parent committed by concurrent requests
+        can miss each other's graft, which this repairs.
+        """
+        scope = [Span.project_id == self.project_id]
+        if trace_ids is not None:
+            scope.append(Span.trace_id.in_(trace_ids))
+        parent = aliased(Span)
+        child = aliased(Span)
+        tree = (
+            select(Span.id, array([Span.id]).label("path"))
+            .where(
+                and_(
+                    *scope,
+                    or_(
+                        Span.parent_span_id.is_(None),
+                        ~select(parent.id)
+                        .where(and_(parent.id == Span.parent_span_id, parent.project_id == self.project_id))
+                        .exists(),
+                    ),
+                )
+            )
+            .cte("tree", recursive=True)
+        )
+        tree = tree.union_all(
+            select(child.id, tree.c.path.concat(array([child.id])))
+            .join(tree, child.parent_span_id == tree.c.id)
+            .where(and_(child.project_id == self.project_id, ~(child.id == func.any(tree.c.path))))
+        )
+        counted = aliased(Span)
+        counts = (
+            select(counted.parent_span_id.label("span_id"), func.count().label("n"))
+            .where(and_(counted.project_id == self.project_id, counted.parent_span_id.is_not(None)))
+            .group_by(counted.parent_span_id)
+        )
+        if trace_ids is not None:
+            counts = counts.where(counted.trace_id.in_(trace_ids))
+        counts = counts.cte("counts")
+        computed = (
+            select(
+                tree.c.id,
+                tree.c.path,
+                (func.cardinality(tree.c.path) - 1).label("depth"),
+                func.coalesce(counts.c.n, 0).label("child_count"),
+            )
+            .outerjoin(counts, counts.c.span_id == tree.c.id)
+            .subquery()
+        )
+        repaired = (
+            await self.db.scalars(
+                update(Span)
+                .where(
+                    and_(
+                        Span.id == computed.c.id,
+                        or_(
+                            Span.path != computed.c.path,
+                            Span.depth != computed.c.depth,
+                            Span.child_count != computed.c.child_count,
+                        ),
+                    )
+                )
+                .values(path=computed.c.path, depth=computed.c.depth, child_count=computed.c.child_count)
+                .returning(Span.trace_id)
+                .execution_options(synchronize_session=False)
+            )
+        ).all()
+        await self.db.commit()
+        return sorted(set(repaired))
 
-    def ingest_trace_batch(self, payload: IngestTraceBatchRequest) -> dict[str, Any]:
+    async def ingest_trace_batch(self, payload: IngestTraceBatchRequest) -> dict[str, Any]:
         trace_data = payload.trace
-        trace = self.db.get(Trace, trace_data.trace_id)
+        trace = await self.db.get(Trace, trace_data.trace_id)
+        input_text, input_text_blob = self.blobs.offload_text(trace_data.input_text)
+        output_text, output_text_blob = self.blobs.offload_text(trace_data.output_text)
+        offloaded = [
+            text
+            for text, digest in ((trace_data.input_text, input_text_blob), (trace_data.output_text, output_text_blob))
+            if digest
+        ]
 
         if not trace:
             trace = Trace(
@@ -56,13 +255,16 @@ class TraceService:
                 environment=trace_data.environment,
                 user_id=trace_data.user_id,
                 session_id=trace_data.session_id,
-                input_text=trace_data.input_text,
-                output_text=trace_data.output_text,
+                input_text=input_text,
+                output_text=output_text,
+                input_text_blob=input_text_blob,
+                output_text_blob=output_text_blob,
+                blob_search_vector=blob_search_vector(offloaded),
                 user_review_passed=trace_data.user_review_passed,
             )
             self.db.add(trace)
             # Ensure trace row exists before child spans/events are flushed.
-            self.db.flush()
+            await self.db.flush()
         else:
             # materialized snapshot update; immutable event history remains in span_events
             trace.status = trace_data.status
@@ -72,154 +274,444 @@ class TraceService:
             trace.environment = trace_data.environment or trace.environment
             trace.user_id = trace_data.user_id or trace.user_id
             trace.session_id = trace_data.session_id or trace.session_id
-            trace.input_text = trace_data.input_text or trace.input_text
-            trace.output_text = trace_data.output_text or trace.output_text
+            if trace_data.input_text or trace_data.output_text:
+                # the vector covers both texts, so an offloaded text that is kept is read back
+                for kept, digest in (
+                    (not trace_data.input_text, trace.input_text_blob),
+                    (not trace_data.output_text, trace.output_text_blob),
+                ):
+                    if kept and digest:
+                        offloaded.append(await resolve_text(self.project_id, None, digest))
+                trace.blob_search_vector = blob_search_vector(offloaded)
+            if trace_data.input_text:
+                trace.input_text, trace.input_text_blob = input_text, input_text_blob
+            if trace_data.output_text:
+                trace.output_text, trace.output_text_blob = output_text, output_text_blob
             if trace_data.user_review_passed is not None:
                 trace.user_review_passed = trace_data.user_review_passed
 
+        span_keys = {s.idempotency_key for s in payload.spans}
+        existing_keys = await self._existing_keys(Span, span_keys)
+
         batch_span_ids = {s.span_id for s in payload.spans}
+        if not payload.allow_missing_parent:
+            outside_parents = {
+                s.parent_span_id for s in payload.spans if s.parent_span_id and s.parent_span_id not in batch_span_ids
+            }
+            missing_parents = outside_parents - await self._existing_span_ids(outside_parents)
+            if missing_parents:
+                raise HTTPException(status_code=400, detail=f"parent span not found: {next(iter(missing_parents))}")
+
+        span_rows: dict[str, dict[str, Any]] = {}
+        # strings offloaded from each span's attributes, searchable through its start event
+        span_texts: dict[str, list[str]] = {}
         for span_data in payload.spans:
-            if span_data.parent_span_id and span_data.parent_span_id not in batch_span_ids and not payload.allow_missing_parent:
-                parent = self.db.get(Span, span_data.parent_span_id)
-                if not parent:
-                    raise HTTPException(status_code=400, detail=f"parent span not found: {span_data.parent_span_id}")
-
-            span = self.db.scalar(
-                select(Span).where(
-                    and_(Span.project_id == self.project_id, Span.idempotency_key == span_data.idempotency_key)
-                )
-            )
-            if span:
+            if span_data.idempotency_key in existing_keys or span_data.idempotency_key in span_rows:
                 continue
+            span_rows[span_data.idempotency_key] = {
+                "id": span_data.span_id,
+                "project_id": self.project_id,
+                "trace_id": span_data.trace_id,
+                "parent_span_id": span_data.parent_span_id,
+                "name": span_data.name,
+                "span_type": span_data.span_type,
+                "status": span_data.status,
+                "start_time": span_data.start_time,
+                "end_time": span_data.end_time,
+                "error": span_data.error,
+                "attributes": self.blobs.offload(span_data.attributes),
+                "idempotency_key": span_data.idempotency_key,
+                "created_at": utcnow(),
+            }
+            span_texts[span_data.idempotency_key] = self.blobs.take_search_text()
 
-            self.db.add(
-                Span(
-                    id=span_data.span_id,
-                    project_id=self.project_id,
-                    trace_id=span_data.trace_id,
-                    parent_span_id=span_data.parent_span_id,
-                    name=span_data.name,
-                    span_type=span_data.span_type,
-                    status=span_data.status,
-                    start_time=span_data.start_time,
-                    end_time=span_data.end_time,
-                    error=span_data.error,
-                    attributes=span_data.attributes,
-                    idempotency_key=span_data.idempotency_key,
-                )
-            )
-            self.db.add(
-                SpanEvent(
-                    project_id=self.project_id,
-                    trace_id=span_data.trace_id,
-                    span_id=span_data.span_id,
-                    event_type=SpanEventType.SPAN_STARTED.value,
-                    event_time=span_data.start_time,
-                    payload={"name": span_data.name, "attributes": span_data.attributes},
-                    idempotency_key=f"{span_data.idempotency_key}:start",
-                )
-            )
-            if span_data.end_time:
-                self.db.add(
-                    SpanEvent(
-                        project_id=self.project_id,
-                        trace_id=span_data.trace_id,
-                        span_id=span_data.span_id,
-                        event_type=SpanEventType.SPAN_ENDED.value,
-                        event_time=span_data.end_time,
-                        payload={"status": span_data.status, "error": span_data.error},
-                        idempotency_key=f"{span_data.idempotency_key}:end",
+        try:
+            inserted_ids = await self._insert_spans(self._parents_first(list(span_rows.values())))
+            event_rows: list[dict[str, Any]] = []
+            for key, row in span_rows.items():
+                if row["id"] not in inserted_ids:
+                    continue
+                event_rows.append(
+                    self._event_row(
+                        trace_id=row["trace_id"],
+                        span_id=row["id"],
+                        event_type=SpanEventType.SPAN_STARTED.value,
+                        event_time=row["start_time"],
+                        payload={"name": row["name"], "attributes": row["attributes"]},
+                        idempotency_key=f"{key}:start",
+                        offloaded=span_texts[key],
                     )
                 )
-
-        try:
-            self.db.flush()
+                if row["end_time"]:
+                    event_rows.append(
+                        self._event_row(
+                            trace_id=row["trace_id"],
+                            span_id=row["id"],
+                            event_type=SpanEventType.SPAN_ENDED.value,
+                            event_time=row["end_time"],
+                            payload={"status": row["status"], "error": row["error"]},
+                            idempotency_key=f"{key}:end",
+                        )
+                    )
+            await self._insert_events(event_rows)
+            await self.db.flush()
         except IntegrityError as exc:
-            self.db.rollback()
+            await self.db.rollback()
             raise HTTPException(status_code=409, detail=f"idempotency conflict: {str(exc.orig)}")
 
-        self._recalculate_trace_metrics(trace_data.trace_id)
-        self.db.commit()
-        return {"trace_id": str(trace_data.trace_id), "ingested_spans": len(payload.spans)}
+        new_keys = {key for key, row in span_rows.items() if row["id"] in inserted_ids}
+        deltas: dict[UUID, list[int]] = {trace_data.trace_id: [0, 0]}
+        for row in span_rows.values():
+            if row["id"] in inserted_ids:
+                delta = deltas.setdefault(row["trace_id"], [0, 0])
+                delta[0] += 1
+                delta[1] += 1 if row["end_time"] else 0
+        await self._apply_trace_deltas(deltas)
+        # blobs are in place before any row referencing them is visible
+        await self.blobs.flush()
+        await self.db.commit()
+        return {
+            "trace_id": str(trace_data.trace_id),
+            "ingested_spans": len(payload.spans),
+            "new_spans": len(new_keys),
+            "duplicate_idempotency_keys": sorted(span_keys - new_keys),
+        }
+
+    async def ingest_span_events(self, payload: IngestSpansRequest) -> dict[str, Any]:
+        event_keys = {e.idempotency_key for e in payload.events}
+        event_times = [e.event_time for e in payload.events]
+        seen_keys = await self._existing_keys(SpanEvent, event_keys, (min(event_times), max(event_times)) if event_times else None)
 
-    def ingest_span_events(self, payload: IngestSpansRequest) -> dict[str, Any]:
-        ingested = 0
+        referenced_ids = {e.span_id for e in payload.events if e.span_id}
         for event in payload.events:
-            duplicate = self.db.scalar(
-                select(SpanEvent.id).where(
-                    and_(SpanEvent.project_id == self.project_id, SpanEvent.idempotency_key == event.idempotency_key)
-                )
-            )
-            if duplicate:
+            if event.event_type == SpanEventType.SPAN_STARTED:
+                parent_span_id = self._as_uuid(event.payload.get("parent_span_id"))
+                if parent_span_id:
+                    referenced_ids.add(parent_span_id)
+        spans = await self._load_spans(referenced_ids)
+
+        new_spans: dict[UUID, dict[str, Any]] = {}
+        closing: dict[UUID, datetime] = {}
+        event_rows: list[dict[str, Any]] = []
+        for event in payload.events:
+            if event.idempotency_key in seen_keys:
                 continue
+            seen_keys.add(event.idempotency_key)
+            event_payload = self.blobs.offload(event.payload, EVENT_ENVELOPE_KEYS, EVENT_INLINE_KEYS)
+            event_offloaded = self.blobs.take_search_text()
 
             if event.span_id and event.event_type == SpanEventType.SPAN_STARTED:
-                span = self.db.get(Span, event.span_id)
-                if not span:
-                    span_payload = event.payload
-                    parent_span_id = span_payload.get("parent_span_id")
-                    if parent_span_id and not payload.allow_missing_parent:
-                        parent = self.db.get(Span, parent_span_id)
-                        if not parent:
-                            raise HTTPException(status_code=400, detail=f"parent span not found: {parent_span_id}")
-
-                    self.db.add(
-                        Span(
-                            id=event.span_id,
-                            project_id=self.project_id,
-                            trace_id=event.trace_id,
-                            parent_span_id=parent_span_id,
-                            name=span_payload.get("name", "span"),
-                            span_type=span_payload.get("span_type", "task"),
-                            status=span_payload.get("status", "running"),
-                            start_time=event.event_time,
-                            attributes=span_payload.get("attributes", {}),
-                            idempotency_key=span_payload.get("idempotency_key", event.idempotency_key),
-                        )
-                    )
+                if event.span_id not in spans and event.span_id not in new_spans:
+                    span_payload = event_payload
+                    parent_span_id = self._as_uuid(span_payload.get("parent_span_id"))
+                    if (
+                        parent_span_id
+                        and not payload.allow_missing_parent
+                        and parent_span_id not in spans
+                        and parent_span_id not in new_spans
+                    ):
+                        raise HTTPException(status_code=400, detail=f"parent span not found: {parent_span_id}")
+
+                    new_spans[event.span_id] = {
+                        "id": event.span_id,
+                        "project_id": self.project_id,
+                        "trace_id": event.trace_id,
+                        "parent_span_id": parent_span_id,
+                        "name": span_payload.get("name", "span"),
+                        "span_type": span_payload.get("span_type", "task"),
+                        "status": span_payload.get("status", "running"),
+                        "start_time": event.event_time,
+                        "end_time": None,
+                        "error": None,
+                        "attributes": span_payload.get("attributes", {}),
+                        "idempotency_key": span_payload.get("idempotency_key", event.idempotency_key),
+                        "created_at": utcnow(),
+                    }
 
             if event.span_id and event.event_type == SpanEventType.SPAN_ENDED:
-                span = self.db.get(Span, event.span_id)
-                if span:
+                # spans started earlier in this batch are still plain rows; older ones are loaded ORM objects
+                if event.span_id in new_spans:
+                    row = new_spans[event.span_id]
+                    row["end_time"] = event.event_time
+                    row["status"] = event_payload.get("status", row["status"])
+                    row["error"] = event_payload.get("error", row["error"])
+                elif event.span_id in spans:
+                    span = spans[event.span_id]
+                    if span.end_time is None:
+                        closing[event.span_id] = event.event_time
                     span.end_time = event.event_time
-                    span.status = event.payload.get("status", span.status)
-                    span.error = event.payload.get("error", span.error)
+                    span.status = event_payload.get("status", span.status)
+                    span.error = event_payload.get("error", span.error)
 
             if event.span_id and event.event_type == SpanEventType.AMENDMENT:
-                span = self.db.get(Span, event.span_id)
-                if span:
-                    patch = event.payload.get("patch", {})
-                    # projection update while preserving immutable amendment event log
+                patch = event_payload.get("patch", {})
+                # projection update while preserving immutable amendment event log
+                if event.span_id in new_spans:
+                    row = new_spans[event.span_id]
+                    row["attributes"] = {**(row["attributes"] or {}), **patch.get("attributes", {})}
+                    if "status" in patch:
+                        row["status"] = patch["status"]
+                elif event.span_id in spans:
+                    span = spans[event.span_id]
                     span.attributes = {**(span.attributes or {}), **patch.get("attributes", {})}
                     if "status" in patch:
                         span.status = patch["status"]
 
-            self.db.add(
-                SpanEvent(
-                    project_id=self.project_id,
+            event_rows.append(
+                self._event_row(
                     trace_id=event.trace_id,
                     span_id=event.span_id,
                     event_type=event.event_type.value,
                     event_time=event.event_time,
-                    payload=event.payload,
+                    payload=event_payload,
                     idempotency_key=event.idempotency_key,
+                    offloaded=event_offloaded,
                 )
             )
-            ingested += 1
-
-        touched_trace_ids = {e.trace_id for e in payload.events}
-        for trace_id in touched_trace_ids:
-            self._recalculate_trace_metrics(trace_id)
 
         try:
-            self.db.commit()
+            inserted_ids = await self._insert_spans(self._parents_first(list(new_spans.values())), known=spans)
+            # must run before the ORM flush writes end_time, so only the open->ended transition is counted
+            closed_trace_ids = await self._close_spans(closing)
+            await self.db.flush()
+            inserted_keys = await self._insert_events(event_rows)
+
+            deltas: dict[UUID, list[int]] = {e.trace_id: [0, 0] for e in payload.events}
+            for span_id in inserted_ids:
+                row = new_spans[span_id]
+                delta = deltas.setdefault(row["trace_id"], [0, 0])
+                delta[0] += 1
+                delta[1] += 1 if row["end_time"] else 0
+            for trace_id in closed_trace_ids:
+                deltas.setdefault(trace_id, [0, 0])[1] += 1
+            await self._apply_trace_deltas(deltas)
+            await self.blobs.flush()
+            await self.db.commit()
         except IntegrityError as exc:
-            self.db.rollback()
+            await self.db.rollback()
             raise HTTPException(status_code=409, detail=f"idempotency conflict: {str(exc.orig)}")
 
-        return {"ingested_events": ingested}
+        return {
+            "ingested_events": len(inserted_keys),
+            "duplicate_idempotency_keys": sorted(event_keys - inserted_keys),
+        }
+
+    async def _existing_keys(
+        self, model: type[Span] | type[SpanEvent], keys: set[str], event_range: tuple[datetime, datetime] | None = None
+    ) -> set[str]:
+        """Keys already stored; for span_events, `event_range` limits the lookup to the batch's partitions.
+
+        span_events is unique on (project_id, idempotency_key, event_time), so a retry only collides
+        with rows at its own timestamps anyway.
+        """
+        found: set[str] = set()
+        for chunk in self._chunks(sorted(keys)):
+            q = select(model.idempotency_key).where(
+                and_(model.project_id == self.project_id, model.idempotency_key.in_(chunk))
+            )
+            if event_range:
+                q = q.where(SpanEvent.event_time.between(*event_range))
+            rows = await self.db.scalars(q)
+            found.update(rows.all())
+        return found
+
+    async def _existing_span_ids(self, span_ids: set[UUID]) -> set[UUID]:
+        found: set[UUID] = set()
+        for chunk in self._chunks(list(span_ids)):
+            found.update((await self.db.scalars(select(Span.id).where(and_(Span.project_id == self.project_id, Span.id.in_(chunk))))).all())
+        return found
+
+    async def _load_spans(self, span_ids: set[UUID]) -> dict[UUID, Span]:
+        spans: dict[UUID, Span] = {}
+        for chunk in self._chunks(list(span_ids)):
+            for span in (await self.db.scalars(select(Span).where(and_(Span.project_id == self.project_id, Span.id.in_(chunk))))).all():
+                spans[span.id] = span
+        return spans
+
+    async def _insert_spans(self, rows: list[dict[str, Any]], known: dict[UUID, Span] | None = None) -> set[UUID]:
+        """Multi-row insert; returns the ids that were actually new (idempotency duplicates are skipped).
+
+        `rows` must be parents-first. Each row gets `path`/`depth` from its parent (in the batch, in
+        `known` or loaded); a span whose parent has not been ingested yet starts its own path and is
+        grafted under the parent by `_graft_orphans` once the parent lands.
+        """
+        batch_ids = {row["id"] for row in rows}
+        paths: dict[UUID, list[UUID]] = {span_id: span.path for span_id, span in (known or {}).items() if span.path}
+        outside = {row["parent_span_id"] for row in rows if row["parent_span_id"]} - batch_ids - paths.keys()
+        for chunk in self._chunks(list(outside)):
+            paths.update(
+                (
+                    await self.db.execute(
+                        select(Span.id, Span.path).where(and_(Span.project_id == self.project_id, Span.id.in_(chunk)))
+                    )
+                ).all()
+            )
+        for row in rows:
+            prefix = paths.get(row["parent_span_id"], []) if row["parent_span_id"] else []
+            row["path"] = [*prefix, row["id"]]
+            row["depth"] = len(prefix)
+            row["child_count"] = 0
+            paths[row["id"]] = row["path"]
 
-    def ingest_langgraph_run(self, payload: LangGraphRunIn) -> dict[str, Any]:
+        inserted: set[UUID] = set()
+        for chunk in self._chunks(rows):
+            stmt = (
+                pg_insert(Span)
+                .values(chunk)
+                .on_conflict_do_nothing(constraint="uq_spans_project_idempotency")
+                .returning(Span.id)
+            )
+            inserted.update((await self.db.execute(stmt)).scalars().all())
+        await self._graft_orphans([row for row in rows if row["id"] in inserted])
+        return inserted
+
+    async def _graft_orphans(self, new_rows: list[dict[str, Any]]) -> None:
+        """Re-root subtrees that were waiting for one of `new_rows` as parent and bump `child_count`."""
+        if not new_rows:
+            return
+        new_paths = {row["id"]: row["path"] for row in new_rows}
+        trace_ids = list({row["trace_id"] for row in new_rows})
+        child_counts: dict[UUID, int] = {}
+        for row in new_rows:
+            if row["parent_span_id"]:
+                child_counts[row["parent_span_id"]] = child_counts.get(row["parent_span_id"], 0) + 1
+
+        grafts: list[tuple[UUID, list[UUID]]] = []
+        for chunk in self._chunks(list(new_paths)):
+            orphans = await self.db.execute(
+                select(Span.id, Span.parent_span_id).where(
+                    and_(
+                        Span.project_id == self.project_id,
+                        Span.trace_id.in_(trace_ids),
+                        Span.parent_span_id.in_(chunk),
+                        # still the root of its own path, i.e. it was stored before its parent
+                        Span.path[1] == Span.id,
+                    )
+                )
+            )
+            for orphan_id, parent_id in orphans.all():
+                prefix = new_paths[parent_id]
+                if orphan_id in prefix:  # parent cycle in the input; leave it detached
+                    continue
+                grafts.append((orphan_id, prefix))
+                child_counts[parent_id] = child_counts.get(parent_id, 0) + 1
+
+        if grafts:
+            graft_rows = values(
+                column("root_id", PG_UUID(as_uuid=True)),
+                column("prefix", ARRAY(PG_UUID(as_uuid=True))),
+                name="graft",
+            ).data(grafts)
+            await self.db.execute(
+                update(Span)
+                .where(and_(Span.project_id == self.project_id, Span.path.contains(array([graft_rows.c.root_id]))))
+                .values(path=graft_rows.c.prefix.concat(Span.path), depth=Span.depth + func.cardinality(graft_rows.c.prefix))
+                .execution_options(synchronize_session=False)
+            )
+        if child_counts:
+            count_rows = values(
+                column("span_id", PG_UUID(as_uuid=True)),
+                column("n", Integer),
+                name="children",
+            ).data(list(child_counts.items()))
+            await self.db.execute(
+                update(Span)
+                .where(and_(Span.id == count_rows.c.span_id, Span.project_id == self.project_id))
+                .values(child_count=Span.child_count + count_rows.c.n)
+                .execution_options(synchronize_session=False)
+            )
+
+    async def _close_spans(self, end_times: dict[UUID, datetime]) -> list[UUID]:
+        """Set end_time on still-open spans; returns one trace id per span this call actually closed."""
+        if not end_times:
+            return []
+        closing_rows = values(
+            column("span_id", PG_UUID(as_uuid=True)),
+            column("end_time", DateTime(timezone=True)),
+            name="closing",
+        ).data(list(end_times.items()))
+        rows = await self.db.scalars(
+            update(Span)
+            .where(
+                and_(Span.id == closing_rows.c.span_id, Span.project_id == self.project_id, Span.end_time.is_(None))
+            )
+            .values(end_time=closing_rows.c.end_time)
+            .returning(Span.trace_id)
+            .execution_options(synchronize_session=False)
+        )
+        return list(rows.all())
+
+    async def _insert_events(self, rows: list[dict[str, Any]]) -> set[str]:
+        """Multi-row insert; returns the idempotency keys that were actually new."""
+        inserted: set[str] = set()
+        for chunk in self._chunks(rows):
+            stmt = (
+                pg_insert(SpanEvent)
+                .values(chunk)
+                .on_conflict_do_nothing(constraint="uq_span_events_project_idempotency")
+                .returning(SpanEvent.idempotency_key)
+            )
+            inserted.update((await self.db.execute(stmt)).scalars().all())
+        return inserted
+
+    def _event_row(
+        self,
+        trace_id: UUID,
+        span_id: UUID | None,
+        event_type: str,
+        event_time: datetime,
+        payload: dict[str, Any],
+        idempotency_key: str,
+        offloaded: list[str] | None = None,
+    ) -> dict[str, Any]:
+        return {
+            "id": uuid4(),
+            "project_id": self.project_id,
+            "trace_id": trace_id,
+            "span_id": span_id,
+            "event_type": event_type,
+            "event_time": event_time,
+            "payload": payload,
+            "idempotency_key": idempotency_key,
+            "created_at": utcnow(),
+            "blob_search_vector": blob_search_vector(offloaded) if offloaded else None,
+        }
+
+    @staticmethod
+    def _parents_first(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        # a child's path is built from its parent's, so parents must come first (cycles fall back to input order)
+        pending = {row["id"]: row for row in rows}
+        ordered: list[dict[str, Any]] = []
+        emitted: set[UUID] = set()
+        while pending:
+            ready = [
+                row for row in pending.values() if row["parent_span_id"] not in pending or row["parent_span_id"] in emitted
+            ]
+            if not ready:
+                ready = list(pending.values())
+            for row in ready:
+                ordered.append(row)
+                emitted.add(row["id"])
+                del pending[row["id"]]
+        return ordered
+
+    @staticmethod
+    def _chunks(items: list[Any], size: int = INSERT_CHUNK_SIZE) -> Iterator[list[Any]]:
+        for i in range(0, len(items), size):
+            yield items[i : i + size]
+
+    @staticmethod
+    def _as_uuid(value: Any) -> UUID | None:
+        if not value:
+            return None
+        if isinstance(value, UUID):
+            return value
+        try:
+            return UUID(str(value))
+        except ValueError:
+            return None
+
+    async def ingest_langgraph_run(self, payload: LangGraphRunIn) -> dict[str, Any]:
         trace_payload = IngestTraceBatchRequest(
             trace={
                 "trace_id": payload.trace_id,
@@ -243,7 +735,7 @@ class TraceService:
             spans=[],
             allow_missing_parent=payload.allow_missing_parent,
         )
-        self.ingest_trace_batch(trace_payload)
+        await self.ingest_trace_batch(trace_payload)
 
         node_to_span: dict[str, UUID] = {}
         events: list[dict[str, Any]] = []
@@ -296,7 +788,9 @@ class TraceService:
                     "trace_id": payload.trace_id,
                     "span_id": span_id,
                     "event_type": SpanEventType.EVENT,
-                    "event_time": node.end_time or node.start_time,
+                    # start_time, not end_time: a node is re-sent once it ends, and the key is only unique
+                    # per event_time
+                    "event_time": node.start_time,
                     "payload": {
                         "node_type": node.node_type,
                         "state_transition": {
@@ -309,7 +803,7 @@ class TraceService:
             )
 
         event_payload = IngestSpansRequest(events=events, allow_missing_parent=payload.allow_missing_parent)
-        ingested = self.ingest_span_events(event_payload)
+        ingested = await self.ingest_span_events(event_payload)
         return {
             "trace_id": str(payload.trace_id),
             "run_id": payload.run_id,
@@ -326,7 +820,7 @@ class TraceService:
         except Exception:
             return False
 
-    def list_traces(
+    async def list_traces(
         self,
         page: int,
         page_size: int,
@@ -339,7 +833,17 @@ class TraceService:
         user_id: str | None,
         session_id: str | None,
         search: str | None,
+        cursor: str | None = None,
+        count: str = "exact",
+        sort: str | None = None,
     ) -> dict[str, Any]:
+        """List traces newest first, or by search relevance.
+
+        Pass the previous response's `next_cursor` as `cursor` to page by `(start_time, id)` keyset
+        (served by `ix_traces_project_start` at any depth); without it `page` keeps the old OFFSET paging.
+        `count` is "exact", "estimate" (planner row estimate, exact below `EXACT_COUNT_THRESHOLD`) or "none".
+        `sort` defaults to "relevance" when `search` is set and "time" otherwise; relevance pages by offset.
+        """
         q = select(Trace).where(Trace.project_id == self.project_id)
 
         if start_time:
@@ -358,145 +862,473 @@ class TraceService:
             q = q.where(Trace.session_id == session_id)
         if tag:
             q = q.where(Trace.attributes.op("?")(tag))
+        rank = None
         if search:
-            q = q.where(
-                or_(
-                    Trace.input_text.ilike(f"%{search}%"),
-                    Trace.output_text.ilike(f"%{search}%"),
-                    Trace.id.in_(
-                        select(SpanEvent.trace_id).where(
-                            and_(
-                                SpanEvent.project_id == self.project_id,
-                                func.cast(SpanEvent.payload, Text).ilike(f"%{search}%"),
-                            )
-                        )
-                    ),
-                )
-            )
+            q, rank = self._apply_search(q, search, start_time)
+        sort = sort or ("relevance" if rank is not None else "time")
+        if sort == "relevance" and rank is None:
+            sort = "time"
+        if cursor and sort == "relevance":
+            raise HTTPException(status_code=400, detail="cursor paging requires sort=time")
 
-        total = self.db.scalar(select(func.count()).select_from(q.subquery())) or 0
-        rows = self.db.scalars(
-            q.order_by(Trace.start_time.desc()).offset((page - 1) * page_size).limit(page_size)
-        ).all()
+        total, total_is_estimate = await self._count_traces(q, count)
+
+        order_by = [Trace.start_time.desc(), Trace.id.desc()]
+        if sort == "relevance":
+            order_by.insert(0, rank.desc())
+        page_q = q.order_by(*order_by).limit(page_size + 1)
+        if cursor:
+            after_start, after_id = self._decode_cursor(cursor)
+            # the bare `<=` gives the planner an index range on (project_id, start_time); `or_` breaks ties
+            page_q = page_q.where(
+                Trace.start_time <= after_start,
+                or_(Trace.start_time < after_start, Trace.id < after_id),
+            )
+        else:
+            page_q = page_q.offset((page - 1) * page_size)
+        rows = (await self.db.scalars(page_q)).all()
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
         return {
             "items": rows,
-            "page": page,
+            "page": None if cursor else page,
             "page_size": page_size,
+            "next_cursor": self._encode_cursor(rows[-1]) if has_more and sort == "time" else None,
             "total": total,
+            "total_is_estimate": total_is_estimate,
         }
 
-    def trace_stats(self, last_hours: int = 24) -> dict[str, Any]:
-        now = datetime.utcnow()
-        window_start = now.replace(minute=0, second=0, microsecond=0)
-        open_count = self.db.scalar(
-            select(func.count()).select_from(Trace).where(and_(Trace.project_id == self.project_id, Trace.has_open_spans.is_(True)))
-        ) or 0
-        success_count = self.db.scalar(
-            select(func.count()).select_from(Trace).where(and_(Trace.project_id == self.project_id, Trace.status == "success"))
-        ) or 0
-        error_count = self.db.scalar(
-            select(func.count()).select_from(Trace).where(and_(Trace.project_id == self.project_id, Trace.status == "error"))
-        ) or 0
-        decision_rows = self.db.execute(
-            select(TraceDecision.action, func.count(TraceDecision.id))
-            .where(TraceDecision.project_id == self.project_id)
-            .group_by(TraceDecision.action)
-        ).all()
-        span_type_rows = self.db.execute(
-            select(Span.span_type, func.count(Span.id)).where(Span.project_id == self.project_id).group_by(Span.span_type)
+    def _apply_search(self, q, search: str, start_time: datetime | None = None):
+        """Plan `search` onto the trace query; returns `(query, rank)` where rank is None when unranked.
+
+        Words of 2+ characters become a prefix tsquery (`refund pol` -> `refund:* & pol:*`) matched against
+        ix_traces_text_search and the GIN index on span_events.search_vector (every string in the
+        payload, maintained at insert), and against the blob_search_vector of traces and events whose text
+        was offloaded. Rank is the trace text's ts_rank plus its best event rank.
+        Input with no such words (single characters, punctuation) cannot use either index, so it falls
+        back to ILIKE on the trace's own text instead of scanning every event payload in the project.
+        A `start_time` filter also skips span_events partitions older than it.
+        """
+        words = [w for w in re.findall(r"[^\W_]+", search.lower()) if len(w) >= 2]
+        if not words:
+            pattern = f"%{search}%"
+            return q.where(or_(Trace.input_text.ilike(pattern), Trace.output_text.ilike(pattern))), None
+
+        tsquery = func.to_tsquery(literal_column("'simple'"), " & ".join(f"{w}:*" for w in words))
+        event_rank = func.ts_rank(SpanEvent.search_vector, tsquery) + func.coalesce(
+            func.ts_rank(SpanEvent.blob_search_vector, tsquery), 0
+        )
+        event_hits = select(SpanEvent.trace_id, func.max(event_rank).label("rank")).where(
+            SpanEvent.project_id == self.project_id,
+            or_(SpanEvent.search_vector.op("@@")(tsquery), SpanEvent.blob_search_vector.op("@@")(tsquery)),
+        )
+        if start_time:
+            event_hits = event_hits.where(SpanEvent.event_time >= start_time - EVENT_CLOCK_SKEW)
+        event_hits = event_hits.group_by(SpanEvent.trace_id).subquery("event_hits")
+        q = q.outerjoin(event_hits, event_hits.c.trace_id == Trace.id).where(
+            or_(
+                TRACE_TEXT_VECTOR.op("@@")(tsquery),
+                Trace.blob_search_vector.op("@@")(tsquery),
+                event_hits.c.trace_id.is_not(None),
+            )
+        )
+        rank = (
+            func.ts_rank(TRACE_TEXT_VECTOR, tsquery)
+            + func.coalesce(func.ts_rank(Trace.blob_search_vector, tsquery), 0)
+            + func.coalesce(event_hits.c.rank, 0)
+        )
+        return q, rank
+
+    async def _count_traces(self, q, mode: str) -> tuple[int | None, bool]:
+        if mode == "none":
+            return None, False
+        if mode == "estimate":
+            conn = await self.db.connection()
+            compiled = q.compile(dialect=conn.dialect)
+            plan = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled.string}", compiled.params)
+            estimate = int(plan.scalar()[0]["Plan"]["Plan Rows"])
+            if estimate >= EXACT_COUNT_THRESHOLD:
+                return estimate, True
+        total = await self.db.scalar(select(func.count()).select_from(q.subquery())) or 0
+        return total, False
+
+    @staticmethod
+    def _encode_cursor(trace: Trace) -> str:
+        raw = json.dumps([trace.start_time.isoformat(), str(trace.id)]).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii")
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+        try:
+            start_time, trace_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            return datetime.fromisoformat(start_time), UUID(trace_id)
+        except (ValueError, TypeError) as exc:
+            raise HTTPException(status_code=400, detail="invalid cursor") from exc
+
+    async def trace_stats(self, last_hours: int = 24) -> dict[str, Any]:
+        """Counts over the current hour and the `last_hours - 1` before it, read from the hourly rollups.
+
+        Traces and spans are bucketed by start time, decisions by creation time. The rollup tables are
+        kept current by triggers (migration 0006), so this is one query over a few rows per hour.
+        """
+        now = utcnow()
+        window_start = now.replace(minute=0, second=0, microsecond=0) - timedelta(hours=last_hours - 1)
+
+        def grouped(model, dimension: str, key, counter):
+            q = select(
+                literal(dimension).label("dimension"),
+                (key if key is not None else literal("")).label("key"),
+                func.sum(counter).label("n"),
+            ).where(and_(model.project_id == self.project_id, model.bucket_start >= window_start))
+            return q.group_by(key) if key is not None else q
+
+        rows = (
+            await self.db.execute(
+                union_all(
+                    grouped(TraceRollupHourly, "status", TraceRollupHourly.status, TraceRollupHourly.traces),
+                    grouped(TraceRollupHourly, "model", TraceRollupHourly.model, TraceRollupHourly.traces),
+                    grouped(TraceRollupHourly, "environment", TraceRollupHourly.environment, TraceRollupHourly.traces),
+                    grouped(TraceRollupHourly, "open", None, TraceRollupHourly.open_traces),
+                    grouped(SpanRollupHourly, "span_type", SpanRollupHourly.span_type, SpanRollupHourly.spans),
+                    grouped(DecisionRollupHourly, "action", DecisionRollupHourly.action, DecisionRollupHourly.decisions),
+                )
+            )
         ).all()
+        counts: dict[str, dict[str, int]] = {}
+        for dimension, key, n in rows:
+            if n:
+                # rollups store NULL model/environment as ''
+                counts.setdefault(dimension, {})[key or "unknown"] = int(n)
+        statuses = counts.get("status", {})
         return {
             "window_hours": last_hours,
+            "window_start": window_start.isoformat(),
             "totals": {
-                "open_traces": int(open_count),
-                "success_traces": int(success_count),
-                "error_traces": int(error_count),
+                "traces": sum(statuses.values()),
+                "open_traces": sum(counts.get("open", {}).values()),
+                "success_traces": statuses.get("success", 0),
+                "error_traces": statuses.get("error", 0),
             },
-            "decisions": {k: int(v) for k, v in decision_rows},
-            "span_types": {k: int(v) for k, v in span_type_rows},
-            "sampled_at": window_start.isoformat(),
+            "statuses": statuses,
+            "models": counts.get("model", {}),
+            "environments": counts.get("environment", {}),
+            "decisions": counts.get("action", {}),
+            "span_types": counts.get("span_type", {}),
+            "sampled_at": now.isoformat(),
         }
 
-    def get_trace_detail(self, trace_id: UUID) -> dict[str, Any]:
-        trace = self.db.scalar(select(Trace).where(and_(Trace.id == trace_id, Trace.project_id == self.project_id)))
-        if not trace:
-            raise HTTPException(status_code=404, detail="trace not found")
-
-        spans = self.db.scalars(
-            select(Span).where(and_(Span.trace_id == trace_id, Span.project_id == self.project_id)).order_by(Span.start_time.asc())
-        ).all()
-        events = self.db.scalars(
-            select(SpanEvent)
-            .where(and_(SpanEvent.trace_id == trace_id, SpanEvent.project_id == self.project_id))
-            .order_by(SpanEvent.event_time.asc())
-        ).all()
-        evals = self.db.scalars(
-            select(Evaluation)
-            .where(and_(Evaluation.project_id == self.project_id, Evaluation.trace_id == trace_id))
-            .order_by(Evaluation.created_at.desc())
-        ).all()
-        decisions = self.db.scalars(
-            select(TraceDecision)
-            .where(and_(TraceDecision.project_id == self.project_id, TraceDecision.trace_id == trace_id))
-            .order_by(TraceDecision.created_at.desc())
-        ).all()
-        judge_runs = self.db.scalars(
-            select(JudgeRun)
-            .where(and_(JudgeRun.project_id == self.project_id, JudgeRun.trace_id == trace_id))
-            .order_by(JudgeRun.created_at.desc())
-        ).all()
+    async def get_trace_detail(
+        self, trace_id: UUID, timeline_limit: int = DEFAULT_TIMELINE_LIMIT, resolve_blobs: bool = False
+    ) -> dict[str, Any]:
+        """Trace, its child collections and the first timeline page in a single statement.
 
-        timeline = []
-        timeline.append(
-            {
-                "timestamp": trace.start_time,
-                "source": "trace",
-                "source_id": trace.id,
-                "event_type": "TRACE_STARTED",
-                "payload": {"status": trace.status},
-            }
-        )
-        for event in events:
-            timeline.append(
-                {
-                    "timestamp": event.event_time,
-                    "source": "span",
-                    "source_id": event.span_id,
-                    "event_type": event.event_type,
-                    "payload": event.payload,
-                }
-            )
-        if trace.end_time:
-            timeline.append(
-                {
-                    "timestamp": trace.end_time,
-                    "source": "trace",
-                    "source_id": trace.id,
-                    "event_type": "TRACE_ENDED",
-                    "payload": {"status": trace.status},
-                }
+        Child rows are aggregated to JSON in Postgres, so the whole detail is one round trip; later
+        timeline pages come from `get_timeline(after=timeline_next_cursor)`. Offloaded values stay
+        blob references unless `resolve_blobs` is set.
+        """
+        row = (
+            await self.db.execute(
+                select(
+                    Trace,
+                    self._rows_json(Span, trace_id, "start_time"),
+                    self._rows_json(Evaluation, trace_id, "-created_at"),
+                    self._rows_json(TraceDecision, trace_id, "-created_at"),
+                    self._rows_json(JudgeRun, trace_id, "-created_at"),
+                    self._timeline_json(trace_id, after=None, limit=timeline_limit, fields=None, span_id=None),
+                ).where(and_(Trace.id == trace_id, Trace.project_id == self.project_id))
             )
-
-        timeline.sort(key=lambda x: x["timestamp"])
+        ).first()
+        if not row:
+            raise HTTPException(status_code=404, detail="trace not found")
+        trace, spans, evals, decisions, judge_runs, timeline = row
+        timeline, next_cursor = self._timeline_page(timeline, timeline_limit)
+        if resolve_blobs:
+            spans, timeline = await resolve(self.project_id, [spans, timeline])
+            await self._resolve_trace_text(trace)
         return {
             "trace": trace,
             "spans": spans,
             "timeline": timeline,
-            "evaluations": [
-                {
-                    "id": e.id,
-                    "trace_id": e.trace_id,
-                    "span_id": e.span_id,
-                    "eval_name": e.eval_name,
-                    "eval_model": e.eval_model,
-                    "score": e.score,
-                    "passed": e.passed,
-                    "metadata": e.eval_metadata or {},
-                    "user_review_passed": e.user_review_passed,
-                    "created_at": e.created_at,
-                }
-                for e in evals
-            ],
+            "timeline_next_cursor": next_cursor,
+            "evaluations": evals,
             "decision_history": decisions,
             "judge_runs": judge_runs,
         }
+
+    async def get_timeline(
+        self,
+        trace_id: UUID,
+        after: str | None = None,
+        limit: int = DEFAULT_TIMELINE_LIMIT,
+        fields: list[str] | None = None,
+        span_id: UUID | None = None,
+        resolve_blobs: bool = False,
+    ) -> dict[str, Any]:
+        """One time-ordered timeline page; `fields` projects entries, e.g. `event_type,payload.status`."""
+        exists = await self.db.scalar(select(Trace.id).where(and_(Trace.id == trace_id, Trace.project_id == self.project_id)))
+        if not exists:
+            raise HTTPException(status_code=404, detail="trace not found")
+        page = await self.db.scalar(
+            select(
+                self._timeline_json(
+                    trace_id,
+                    after=self._decode_timeline_cursor(after) if after else None,
+                    limit=limit,
+                    fields=fields,
+                    span_id=span_id,
+                )
+            )
+        )
+        items, next_cursor = self._timeline_page(page, limit)
+        if resolve_blobs:
+            items = await resolve(self.project_id, items)
+        return {"items": items, "next_cursor": next_cursor}
+
+    async def get_blob(self, digest: str) -> Any:
+        """One offloaded value by the digest in its `{"$blob": ...}` reference."""
+        if not re.fullmatch(r"[0-9a-f]{64}", digest):
+            raise HTTPException(status_code=400, detail="invalid blob digest")
+        blobs = await load_blobs(self.project_id, {digest})
+        if digest not in blobs:
+            raise HTTPException(status_code=404, detail="blob not found")
+        return blobs[digest]
+
+    async def _resolve_trace_text(self, trace: Trace) -> None:
+        """Swap the previews of offloaded trace text for the full text on a detached copy."""
+        if not (trace.input_text_blob or trace.output_text_blob):
+            return
+        self.db.expunge(trace)
+        trace.input_text = await resolve_text(self.project_id, trace.input_text, trace.input_text_blob)
+        trace.output_text = await resolve_text(self.project_id, trace.output_text, trace.output_text_blob)
+
+    def _rows_json(self, model, trace_id: UUID, order: str):
+        """Scalar subquery aggregating the trace's `model` rows into a JSON array (`-col` sorts descending)."""
+        rows = select(model).where(and_(model.trace_id == trace_id, model.project_id == self.project_id)).subquery()
+        order_col = rows.c[order.lstrip("-")]
+        return select(
+            func.coalesce(
+                func.jsonb_agg(
+                    aggregate_order_by(func.to_jsonb(rows.table_valued()), order_col.desc() if order.startswith("-") else order_col)
+                ),
+                literal_column("'[]'::jsonb"),
+            )
+        ).scalar_subquery()
+
+    def _timeline_json(
+        self,
+        trace_id: UUID,
+        after: tuple[datetime, int, UUID] | None,
+        limit: int,
+        fields: list[str] | None,
+        span_id: UUID | None,
+    ):
+        """Scalar subquery with up to `limit + 1` timeline entries as a JSON array, in time order.
+
+        Entries are ordered by `(timestamp, seq, entry_id)`: seq 0/1/2 puts the trace start before and
+        the trace end after span events with the same timestamp. The keyset predicate is applied per
+        branch so the span_events branch streams from ix_span_events_trace_time.
+        """
+
+        def after_pred(ts_col, seq: int, id_col):
+            if after is None:
+                return true()
+            after_ts, after_seq, after_id = after
+            if seq > after_seq:
+                return ts_col >= after_ts
+            if seq < after_seq:
+                return ts_col > after_ts
+            return tuple_(ts_col, id_col) > tuple_(after_ts, after_id)
+
+        trace_start = select(Trace.start_time).where(Trace.id == trace_id).scalar_subquery()
+        event_cols = {
+            "timestamp": SpanEvent.event_time,
+            "source": literal("span"),
+            "source_id": SpanEvent.span_id,
+            "event_type": SpanEvent.event_type,
+            "payload": SpanEvent.payload,
+        }
+        branches = [
+            select(literal(1).label("seq"), SpanEvent.id.label("entry_id"), *(c.label(k) for k, c in event_cols.items())).where(
+                and_(
+                    SpanEvent.trace_id == trace_id,
+                    SpanEvent.project_id == self.project_id,
+                    SpanEvent.span_id == span_id if span_id is not None else true(),
+                    # run-time partition pruning: only partitions from around the trace's start are probed
+                    SpanEvent.event_time >= trace_start - EVENT_CLOCK_SKEW,
+                    after_pred(SpanEvent.event_time, 1, SpanEvent.id),
+                )
+            )
+        ]
+        if span_id is None:
+            for seq, ts_col, event_type in ((0, Trace.start_time, "TRACE_STARTED"), (2, Trace.end_time, "TRACE_ENDED")):
+                branches.append(
+                    select(
+                        literal(seq).label("seq"),
+                        Trace.id.label("entry_id"),
+                        ts_col.label("timestamp"),
+                        literal("trace").label("source"),
+                        Trace.id.label("source_id"),
+                        literal(event_type).label("event_type"),
+                        func.jsonb_build_object("status", Trace.status).label("payload"),
+                    ).where(
+                        and_(
+                            Trace.id == trace_id,
+                            Trace.project_id == self.project_id,
+                            ts_col.is_not(None),
+                            after_pred(ts_col, seq, Trace.id),
+                        )
+                    )
+                )
+        timeline = union_all(*(b.order_by(None) for b in branches)).subquery("timeline")
+
+        projected = [timeline.c.seq, timeline.c.entry_id, timeline.c.timestamp]
+        payload_keys: list[str] = []
+        for field in fields or TIMELINE_FIELDS:
+            if field.startswith("payload."):
+                payload_keys.append(field.removeprefix("payload."))
+            elif field in TIMELINE_FIELDS:
+                if field != "timestamp":
+                    projected.append(timeline.c[field])
+            else:
+                raise HTTPException(status_code=400, detail=f"unknown timeline field: {field}")
+        if payload_keys and not (fields and "payload" in fields):
+            args = []
+            for key in payload_keys:
+                args += [literal(key), timeline.c.payload.op("->")(literal(key))]
+            projected.append(func.jsonb_build_object(*args).label("payload"))
+
+        page = (
+            select(*projected)
+            .order_by(timeline.c.timestamp, timeline.c.seq, timeline.c.entry_id)
+            .limit(limit + 1)
+            .subquery("page")
+        )
+        return select(
+            func.coalesce(
+                func.jsonb_agg(aggregate_order_by(func.to_jsonb(page.table_valued()), page.c.timestamp, page.c.seq, page.c.entry_id)),
+                literal_column("'[]'::jsonb"),
+            )
+        ).scalar_subquery()
+
+    def _timeline_page(self, entries: list[dict[str, Any]], limit: int) -> tuple[list[dict[str, Any]], str | None]:
+        """Strip the ordering columns and turn the `limit + 1`-th entry into `next_cursor`."""
+        next_cursor = None
+        if len(entries) > limit:
+            entries = entries[:limit]
+            last = entries[-1]
+            raw = json.dumps([last["timestamp"], last["seq"], last["entry_id"]]).encode("utf-8")
+            next_cursor = base64.urlsafe_b64encode(raw).decode("ascii")
+        for entry in entries:
+            del entry["seq"], entry["entry_id"]
+        return entries, next_cursor
+
+    @staticmethod
+    def _decode_timeline_cursor(cursor: str) -> tuple[datetime, int, UUID]:
+        try:
+            timestamp, seq, entry_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            return datetime.fromisoformat(timestamp), int(seq), UUID(entry_id)
+        except (ValueError, TypeError) as exc:
+            raise HTTPException(status_code=400, detail="invalid cursor") from exc
+
+    async def _get_span(self, trace_id: UUID, span_id: UUID) -> Span:
+        span = await self.db.scalar(
+            select(Span).where(and_(Span.id == span_id, Span.trace_id == trace_id, Span.project_id == self.project_id))
+        )
+        if not span:
+            raise HTTPException(status_code=404, detail="span not found")
+        return span
+
+    async def get_subtree(
+        self, trace_id: UUID, span_id: UUID, max_depth: int | None = None, resolve_blobs: bool = False
+    ) -> dict[str, Any]:
+        """The span and its descendants (GIN lookup on `path`), at most `max_depth` levels below it."""
+        root = await self._get_span(trace_id, span_id)
+        q = select(Span).where(and_(Span.project_id == self.project_id, Span.path.contains([span_id])))
+        if max_depth is not None:
+            q = q.where(Span.depth <= root.depth + max_depth)
+        spans = (await self.db.scalars(q.order_by(Span.depth, Span.start_time))).all()
+        if resolve_blobs:
+            attributes = await resolve(self.project_id, [span.attributes for span in spans])
+            # detached, so the resolved values are never flushed back over the references
+            self.db.expunge_all()
+            for span, resolved in zip(spans, attributes):
+                span.attributes = resolved
+        return {"span_id": span_id, "depth": root.depth, "spans": spans}
+
+    async def get_ancestors(self, trace_id: UUID, span_id: UUID) -> dict[str, Any]:
+        """Known ancestors from the top of the tree down to the span's parent (primary-key lookups on `path`)."""
+        span = await self._get_span(trace_id, span_id)
+        ancestors = (
+            await self.db.scalars(
+                select(Span)
+                .where(and_(Span.project_id == self.project_id, Span.id.in_(span.path[:-1])))
+                .order_by(Span.depth)
+            )
+        ).all()
+        # false while some ancestor's parent has not been ingested yet
+        top = ancestors[0] if ancestors else span
+        return {"span_id": span_id, "complete": top.parent_span_id is None, "ancestors": ancestors}
+
+    async def get_critical_path(self, trace_id: UUID, span_id: UUID | None = None) -> dict[str, Any]:
+        """Follow the last-finishing child from `span_id` (default: the trace's latest-ending root span).
+
+        One recursive query over ix_spans_trace_parent. `self_ms` is the time a step's span spends
+        outside the next step, so the values add up to the root's duration.
+        """
+        if span_id is None:
+            span_id = await self.db.scalar(
+                select(Span.id)
+                .where(and_(Span.trace_id == trace_id, Span.project_id == self.project_id, Span.parent_span_id.is_(None)))
+                .order_by(Span.end_time.desc().nulls_last())
+                .limit(1)
+            )
+            if span_id is None:
+                raise HTTPException(status_code=404, detail="trace has no root span")
+        else:
+            await self._get_span(trace_id, span_id)
+
+        child = aliased(Span)
+        chain = (
+            select(Span.id, literal(0).label("step"))
+            .where(and_(Span.id == span_id, Span.project_id == self.project_id))
+            .cte("chain", recursive=True)
+        )
+        last_child = (
+            select(child.id)
+            .where(
+                and_(
+                    child.trace_id == trace_id,
+                    child.project_id == self.project_id,
+                    child.parent_span_id == chain.c.id,
+                    child.end_time.is_not(None),
+                )
+            )
+            .order_by(child.end_time.desc())
+            .limit(1)
+            .lateral("last_child")
+        )
+        chain = chain.union_all(
+            select(last_child.c.id, chain.c.step + 1)
+            .select_from(chain.join(last_child, true()))
+            .where(chain.c.step < MAX_CRITICAL_PATH_STEPS)
+        )
+        spans = (await self.db.scalars(select(Span).join(chain, Span.id == chain.c.id).order_by(chain.c.step))).all()
+
+        def ms(span: Span | None) -> float:
+            if span is None or span.end_time is None:
+                return 0.0
+            return (span.end_time - span.start_time).total_seconds() * 1000
+
+        steps = [
+            {
+                "span_id": span.id,
+                "name": span.name,
+                "span_type": span.span_type,
+                "start_time": span.start_time,
+                "end_time": span.end_time,
+                "duration_ms": ms(span),
+                "self_ms": ms(span) - ms(spans[i + 1] if i + 1 < len(spans) else None),
+            }
+            for i, span in enumerate(spans)
+        ]
+        return {"span_id": span_id, "duration_ms": ms(spans[0]) if spans else 0.0, "critical_path": steps}
@@ -0,0 +1,64 @@
+"""Backtest evaluation benchmark: a generated policy over `--rows` synthetic decide contexts as NumPy columns.
+
+Times building the columns, evaluating the whole rule set as masks and the old-vs-new confusion matrices
+(the part of `GET /api/v1/policies/{policy_id}/backtest` after loading), and checks a sample of rows
+against `PolicyEngine.evaluate`. No database is needed:
+
+    python -m scripts.bench_backtest --rows 1000000 --rules 200
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from app.schemas.common import ActionEnum
+from app.services.policy_backtest import Column, confusion_matrix, evaluate_columns
+from app.services.policy_engine import PolicyEngine, field_accessor
+from scripts.bench_policy import FIELDS, _context, _policy
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--rules", type=int, default=200)
+    parser.add_argument("--check", type=int, default=2000, help="rows compared against PolicyEngine")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    definition = _policy(args.rules, rnd)
+    # a pool of contexts tiled to --rows keeps generation cheap; values still vary row to row
+    pool = [_context(rnd) for _ in range(min(args.rows, 50_000))]
+    rows = [pool[i % len(pool)] for i in range(args.rows)]
+    raw = {field: [field_accessor(field)(row) for row in rows] for field in FIELDS}
+    old_actions = np.array([a.value for a in ActionEnum], dtype=object)[np.random.default_rng(args.seed).integers(0, 5, args.rows)]
+
+    started = time.perf_counter()
+    columns = {field: Column(values) for field, values in raw.items()}
+    built = time.perf_counter()
+    chosen, outcomes = evaluate_columns(definition, columns, args.rows)
+    evaluated = time.perf_counter()
+    new_actions = np.array([o[0] for o in outcomes], dtype=object)[chosen]
+    new_reasons = np.array([o[1] for o in outcomes], dtype=object)[chosen]
+    confusion_matrix(old_actions, new_actions)
+    by_reason = confusion_matrix(old_actions, new_actions, new_reasons)
+    finished = time.perf_counter()
+
+    engine = PolicyEngine(definition)
+    sample = random.Random(args.seed).sample(range(args.rows), min(args.check, args.rows))
+    mismatches = sum(
+        (lambda r: (r.action, r.reason_code, r.severity))(engine.evaluate(rows[i])) != outcomes[chosen[i]] for i in sample
+    )
+
+    print(f"{args.rows:,} rows, {args.rules} rules, {len(FIELDS)} fields, {len(by_reason)} reason codes hit")
+    print(f"{'build columns':<20}{(built - started) * 1000:>10.0f} ms")
+    print(f"{'evaluate rules':<20}{(evaluated - built) * 1000:>10.0f} ms")
+    print(f"{'confusion matrices':<20}{(finished - evaluated) * 1000:>10.0f} ms")
+    print(f"{'total':<20}{(finished - started) * 1000:>10.0f} ms")
+    print(f"mismatches vs PolicyEngine on {len(sample)} rows: {mismatches}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,115 @@
+"""Ingest throughput benchmark.
+
+Runs TraceService ingest paths directly against the configured database and prints spans/sec.
+To compare before/after, run it on both revisions against the same database:
+
+    python -m scripts.bench_ingest --spans 500 --rounds 20
+"""
+
+import argparse
+import asyncio
+import hashlib
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from app.db.session import AsyncSessionLocal
+from app.models import Project
+from app.schemas.ingest import IngestTraceBatchRequest, LangGraphRunIn
+from app.services.trace_service import TraceService
+
+
+def _trace_batch(n_spans: int) -> IngestTraceBatchRequest:
+    trace_id = uuid.uuid4()
+    start = datetime.now(timezone.utc)
+    root_id = uuid.uuid4()
+    spans = [
+        {
+            "span_id": root_id,
+            "trace_id": trace_id,
+            "name": "root",
+            "span_type": "root",
+            "start_time": start,
+            "idempotency_key": f"bench:{trace_id}:root",
+        }
+    ]
+    for i in range(n_spans - 1):
+        spans.append(
+            {
+                "span_id": uuid.uuid4(),
+                "trace_id": trace_id,
+                "parent_span_id": root_id,
+                "name": f"step-{i}",
+                "status": "success",
+                "start_time": start + timedelta(milliseconds=i),
+                "end_time": start + timedelta(milliseconds=i + 1),
+                "attributes": {"i": i},
+                "idempotency_key": f"bench:{trace_id}:{i}",
+            }
+        )
+    return IngestTraceBatchRequest(
+        trace={"trace_id": trace_id, "start_time": start, "input_text": "bench"},
+        spans=spans,
+    )
+
+
+def _langgraph_run(n_nodes: int) -> LangGraphRunIn:
+    start = datetime.now(timezone.utc)
+    run_id = f"bench-{uuid.uuid4()}"
+    nodes = []
+    for i in range(n_nodes):
+        nodes.append(
+            {
+                "node_id": f"n{i}",
+                "node_name": f"node_{i % 10}",
+                "parent_node_id": f"n{i - 1}" if i else None,
+                "start_time": start + timedelta(milliseconds=i),
+                "end_time": start + timedelta(milliseconds=i + 1),
+                "input_state": {"step": i},
+                "output_state": {"step": i + 1},
+                "idempotency_key": f"n{i}",
+            }
+        )
+    return LangGraphRunIn(trace_id=uuid.uuid4(), run_id=run_id, graph_name="bench", start_time=start, nodes=nodes)
+
+
+async def bench(n_spans: int, rounds: int) -> None:
+    async with AsyncSessionLocal() as db:
+        raw_key = f"bench-{uuid.uuid4()}"
+        project = Project(name="ingest-bench", api_key_hash=hashlib.sha256(raw_key.encode("utf-8")).hexdigest())
+        db.add(project)
+        await db.commit()
+        project_id = project.id
+
+    for label, build, ingest in [
+        ("ingest_trace_batch", _trace_batch, lambda svc, p: svc.ingest_trace_batch(p)),
+        ("ingest_langgraph_run", _langgraph_run, lambda svc, p: svc.ingest_langgraph_run(p)),
+    ]:
+        payloads = [build(n_spans) for _ in range(rounds)]
+        started = time.perf_counter()
+        for payload in payloads:
+            async with AsyncSessionLocal() as db:
+                await ingest(TraceService(db, project_id), payload)
+        elapsed = time.perf_counter() - started
+        total = n_spans * rounds
+        print(f"{label}: {total} spans in {elapsed:.2f}s -> {total / elapsed:,.0f} spans/sec")
+
+        # replaying the same payloads exercises the duplicate path
+        started = time.perf_counter()
+        for payload in payloads:
+            async with AsyncSessionLocal() as db:
+                await ingest(TraceService(db, project_id), payload)
+        elapsed = time.perf_counter() - started
+        print(f"{label} (replay): {total} spans in {elapsed:.2f}s -> {total / elapsed:,.0f} spans/sec")
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--spans", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(bench(args.spans, args.rounds))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,147 @@
+"""LLM judge micro-batching benchmark against a local stand-in judge server.
+
+Starts a server on 127.0.0.1 that answers `POST /judge` (one payload) and `POST /judge/batch` (many) after
+`--base-ms` plus `--per-item-ms` per payload and rejects requests over `--rate-limit` per second with 429,
+like a hosted judge endpoint. Then sends `--calls` judge calls, `--concurrency` at a time, through
+`LLMJudgeProvider` once with single requests and once with batching, and prints throughput, latency,
+HTTP requests sent and rejected calls:
+
+    python -m scripts.bench_judge_batching --calls 2000 --concurrency 200 --rate-limit 100
+"""
+
+import argparse
+import asyncio
+import socket
+import statistics
+import time
+from typing import Any
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from app.judge.providers.llm import LLMJudgeProvider
+
+
+def _stand_in(args: argparse.Namespace, counters: dict[str, int]) -> FastAPI:
+    app = FastAPI()
+    window = {"second": 0, "used": 0}
+
+    def admitted() -> bool:
+        counters["requests"] += 1
+        second = int(time.monotonic())
+        if window["second"] != second:
+            window["second"], window["used"] = second, 0
+        window["used"] += 1
+        if window["used"] > args.rate_limit:
+            counters["rejected"] += 1
+            return False
+        return True
+
+    def output(payload: dict[str, Any]) -> dict[str, Any]:
+        score = float(payload.get("evals", {}).get("overall_score", 0.8))
+        return {
+            "action": "ALLOW_ANSWER" if score >= 0.5 else "NEED_CLARIFICATION",
+            "confidence": 0.7,
+            "reason_code": "STAND_IN",
+            "rationale": "stand-in judge",
+            "signals": {"hallucination_risk": 1.0 - score},
+        }
+
+    @app.post("/judge")
+    async def judge(request: Request):
+        if not admitted():
+            return JSONResponse({"detail": "rate limited"}, status_code=429)
+        body = await request.json()
+        await asyncio.sleep((args.base_ms + args.per_item_ms) / 1000)
+        return output(body["payload"])
+
+    @app.post("/judge/batch")
+    async def judge_batch(request: Request):
+        if not admitted():
+            return JSONResponse({"detail": "rate limited"}, status_code=429)
+        body = await request.json()
+        await asyncio.sleep((args.base_ms + args.per_item_ms * len(body["payloads"])) / 1000)
+        return {"results": [output(payload) for payload in body["payloads"]]}
+
+    return app
+
+
+async def _drive(provider: LLMJudgeProvider, args: argparse.Namespace) -> tuple[float, list[float], int]:
+    slots = asyncio.Semaphore(args.concurrency)
+    latencies: list[float] = []
+    failed = 0
+
+    async def call(i: int) -> None:
+        nonlocal failed
+        async with slots:
+            started = time.perf_counter()
+            try:
+                await provider.judge({"input_text": f"q{i}", "output_text": f"a{i}", "evals": {"overall_score": (i % 10) / 10}})
+            except Exception:
+                failed += 1
+                return
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(call(i) for i in range(args.calls)))
+    return time.perf_counter() - started, latencies, failed
+
+
+async def run_async(args: argparse.Namespace) -> None:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    counters = {"requests": 0, "rejected": 0}
+    server = uvicorn.Server(uvicorn.Config(_stand_in(args, counters), host="127.0.0.1", port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    base = f"http://127.0.0.1:{port}/judge"
+    modes = {
+        "single": LLMJudgeProvider(endpoint=base),
+        "batched": LLMJudgeProvider(
+            endpoint=base,
+            batch_endpoint=f"{base}/batch",
+            batch_max_items=args.max_items,
+            batch_max_wait_sec=args.max_wait_ms / 1000,
+        ),
+    }
+    print(
+        f"{args.calls} calls, {args.concurrency} concurrent; server {args.base_ms}+{args.per_item_ms}/item ms, "
+        f"{args.rate_limit} req/s; batches up to {args.max_items} items / {args.max_wait_ms} ms"
+    )
+    print(f"{'mode':<10}{'calls/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'http reqs':>11}{'failed':>8}")
+    for mode, provider in modes.items():
+        counters.update(requests=0, rejected=0)
+        # start on a fresh rate-limit second
+        await asyncio.sleep(1 - time.monotonic() % 1)
+        elapsed, latencies, failed = await _drive(provider, args)
+        q = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0.0] * 99
+        print(
+            f"{mode:<10}{len(latencies) / elapsed:>10,.0f}{q[49]:>10.1f}{q[98]:>10.1f}"
+            f"{counters['requests']:>11}{failed:>8}"
+        )
+        if provider.batcher is not None:
+            print(f"  batching: {provider.batcher.stats()}")
+        await provider.aclose()
+
+    server.should_exit = True
+    await serving
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--base-ms", type=float, default=50.0)
+    parser.add_argument("--per-item-ms", type=float, default=1.0)
+    parser.add_argument("--rate-limit", type=int, default=100, help="requests per second before 429")
+    parser.add_argument("--max-items", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=10.0)
+    asyncio.run(run_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    run()
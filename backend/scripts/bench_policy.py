@@ -0,0 +1,167 @@
+"""Policy evaluation microbenchmark: evaluations/sec of the compiled `PolicyEngine` against the previous
+interpreter, which re-sorted rules per engine and walked dotted paths and op names on every condition.
+
+Generates a `--rules`-rule policy over decide-shaped contexts (evals, signals, safety, request/response
+fields) where each rule rarely matches, so most evaluations walk much of the rule list, and checks both engines
+return the same result for every context. No database is needed:
+
+    python -m scripts.bench_policy --rules 200 --contexts 2000 --repeat 5
+"""
+
+import argparse
+import random
+import time
+from typing import Any
+
+from app.schemas.common import ActionEnum
+from app.services.policy_engine import EvaluatedRule, PolicyEngine
+from app.services.utils import get_nested
+
+FIELDS = {
+    "evals.overall_score": lambda rnd: rnd.random(),
+    "evals.faithfulness_score": lambda rnd: rnd.random(),
+    "signals.hallucination_risk": lambda rnd: rnd.random(),
+    "signals.financial_risk": lambda rnd: rnd.random(),
+    "signals.pii": lambda rnd: rnd.random() < 0.05,
+    "safety.category": lambda rnd: rnd.choice(["none", "self_harm", "violence", "fraud", "medical"]),
+    "request.user_tier": lambda rnd: rnd.choice(["free", "pro", "enterprise"]),
+    "request.metadata.locale": lambda rnd: rnd.choice(["en", "ko", "ja", "de", "fr"]),
+    "response.model": lambda rnd: rnd.choice(["gpt-4o", "gpt-4o-mini", "claude", "llama"]),
+    "response.text": lambda rnd: rnd.choice(["Your refund is on its way.", "Please consult a licensed advisor.", "Done."]),
+}
+
+
+class LegacyPolicyEngine:
+    """The interpreter `PolicyEngine` replaced, kept here as the baseline."""
+
+    def __init__(self, definition: dict[str, Any]):
+        self.rules = sorted(definition.get("rules", []), key=lambda x: x.get("priority", 9999))
+
+    @staticmethod
+    def _compare(op: str, actual: Any, expected: Any) -> bool:
+        if op == "eq":
+            return actual == expected
+        if op == "ne":
+            return actual != expected
+        if op == "lt":
+            return actual is not None and actual < expected
+        if op == "lte":
+            return actual is not None and actual <= expected
+        if op == "gt":
+            return actual is not None and actual > expected
+        if op == "gte":
+            return actual is not None and actual >= expected
+        if op == "contains" and isinstance(actual, str):
+            return str(expected).lower() in actual.lower()
+        if op == "in":
+            return actual in expected
+        return False
+
+    def _condition_match(self, condition: dict[str, Any], context: dict[str, Any]) -> bool:
+        field = condition.get("field")
+        actual = get_nested(context, field) if field else None
+        return self._compare(condition.get("op", "eq"), actual, condition.get("value"))
+
+    def evaluate(self, context: dict[str, Any]) -> EvaluatedRule:
+        for rule in self.rules:
+            when = rule.get("when", {})
+            all_conditions = when.get("all", [])
+            any_conditions = when.get("any", [])
+            all_ok = all(self._condition_match(c, context) for c in all_conditions) if all_conditions else True
+            any_ok = any(self._condition_match(c, context) for c in any_conditions) if any_conditions else True
+            if all_ok and any_ok:
+                then = rule.get("then", {})
+                return EvaluatedRule(
+                    matched=True,
+                    action=then.get("action", ActionEnum.ALLOW_ANSWER.value),
+                    reason_code=then.get("reason_code", "POLICY_MATCH"),
+                    severity=then.get("severity", "medium"),
+                )
+        return EvaluatedRule(matched=False, action=ActionEnum.ALLOW_ANSWER.value, reason_code="DEFAULT_ALLOW", severity="low")
+
+
+def _condition(rnd: random.Random) -> dict[str, Any]:
+    field = rnd.choice(list(FIELDS))
+    sample = FIELDS[field](rnd)
+    if isinstance(sample, float):
+        # thresholds near the edges, so a rule with several conditions rarely matches
+        if rnd.random() < 0.5:
+            return {"field": field, "op": rnd.choice(["lt", "lte"]), "value": round(rnd.uniform(0.0, 0.3), 2)}
+        return {"field": field, "op": rnd.choice(["gt", "gte"]), "value": round(rnd.uniform(0.7, 1.0), 2)}
+    if isinstance(sample, bool):
+        return {"field": field, "op": "eq", "value": True}
+    if field == "response.text":
+        return {"field": field, "op": "contains", "value": rnd.choice(["advisor", "refund", "wire transfer"])}
+    choices = sorted({FIELDS[field](rnd) for _ in range(20)})
+    if rnd.random() < 0.5:
+        return {"field": field, "op": "in", "value": rnd.sample(choices, k=max(1, len(choices) // 2)) + [f"other-{i}" for i in range(20)]}
+    return {"field": field, "op": "eq", "value": rnd.choice(choices)}
+
+
+def _policy(n_rules: int, rnd: random.Random) -> dict[str, Any]:
+    rules = []
+    for i in range(n_rules):
+        when: dict[str, Any] = {"all": [_condition(rnd) for _ in range(rnd.randint(2, 4))]}
+        if rnd.random() < 0.5:
+            when["any"] = [_condition(rnd) for _ in range(rnd.randint(1, 3))]
+        rules.append(
+            {
+                "priority": rnd.randint(1, 1000),
+                "when": when,
+                "then": {"action": rnd.choice([a.value for a in ActionEnum]), "reason_code": f"RULE_{i}", "severity": "high"},
+            }
+        )
+    return {"rules": rules}
+
+
+def _context(rnd: random.Random) -> dict[str, Any]:
+    context: dict[str, Any] = {}
+    for field, sample in FIELDS.items():
+        current = context
+        *parents, leaf = field.split(".")
+        for part in parents:
+            current = current.setdefault(part, {})
+        current[leaf] = sample(rnd)
+    return context
+
+
+def _rate(engine: Any, contexts: list[dict[str, Any]], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for context in contexts:
+            engine.evaluate(context)
+        best = min(best, time.perf_counter() - started)
+    return len(contexts) / best
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rules", type=int, default=200)
+    parser.add_argument("--contexts", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    definition = _policy(args.rules, rnd)
+    contexts = [_context(rnd) for _ in range(args.contexts)]
+
+    started = time.perf_counter()
+    compiled = PolicyEngine(definition)
+    compile_ms = (time.perf_counter() - started) * 1000
+    legacy = LegacyPolicyEngine(definition)
+    mismatches = sum(compiled.evaluate(c) != legacy.evaluate(c) for c in contexts)
+    matched = sum(compiled.evaluate(c).matched for c in contexts)
+
+    print(f"{args.rules} rules, {args.contexts} contexts ({matched} matched a rule), best of {args.repeat}")
+    print(f"compile once: {compile_ms:.2f} ms; result mismatches: {mismatches}")
+    legacy_rate = _rate(legacy, contexts, args.repeat)
+    compiled_rate = _rate(compiled, contexts, args.repeat)
+    print(f"{'engine':<14}{'evals/sec':>14}{'speedup':>10}")
+    print(f"{'legacy':<14}{legacy_rate:>14,.0f}{1.0:>10.2f}")
+    print(f"{'compiled':<14}{compiled_rate:>14,.0f}{compiled_rate / legacy_rate:>10.2f}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,151 @@
+"""Trace search benchmark on a synthetic project.
+
+Seeds one project server-side with `--events` span events (`--events-per-trace` per trace) drawn from a
+small vocabulary plus a rare "needle" word, then times the previous ILIKE search against the indexed
+`TraceService.list_traces(search=...)` for rare, common and prefix terms:
+
+    python -m scripts.bench_search --events 10000000
+    python -m scripts.bench_search --project-id <uuid>   # re-run against an already seeded project
+"""
+
+import argparse
+import asyncio
+import hashlib
+import statistics
+import time
+import uuid
+
+from sqlalchemy import Text, and_, func, or_, select, text
+
+from app.db.session import AsyncSessionLocal
+from app.models import Project, SpanEvent, Trace
+from app.services.trace_service import TraceService
+
+VOCABULARY = [
+    "refund", "invoice", "shipping", "password", "account", "discount", "warranty", "delivery",
+    "cancel", "upgrade", "billing", "coupon", "return", "exchange", "tracking", "subscription",
+]
+SEED_CHUNK_EVENTS = 1_000_000
+TERMS = [("rare", "needle"), ("common", "refund"), ("prefix", "subscr"), ("two words", "billing coupon")]
+
+
+async def _seed(events: int, per_trace: int) -> uuid.UUID:
+    vocab = "ARRAY[" + ",".join(f"'{w}'" for w in VOCABULARY) + "]"
+    n = len(VOCABULARY)
+    async with AsyncSessionLocal() as db:
+        project = Project(
+            name="search-bench",
+            api_key_hash=hashlib.sha256(f"bench-{uuid.uuid4()}".encode("utf-8")).hexdigest(),
+        )
+        db.add(project)
+        await db.commit()
+        project_id = project.id
+        seed = str(project_id)
+
+        n_traces = (events + per_trace - 1) // per_trace
+        await db.execute(
+            text(
+                f"""
+                INSERT INTO traces (id, project_id, status, start_time, attributes, input_text, output_text,
+                                    has_open_spans, total_spans, ended_spans, completion_rate, created_at)
+                SELECT md5(:seed || ':' || g)::uuid, :project_id, 'success', now() - g * interval '1 second', '{{}}'::jsonb,
+                       'question about ' || ({vocab})[1 + (g * 7) % {n}],
+                       'answer about ' || ({vocab})[1 + (g * 11) % {n}],
+                       false, 0, 0, 0, now()
+                FROM generate_series(0, :n_traces - 1) AS g
+                """
+            ),
+            {"seed": seed, "project_id": project_id, "n_traces": n_traces},
+        )
+        await db.commit()
+
+        for start in range(0, events, SEED_CHUNK_EVENTS):
+            stop = min(events, start + SEED_CHUNK_EVENTS)
+            await db.execute(
+                text(
+                    f"""
+                    INSERT INTO span_events (id, project_id, trace_id, event_type, event_time, payload,
+                                             idempotency_key, created_at)
+                    SELECT gen_random_uuid(), :project_id, md5(:seed || ':' || (g / :per_trace))::uuid, 'LOG', now(),
+                           jsonb_build_object(
+                               'message', ({vocab})[1 + (g * 13) % {n}] || ' ' || ({vocab})[1 + (g * 17) % {n}]
+                                          || CASE WHEN g % 100003 = 0 THEN ' needle' ELSE '' END,
+                               'level', 'info',
+                               'metadata', jsonb_build_object('step', g % 50)
+                           ),
+                           'bench:' || g, now()
+                    FROM generate_series(:start, :stop - 1) AS g
+                    """
+                ),
+                {"seed": seed, "project_id": project_id, "per_trace": per_trace, "start": start, "stop": stop},
+            )
+            await db.commit()
+            print(f"seeded {stop:,}/{events:,} events")
+        await db.execute(text("ANALYZE traces"))
+        await db.execute(text("ANALYZE span_events"))
+        await db.commit()
+    return project_id
+
+
+async def _ilike(db, project_id: uuid.UUID, search: str, page_size: int) -> None:
+    """The pre-index search: ILIKE over trace text and every event payload cast to text."""
+    q = select(Trace).where(
+        Trace.project_id == project_id,
+        or_(
+            Trace.input_text.ilike(f"%{search}%"),
+            Trace.output_text.ilike(f"%{search}%"),
+            Trace.id.in_(
+                select(SpanEvent.trace_id).where(
+                    and_(SpanEvent.project_id == project_id, func.cast(SpanEvent.payload, Text).ilike(f"%{search}%"))
+                )
+            ),
+        ),
+    )
+    await db.scalar(select(func.count()).select_from(q.subquery()))
+    (await db.scalars(q.order_by(Trace.start_time.desc()).limit(page_size))).all()
+
+
+async def _indexed(db, project_id: uuid.UUID, search: str, page_size: int) -> None:
+    await TraceService(db, project_id).list_traces(
+        page=1, page_size=page_size, start_time=None, end_time=None, status=None, tag=None, model=None,
+        environment=None, user_id=None, session_id=None, search=search,
+    )
+
+
+async def bench(project_id: uuid.UUID, repeat: int, page_size: int) -> None:
+    print(f"{'term':<12}{'search':<18}{'ilike p50 ms':>14}{'indexed p50 ms':>16}{'speedup':>10}")
+    async with AsyncSessionLocal() as db:
+        for label, term in TERMS:
+            timings = {}
+            for name, run in (("ilike", _ilike), ("indexed", _indexed)):
+                samples = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    await run(db, project_id, term, page_size)
+                    samples.append((time.perf_counter() - started) * 1000)
+                timings[name] = statistics.median(samples)
+            print(
+                f"{label:<12}{term:<18}{timings['ilike']:>14.1f}{timings['indexed']:>16.1f}"
+                f"{timings['ilike'] / timings['indexed']:>9.1f}x"
+            )
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=10_000_000)
+    parser.add_argument("--events-per-trace", type=int, default=50)
+    parser.add_argument("--project-id", type=uuid.UUID, default=None, help="skip seeding and reuse this project")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--page-size", type=int, default=20)
+    args = parser.parse_args()
+
+    async def main() -> None:
+        project_id = args.project_id or await _seed(args.events, args.events_per_trace)
+        print(f"project {project_id}")
+        await bench(project_id, args.repeat, args.page_size)
+
+    asyncio.run(main())
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,123 @@
+"""Ingest wire-format benchmark: bytes on the wire and server-side parse CPU per span batch.
+
+Encodes the same SDK-shaped events (span start/end, logs and LangGraph node state) with the SDK's
+encoders and decodes them the way `/api/v1/ingest/spans` does, down to a validated
+`IngestSpansRequest`. No database or server is needed:
+
+    python -m scripts.bench_wire --events 10000 --repeat 5
+"""
+
+import argparse
+import json
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import msgpack
+
+from app.api.wire import _decompress, expand_compact_spans, zstandard
+from app.schemas.ingest import IngestSpansRequest
+
+SDK_PATH = Path(__file__).resolve().parents[2] / "sdk" / "python"
+if str(SDK_PATH) not in sys.path:
+    sys.path.insert(0, str(SDK_PATH))
+
+from llm_trace_hub.wire import WireFormat, encode_request  # noqa: E402
+
+
+def _events(n_events: int, spans_per_trace: int = 25) -> list[dict]:
+    events: list[dict] = []
+    start = datetime.now(timezone.utc)
+    while len(events) < n_events:
+        trace_id = str(uuid.uuid4())
+        root_id = str(uuid.uuid4())
+        for i in range(spans_per_trace):
+            span_id = str(uuid.uuid4())
+            t0 = (start + timedelta(milliseconds=len(events))).isoformat()
+            events.append(
+                {
+                    "trace_id": trace_id,
+                    "span_id": span_id,
+                    "event_type": "SPAN_STARTED",
+                    "event_time": t0,
+                    "payload": {
+                        "name": f"node_{i % 8}",
+                        "span_type": "langgraph_node",
+                        "parent_span_id": root_id,
+                        "status": "running",
+                        "attributes": {
+                            "framework": "langgraph",
+                            "node_id": f"n{i}",
+                            "input_state": {"messages": [{"role": "user", "content": "where is my refund?"}], "step": i},
+                        },
+                        "idempotency_key": f"{trace_id}:{span_id}:start",
+                    },
+                    "idempotency_key": f"{trace_id}:{span_id}:evt:start",
+                }
+            )
+            events.append(
+                {
+                    "trace_id": trace_id,
+                    "span_id": span_id,
+                    "event_type": "LOG",
+                    "event_time": t0,
+                    "payload": {"message": "tool call", "level": "info", "metadata": {"k": 5}},
+                    "idempotency_key": f"{trace_id}:{span_id}:log:{uuid.uuid4()}",
+                }
+            )
+            events.append(
+                {
+                    "trace_id": trace_id,
+                    "span_id": span_id,
+                    "event_type": "SPAN_ENDED",
+                    "event_time": t0,
+                    "payload": {"status": "success", "error": None},
+                    "idempotency_key": f"{trace_id}:{span_id}:evt:end",
+                }
+            )
+    return events[:n_events]
+
+
+def _parse(body: bytes, headers: dict[str, str]) -> IngestSpansRequest:
+    raw = _decompress(body, headers.get("content-encoding"))
+    if headers["content-type"] == "application/json":
+        return IngestSpansRequest.model_validate(json.loads(raw))
+    return IngestSpansRequest.model_validate(expand_compact_spans(msgpack.unpackb(raw, raw=False)))
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    payload = {"events": _events(args.events), "allow_missing_parent": True}
+    formats = [
+        ("json (current)", WireFormat()),
+        ("json+gzip", WireFormat(content_encoding="gzip")),
+        ("msgpack compact", WireFormat(compact_spans=True)),
+        ("msgpack compact+gzip", WireFormat(compact_spans=True, content_encoding="gzip")),
+    ]
+    if zstandard:
+        formats.append(("msgpack compact+zstd", WireFormat(compact_spans=True, content_encoding="zstd")))
+
+    print(f"{args.events} events, best of {args.repeat}")
+    print(f"{'format':<24}{'bytes':>12}{'ratio':>8}{'encode ms':>12}{'parse cpu ms':>14}")
+    baseline = None
+    for label, wire in formats:
+        encode_ms = parse_ms = float("inf")
+        for _ in range(args.repeat):
+            started = time.process_time()
+            body, headers = encode_request(True, payload, wire)
+            encode_ms = min(encode_ms, (time.process_time() - started) * 1000)
+            started = time.process_time()
+            _parse(body, headers)
+            parse_ms = min(parse_ms, (time.process_time() - started) * 1000)
+        baseline = baseline or len(body)
+        print(f"{label:<24}{len(body):>12,}{len(body) / baseline:>8.2f}{encode_ms:>12.1f}{parse_ms:>14.1f}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,350 @@
+"""Bulk import of historical traces through COPY.
+
+    python -m scripts.bulk_import --project-id <uuid> traces.ndjson [more.ndjson.gz ...]
+
+Each line is one JSON object in an ingest API shape:
+
+    {"trace": {...}, "spans": [...]}     IngestTraceBatchRequest; may also carry "events": [...]
+    {"events": [...]}                    IngestSpansRequest
+
+Lines are parsed into chunks of about `--chunk-rows` rows, COPYed into temp staging tables and merged
+into traces/spans/span_events with set-based `INSERT ... SELECT DISTINCT ON ... ON CONFLICT DO NOTHING`,
+so rows already in the database (or repeated in the file) are skipped like the ingest API's
+idempotency keys. Like the API, batch spans get SPAN_STARTED/SPAN_ENDED events, SPAN_STARTED events
+create spans and SPAN_ENDED events close them; AMENDMENT events are stored but not applied. Span
+trees and trace counters are rebuilt per chunk, span_events partitions for the imported days are
+created on the way, and large values go to the blob store as in the API.
+
+After every committed chunk the byte offset is saved to `<file>.import-state`; running the same
+command again resumes from there (`--restart` ignores it).
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import time
+import uuid
+from datetime import date, timezone
+from typing import Any
+
+from pydantic import ValidationError
+from sqlalchemy import text
+
+from app.db.session import AsyncSessionLocal
+from app.models import Project
+from app.schemas.ingest import IngestSpansRequest, IngestTraceBatchRequest, SpanEventType
+from app.services.blob_store import EVENT_ENVELOPE_KEYS, EVENT_INLINE_KEYS, PayloadBlobs
+from app.services.partition_maintenance import MAINTENANCE_LOCK_KEY, ensure_days, list_partitions
+from app.services.trace_service import INSERT_CHUNK_SIZE, TraceService
+
+STAGING = {
+    "import_traces": (
+        "line bigint, id uuid, external_trace_id text, status text, start_time timestamptz, end_time timestamptz, "
+        "attributes jsonb, model text, environment text, user_id text, session_id text, input_text text, "
+        "output_text text, input_text_blob text, output_text_blob text, user_review_passed boolean"
+    ),
+    "import_spans": (
+        "line bigint, id uuid, trace_id uuid, parent_span_id uuid, name text, span_type text, status text, "
+        "start_time timestamptz, end_time timestamptz, error text, attributes jsonb, idempotency_key text, "
+        "emit_events boolean"
+    ),
+    "import_events": (
+        "line bigint, trace_id uuid, span_id uuid, event_type text, event_time timestamptz, payload jsonb, "
+        "idempotency_key text"
+    ),
+    "import_span_ends": "line bigint, span_id uuid, end_time timestamptz, status text, error text",
+}
+
+MERGE_TRACES = """
+INSERT INTO traces (id, project_id, external_trace_id, status, start_time, end_time, attributes, model, environment,
+                    user_id, session_id, input_text, output_text, input_text_blob, output_text_blob, user_review_passed,
+                    has_open_spans, total_spans, ended_spans, completion_rate, created_at)
+SELECT DISTINCT ON (id) id, :project_id, external_trace_id, status, start_time, end_time, attributes, model, environment,
+       user_id, session_id, input_text, output_text, input_text_blob, output_text_blob, user_review_passed,
+       false, 0, 0, 1.0, now()
+FROM import_traces
+ORDER BY id, line DESC
+ON CONFLICT DO NOTHING
+"""
+
+# New batch spans also get the SPAN_STARTED/SPAN_ENDED events the API writes for them. Paths start as
+# the span itself and are rebuilt by repair_span_tree once the chunk is in.
+MERGE_SPANS = """
+WITH new_spans AS (
+    INSERT INTO spans (id, project_id, trace_id, parent_span_id, name, span_type, status, start_time, end_time, error,
+                       attributes, idempotency_key, created_at, path, depth, child_count)
+    SELECT DISTINCT ON (s.idempotency_key) s.id, :project_id, s.trace_id, s.parent_span_id, s.name, s.span_type,
+           s.status, s.start_time, s.end_time, s.error, s.attributes, s.idempotency_key, now(), ARRAY[s.id], 0, 0
+    FROM import_spans s
+    WHERE EXISTS (SELECT 1 FROM traces t WHERE t.id = s.trace_id AND t.project_id = :project_id)
+    ORDER BY s.idempotency_key, s.line
+    ON CONFLICT DO NOTHING
+    RETURNING id, trace_id, name, status, start_time, end_time, error, attributes, idempotency_key
+),
+started AS (
+    INSERT INTO span_events (id, project_id, trace_id, span_id, event_type, event_time, payload, idempotency_key, created_at)
+    SELECT gen_random_uuid(), :project_id, n.trace_id, n.id, 'SPAN_STARTED', n.start_time,
+           jsonb_build_object('name', n.name, 'attributes', n.attributes), n.idempotency_key || '\\:start', now()
+    FROM new_spans n JOIN import_spans s ON s.id = n.id AND s.emit_events
+    ON CONFLICT DO NOTHING
+    RETURNING 1
+),
+ended AS (
+    INSERT INTO span_events (id, project_id, trace_id, span_id, event_type, event_time, payload, idempotency_key, created_at)
+    SELECT gen_random_uuid(), :project_id, n.trace_id, n.id, 'SPAN_ENDED', n.end_time,
+           jsonb_build_object('status', n.status, 'error', n.error), n.idempotency_key || '\\:end', now()
+    FROM new_spans n JOIN import_spans s ON s.id = n.id AND s.emit_events
+    WHERE n.end_time IS NOT NULL
+    ON CONFLICT DO NOTHING
+    RETURNING 1
+)
+SELECT (SELECT count(*) FROM new_spans), (SELECT count(*) FROM started) + (SELECT count(*) FROM ended)
+"""
+
+MERGE_EVENTS = """
+INSERT INTO span_events (id, project_id, trace_id, span_id, event_type, event_time, payload, idempotency_key, created_at)
+SELECT DISTINCT ON (e.idempotency_key, e.event_time) gen_random_uuid(), :project_id, e.trace_id, e.span_id,
+       e.event_type, e.event_time, e.payload, e.idempotency_key, now()
+FROM import_events e
+WHERE EXISTS (SELECT 1 FROM traces t WHERE t.id = e.trace_id AND t.project_id = :project_id)
+  AND (e.span_id IS NULL OR EXISTS (SELECT 1 FROM spans s WHERE s.id = e.span_id))
+ORDER BY e.idempotency_key, e.event_time, e.line
+ON CONFLICT DO NOTHING
+"""
+
+MERGE_SPAN_ENDS = """
+UPDATE spans s
+SET end_time = e.end_time, status = coalesce(e.status, s.status), error = coalesce(e.error, s.error)
+FROM (SELECT DISTINCT ON (span_id) span_id, end_time, status, error FROM import_span_ends ORDER BY span_id, line) e
+WHERE s.id = e.span_id AND s.project_id = :project_id AND s.end_time IS NULL
+"""
+
+
+def _json(value: Any) -> str:
+    return json.dumps(value, default=str)
+
+
+def _uuid(value: Any) -> uuid.UUID | None:
+    try:
+        return uuid.UUID(str(value)) if value else None
+    except ValueError:
+        return None
+
+
+class Chunk:
+    """Rows parsed from a run of lines, as COPY tuples per staging table."""
+
+    def __init__(self, blobs: PayloadBlobs):
+        self.blobs = blobs
+        self.rows: dict[str, list[tuple]] = {table: [] for table in STAGING}
+        self.days: set[date] = set()
+        self.trace_ids: set[uuid.UUID] = set()
+        self.rejected = 0
+        # span_id -> index into import_spans, so a later SPAN_ENDED in the chunk closes it in place
+        self._event_spans: dict[uuid.UUID, int] = {}
+
+    def __len__(self) -> int:
+        return sum(len(rows) for rows in self.rows.values())
+
+    def add_line(self, line_no: int, raw: bytes) -> None:
+        """Stage one line; a line that does not parse or validate is skipped whole and counted."""
+        try:
+            record = json.loads(raw)
+            if not isinstance(record, dict) or not ("trace" in record or "events" in record):
+                raise ValueError("expected a trace batch or an events object")
+            batch = IngestTraceBatchRequest.model_validate(record) if "trace" in record else None
+            events = IngestSpansRequest.model_validate({"events": record["events"]}) if record.get("events") else None
+        except (ValueError, ValidationError) as exc:
+            self.rejected += 1
+            print(f"line {line_no}: skipped ({str(exc).splitlines()[0]})")
+            return
+        if batch:
+            self._add_batch(line_no, batch)
+        if events:
+            self._add_events(line_no, events)
+
+    def _add_batch(self, line_no: int, batch: IngestTraceBatchRequest) -> None:
+        t = batch.trace
+        input_text, input_blob = self.blobs.offload_text(t.input_text)
+        output_text, output_blob = self.blobs.offload_text(t.output_text)
+        self.rows["import_traces"].append(
+            (
+                line_no, t.trace_id, t.external_trace_id, t.status, t.start_time, t.end_time, _json(t.attributes),
+                t.model, t.environment, t.user_id, t.session_id, input_text, output_text, input_blob, output_blob,
+                t.user_review_passed,
+            )
+        )
+        for s in batch.spans:
+            self.rows["import_spans"].append(
+                (
+                    line_no, s.span_id, s.trace_id, s.parent_span_id, s.name, s.span_type, s.status, s.start_time,
+                    s.end_time, s.error, _json(self.blobs.offload(s.attributes)), s.idempotency_key, True,
+                )
+            )
+            self.trace_ids.add(s.trace_id)
+            self.days.add(s.start_time.astimezone(timezone.utc).date())
+            if s.end_time:
+                self.days.add(s.end_time.astimezone(timezone.utc).date())
+
+    def _add_events(self, line_no: int, request: IngestSpansRequest) -> None:
+        spans = self.rows["import_spans"]
+        for e in request.events:
+            payload = self.blobs.offload(e.payload, EVENT_ENVELOPE_KEYS, EVENT_INLINE_KEYS)
+            self.rows["import_events"].append(
+                (line_no, e.trace_id, e.span_id, e.event_type.value, e.event_time, _json(payload), e.idempotency_key)
+            )
+            self.days.add(e.event_time.astimezone(timezone.utc).date())
+            if not e.span_id:
+                continue
+            self.trace_ids.add(e.trace_id)
+            if e.event_type == SpanEventType.SPAN_STARTED and e.span_id not in self._event_spans:
+                self._event_spans[e.span_id] = len(spans)
+                spans.append(
+                    (
+                        line_no, e.span_id, e.trace_id, _uuid(payload.get("parent_span_id")),
+                        payload.get("name", "span"), payload.get("span_type", "task"), payload.get("status", "running"),
+                        e.event_time, None, None, _json(payload.get("attributes", {})),
+                        payload.get("idempotency_key", e.idempotency_key), False,
+                    )
+                )
+            elif e.event_type == SpanEventType.SPAN_ENDED:
+                status, error = payload.get("status"), payload.get("error")
+                index = self._event_spans.get(e.span_id)
+                if index is None:
+                    self.rows["import_span_ends"].append((line_no, e.span_id, e.event_time, status, error))
+                else:
+                    row = list(spans[index])
+                    row[6] = status or row[6]
+                    row[8] = e.event_time
+                    row[9] = error if error is not None else row[9]
+                    spans[index] = tuple(row)
+
+
+async def _copy_rows(db, table: str, rows: list[tuple]) -> None:
+    columns = ", ".join(col.split()[0] for col in STAGING[table].split(", "))
+    raw = (await (await db.connection()).get_raw_connection()).driver_connection
+    async with raw.cursor() as cur:
+        async with cur.copy(f"COPY {table} ({columns}) FROM STDIN") as copy:
+            for row in rows:
+                await copy.write_row(row)
+
+
+async def _load_chunk(db, project_id: uuid.UUID, chunk: Chunk) -> dict[str, int]:
+    params = {"project_id": project_id}
+    conn = await db.connection()
+    if chunk.days - (await list_partitions(conn)).keys():
+        # same lock as the maintenance task, so both never create or attach the same day at once
+        await db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY})
+        await ensure_days(conn, chunk.days)
+    for table in STAGING:
+        await db.execute(text(f"TRUNCATE {table}"))
+        await _copy_rows(db, table, chunk.rows[table])
+    await chunk.blobs.flush()
+
+    traces = (await db.execute(text(MERGE_TRACES), params)).rowcount
+    spans, span_events = (await db.execute(text(MERGE_SPANS), params)).one()
+    events = (await db.execute(text(MERGE_EVENTS), params)).rowcount
+    await db.execute(text(MERGE_SPAN_ENDS), params)
+    await db.commit()
+
+    service = TraceService(db, project_id)
+    trace_ids = sorted(chunk.trace_ids)
+    for i in range(0, len(trace_ids), INSERT_CHUNK_SIZE):
+        await service.repair_span_tree(trace_ids[i : i + INSERT_CHUNK_SIZE])
+        await service.repair_trace_metrics(trace_ids[i : i + INSERT_CHUNK_SIZE])
+    return {"traces": traces, "spans": spans, "events": events + span_events}
+
+
+def _open(path: str):
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+def _load_state(state_path: str, size: int) -> dict[str, Any] | None:
+    try:
+        with open(state_path) as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return None
+    # a file that was replaced or truncated since cannot be resumed
+    return state if state.get("size") == size else None
+
+
+def _save_state(state_path: str, state: dict[str, Any]) -> None:
+    tmp = f"{state_path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, state_path)
+
+
+async def import_file(path: str, project_id: uuid.UUID, chunk_rows: int, restart: bool) -> None:
+    size = os.path.getsize(path)
+    state_path = f"{path}.import-state"
+    state = None if restart else _load_state(state_path, size)
+    if state and state.get("done"):
+        print(f"{path}: already imported ({state['lines']} lines), use --restart to import again")
+        return
+    state = state or {"size": size, "offset": 0, "lines": 0, "traces": 0, "spans": 0, "events": 0, "rejected": 0}
+    if state["offset"]:
+        print(f"{path}: resuming at line {state['lines'] + 1}")
+
+    async with AsyncSessionLocal() as db:
+        if not await db.get(Project, project_id):
+            raise SystemExit(f"project not found: {project_id}")
+        for table, columns in STAGING.items():
+            await db.execute(text(f"CREATE TEMP TABLE IF NOT EXISTS {table} ({columns})"))
+        await db.commit()
+
+        started = time.monotonic()
+        imported_events = 0
+        with _open(path) as f:
+            f.seek(state["offset"])
+            line_no = state["lines"]
+            chunk = Chunk(PayloadBlobs(project_id))
+            while True:
+                raw = f.readline()
+                if raw.strip():
+                    chunk.add_line(line_no + 1, raw)
+                if raw:
+                    line_no += 1
+                if len(chunk) < chunk_rows and raw:
+                    continue
+                counts = await _load_chunk(db, project_id, chunk)
+                state.update(
+                    offset=f.tell(),
+                    lines=line_no,
+                    traces=state["traces"] + counts["traces"],
+                    spans=state["spans"] + counts["spans"],
+                    events=state["events"] + counts["events"],
+                    rejected=state["rejected"] + chunk.rejected,
+                    done=not raw,
+                )
+                _save_state(state_path, state)
+                imported_events += counts["events"]
+                elapsed = time.monotonic() - started
+                # gzip offsets are uncompressed positions, so the percentage is only shown for plain files
+                progress = "" if path.endswith(".gz") else f" {100 * state['offset'] / max(size, 1):.1f}%"
+                print(
+                    f"{path}:{progress} lines={line_no} traces={state['traces']} spans={state['spans']} "
+                    f"events={state['events']} rejected={state['rejected']} "
+                    f"({imported_events / elapsed if elapsed else 0:,.0f} events/s)"
+                )
+                if not raw:
+                    break
+                chunk = Chunk(PayloadBlobs(project_id))
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--project-id", type=uuid.UUID, required=True)
+    parser.add_argument("--chunk-rows", type=int, default=50_000, help="staged rows per COPY/merge transaction")
+    parser.add_argument("--restart", action="store_true", help="ignore saved progress and start from the top")
+    args = parser.parse_args()
+    for path in args.files:
+        asyncio.run(import_file(path, args.project_id, args.chunk_rows, args.restart))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,139 @@
+"""Mixed ingest/read load test against a running API server.
+
+Start a single worker (`uvicorn app.main:app --workers 1`) and point this at it; run it on both
+revisions to compare latency percentiles:
+
+    python -m scripts.loadtest --base-url http://localhost:8000 --api-key <project key> \\
+        --concurrency 32 --duration 30
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+
+def _trace_payload(n_spans: int) -> dict:
+    trace_id = str(uuid.uuid4())
+    root_id = str(uuid.uuid4())
+    start = datetime.now(timezone.utc)
+    spans = [
+        {
+            "span_id": root_id,
+            "trace_id": trace_id,
+            "name": "root",
+            "span_type": "root",
+            "start_time": start.isoformat(),
+            "idempotency_key": f"load:{trace_id}:root",
+        }
+    ]
+    for i in range(n_spans - 1):
+        spans.append(
+            {
+                "span_id": str(uuid.uuid4()),
+                "trace_id": trace_id,
+                "parent_span_id": root_id,
+                "name": f"step-{i}",
+                "status": "success",
+                "start_time": (start + timedelta(milliseconds=i)).isoformat(),
+                "end_time": (start + timedelta(milliseconds=i + 1)).isoformat(),
+                "idempotency_key": f"load:{trace_id}:{i}",
+            }
+        )
+    return {"trace": {"trace_id": trace_id, "start_time": start.isoformat(), "input_text": "load"}, "spans": spans}
+
+
+async def _worker(
+    client: httpx.AsyncClient,
+    deadline: float,
+    read_ratio: float,
+    n_spans: int,
+    trace_ids: list[str],
+    latencies: dict[str, list[float]],
+    errors: dict[str, int],
+) -> None:
+    while time.perf_counter() < deadline:
+        roll = random.random()
+        if roll >= read_ratio or not trace_ids:
+            op = "ingest"
+            payload = _trace_payload(n_spans)
+            request = client.post("/api/v1/ingest/traces", json=payload)
+        elif roll < read_ratio * 0.4:
+            op = "list_traces"
+            request = client.get("/api/v1/traces", params={"page_size": 20})
+        elif roll < read_ratio * 0.7:
+            op = "trace_detail"
+            request = client.get(f"/api/v1/traces/{random.choice(trace_ids)}")
+        elif roll < read_ratio * 0.85:
+            op = "decide"
+            request = client.post(
+                "/api/v1/decide",
+                json={"response_payload": {"text": "load"}, "idempotency_key": f"load-{uuid.uuid4()}"},
+            )
+        else:
+            op = "trace_stats"
+            request = client.get("/api/v1/traces/stats/overview")
+
+        started = time.perf_counter()
+        try:
+            response = await request
+        except httpx.HTTPError:
+            errors[op] += 1
+            continue
+        latencies[op].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            errors[op] += 1
+        elif op == "ingest":
+            trace_ids.append(payload["trace"]["trace_id"])
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def main(args: argparse.Namespace) -> None:
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    trace_ids: list[str] = []
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        base_url=args.base_url, headers={"x-api-key": args.api_key}, limits=limits, timeout=60.0
+    ) as client:
+        deadline = time.perf_counter() + args.duration
+        await asyncio.gather(
+            *(
+                _worker(client, deadline, args.read_ratio, args.spans, trace_ids, latencies, errors)
+                for _ in range(args.concurrency)
+            )
+        )
+
+    print(f"{'operation':<14}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p99 ms':>10}{'req/s':>10}")
+    for op in sorted(latencies):
+        values = latencies[op]
+        print(
+            f"{op:<14}{len(values):>8}{errors[op]:>8}"
+            f"{_percentile(values, 50) * 1000:>10.1f}{_percentile(values, 99) * 1000:>10.1f}"
+            f"{len(values) / args.duration:>10.1f}"
+        )
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--api-key", required=True)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--read-ratio", type=float, default=0.7)
+    parser.add_argument("--spans", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    run()
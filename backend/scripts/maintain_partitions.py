@@ -0,0 +1,24 @@
+"""Create upcoming span_events partitions and apply retention once (the API workers also do this hourly).
+
+    python -m scripts.maintain_partitions
+"""
+
+import asyncio
+
+from app.services.partition_maintenance import maintain_partitions
+
+
+def run() -> None:
+    result = asyncio.run(maintain_partitions())
+    if result is None:
+        print("Another worker is running partition maintenance; nothing done")
+        return
+    for name in result["created"]:
+        print(f"created {name}")
+    for name in result["dropped"]:
+        print(f"dropped {name}")
+    print(f"Pruned {result['pruned_rows']} row(s) for projects with shorter retention")
+
+
+if __name__ == "__main__":
+    run()
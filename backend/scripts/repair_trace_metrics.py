@@ -0,0 +1,49 @@
+"""Recompute span rollups (total_spans, ended_spans, has_open_spans, completion_rate) and the span tree
+(path, depth, child_count) for drifted traces.
+
+    python -m scripts.repair_trace_metrics                      # every project
+    python -m scripts.repair_trace_metrics --project-id <uuid>  # one project
+    python -m scripts.repair_trace_metrics --trace-id <uuid> --trace-id <uuid>
+"""
+
+import argparse
+import asyncio
+import uuid
+
+from sqlalchemy import select
+
+from app.db.session import AsyncSessionLocal
+from app.models import Project
+from app.services.trace_service import TraceService
+
+
+async def repair(project_id: uuid.UUID | None, trace_ids: list[uuid.UUID] | None) -> None:
+    async with AsyncSessionLocal() as db:
+        if project_id:
+            project_ids = [project_id]
+        else:
+            project_ids = list((await db.scalars(select(Project.id))).all())
+
+        total = 0
+        for project_id in project_ids:
+            service = TraceService(db, project_id)
+            repaired = await service.repair_trace_metrics(trace_ids)
+            for trace_id in repaired:
+                print(f"repaired project={project_id} trace={trace_id}")
+            regrafted = await service.repair_span_tree(trace_ids)
+            for trace_id in regrafted:
+                print(f"repaired span tree project={project_id} trace={trace_id}")
+            total += len(set(repaired) | set(regrafted))
+        print(f"Repaired {total} trace(s) across {len(project_ids)} project(s)")
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--project-id", type=uuid.UUID, default=None)
+    parser.add_argument("--trace-id", type=uuid.UUID, action="append", default=None)
+    args = parser.parse_args()
+    asyncio.run(repair(args.project_id, args.trace_id))
+
+
+if __name__ == "__main__":
+    run()
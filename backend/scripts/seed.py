@@ -44,11 +44,15 @@ def run() -> None:
         db.add(trace)
         db.flush()
 
+        root_id = uuid.uuid4()
+        child_id = uuid.uuid4()
         root_span = Span(
-            id=uuid.uuid4(),
+            id=root_id,
             project_id=project.id,
             trace_id=trace_id,
             parent_span_id=None,
+            path=[root_id],
+            child_count=1,
             name="root",
             span_type="llm",
             status="success",
@@ -58,10 +62,12 @@ def run() -> None:
             idempotency_key=f"seed-root-{trace_id}",
         )
         child_span = Span(
-            id=uuid.uuid4(),
+            id=child_id,
             project_id=project.id,
             trace_id=trace_id,
-            parent_span_id=root_span.id,
+            parent_span_id=root_id,
+            path=[root_id, child_id],
+            depth=1,
             name="retrieval",
             span_type="tool",
             status="success",
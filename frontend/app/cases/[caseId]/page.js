@@ -16,7 +16,7 @@ export default async function CaseDetailPage({ params, searchParams }) {
   const projectId = qp?.project_id || "";
   const scopedHeaders = projectId ? { "x-project-id": projectId } : {};
   const data = await fetchApi(`/api/v1/cases/${caseId}`, { headers: scopedHeaders });
-  const trace = await fetchApi(`/api/v1/traces/${data.trace_id}`, { headers: scopedHeaders });
+  const trace = await fetchApi(`/api/v1/traces/${data.trace_id}?timeline_limit=1`, { headers: scopedHeaders });
 
   return (
     <div className="grid">
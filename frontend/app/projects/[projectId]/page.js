@@ -67,12 +67,13 @@ export default async function ProjectTraceDashboardPage({ params, searchParams }
   const q = new URLSearchParams(query || {});
   q.set("page", q.get("page") || "1");
   q.set("page_size", q.get("page_size") || "10");
+  q.set("count", q.get("count") || "estimate");
   const scopedHeaders = { "x-project-id": projectId };
 
   let data = { items: [], page: Number(q.get("page") || 1), page_size: 10, total: 0 };
   let stats = {
     window_hours: 24,
-    totals: { open_traces: 0, success_traces: 0, error_traces: 0 },
+    totals: { traces: 0, open_traces: 0, success_traces: 0, error_traces: 0 },
     decisions: {},
     span_types: {},
     sampled_at: new Date().toISOString(),
@@ -108,7 +109,7 @@ export default async function ProjectTraceDashboardPage({ params, searchParams }
 
   const decisions = stats.decisions || {};
   const decisionTotal = Object.values(decisions).reduce((acc, cur) => acc + Number(cur || 0), 0);
-  const totalTraces = Math.max(stats.totals.open_traces + stats.totals.success_traces + stats.totals.error_traces, 1);
+  const totalTraces = Math.max(stats.totals.traces ?? stats.totals.open_traces + stats.totals.success_traces + stats.totals.error_traces, 1);
   const errorRate = Math.round((stats.totals.error_traces / totalTraces) * 100);
   const escalationRate = Math.round((((decisions.ESCALATE || 0) + (decisions.BLOCK || 0)) / Math.max(decisionTotal, 1)) * 100);
   const p95Latency = p95(traceRows.map((r) => r.duration_ms));
@@ -229,7 +230,7 @@ export default async function ProjectTraceDashboardPage({ params, searchParams }
           ) : (
             <span className="button disabled">Prev</span>
           )}
-          <span className="subtitle">Page {data.page} / {totalPages} · Total {data.total}</span>
+          <span className="subtitle">Page {data.page} / {totalPages} · Total {data.total_is_estimate ? "≈" : ""}{data.total}</span>
           {data.page < totalPages ? (
             <Link className="button" href={`/projects/${projectId}?${nextQ.toString()}`}>Next</Link>
           ) : (
@@ -50,8 +50,14 @@ export default async function TraceNodeDetailPage({ params, searchParams }) {
   const qp = await searchParams;
   const projectId = qp?.project_id || "";
   const scopedHeaders = projectId ? { "x-project-id": projectId } : {};
-  const data = await fetchApi(`/api/v1/traces/${traceId}`, { headers: scopedHeaders });
-  const node = data.spans.find((s) => String(s.id) === String(nodeId));
+  // resolve_blobs inlines offloaded input/output states for this one node
+  const [subtree, timeline] = await Promise.all([
+    fetchApi(`/api/v1/traces/${traceId}/spans/${encodeURIComponent(nodeId)}/subtree?max_depth=0&resolve_blobs=true`, {
+      headers: scopedHeaders,
+    }).catch(() => ({ spans: [] })),
+    fetchApi(`/api/v1/traces/${traceId}/timeline?span_id=${encodeURIComponent(nodeId)}&limit=5000&resolve_blobs=true`, { headers: scopedHeaders }).catch(() => ({ items: [] })),
+  ]);
+  const node = subtree.spans.find((s) => String(s.id) === String(nodeId));
 
   if (!node) {
     return (
@@ -63,7 +69,7 @@ export default async function TraceNodeDetailPage({ params, searchParams }) {
     );
   }
 
-  const nodeTimeline = data.timeline.filter((t) => String(t.source_id || "") === String(node.id));
+  const nodeTimeline = timeline.items;
   const usage = extractUsage(node, nodeTimeline);
   const ms = durationMs(node.start_time, node.end_time);
   const sourceRef = node.attributes?.metadata?.source_ref || {};
@@ -37,10 +37,16 @@ function treeRows(spans) {
   return rows;
 }
 
+// offloaded states arrive as {"$blob": sha256, keys: [...]} references
+function stateKeys(state) {
+  if (state && state.$blob) return state.keys || [];
+  return Object.keys(state || {});
+}
+
 function stateDiffRows(nodes) {
   return nodes.map((node) => {
-    const inKeys = Object.keys(node.attributes?.input_state || {});
-    const outKeys = Object.keys(node.attributes?.output_state || {});
+    const inKeys = stateKeys(node.attributes?.input_state);
+    const outKeys = stateKeys(node.attributes?.output_state);
     const inSet = new Set(inKeys);
     const outSet = new Set(outKeys);
     const added = outKeys.filter((key) => !inSet.has(key));
@@ -216,7 +222,13 @@ export default async function TraceDetailPage({ params, searchParams }) {
   };
   let loadError = null;
   try {
-    data = await fetchApi(`/api/v1/traces/${traceId}`, { headers: scopedHeaders });
+    data = await fetchApi(`/api/v1/traces/${traceId}?timeline_limit=200`, { headers: scopedHeaders });
+    if (qp?.after) {
+      const page = await fetchApi(`/api/v1/traces/${traceId}/timeline?limit=200&after=${encodeURIComponent(qp.after)}`, {
+        headers: scopedHeaders,
+      });
+      data = { ...data, timeline: page.items, timeline_next_cursor: page.next_cursor };
+    }
   } catch (err) {
     loadError = err?.message || "failed to load trace detail";
   }
@@ -389,6 +401,13 @@ export default async function TraceDetailPage({ params, searchParams }) {
               </div>
             ))}
           </div>
+          {data.timeline_next_cursor ? (
+            <p>
+              <Link href={`/traces/${traceId}?${new URLSearchParams({ ...(projectId ? { project_id: projectId } : {}), after: data.timeline_next_cursor })}`}>
+                Next events
+              </Link>
+            </p>
+          ) : null}
         </div>
       </div>
 
@@ -1,3 +1,3 @@
-from llm_trace_hub.client import LLMTraceClient, NodeContext, SpanContext
+from llm_trace_hub.client import AsyncLLMTraceClient, LLMTraceClient, NodeContext, SpanContext
 
-__all__ = ["LLMTraceClient", "SpanContext", "NodeContext"]
+__all__ = ["LLMTraceClient", "AsyncLLMTraceClient", "SpanContext", "NodeContext"]
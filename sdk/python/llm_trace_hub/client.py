@@ -1,15 +1,33 @@
 from __future__ import annotations
 
+import asyncio
+import atexit
 import contextvars
 import inspect
+import logging
+import queue
+import threading
 import time
 import uuid
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Any
 
 import httpx
 
+from llm_trace_hub.wire import JSON_WIRE, WireFormat, encode_request, negotiate
+
+
+logger = logging.getLogger("llm_trace_hub")
+
+QUEUE_FULL_POLICIES = ("drop", "block")
+SPANS_PATH = "/api/v1/ingest/spans"
+TRACES_PATH = "/api/v1/ingest/traces"
+EVALS_PATH = "/api/v1/evals"
+FORMATS_PATH = "/api/v1/ingest/formats"
+WIRE_FORMATS = ("auto", "json")
 
 _current_trace_id: contextvars.ContextVar[str | None] = contextvars.ContextVar("trace_id", default=None)
 _current_span_id: contextvars.ContextVar[str | None] = contextvars.ContextVar("span_id", default=None)
@@ -28,7 +46,22 @@ class NodeContext:
     span_id: str
 
 
-class LLMTraceClient:
+@dataclass
+class _FlushMarker:
+    done: threading.Event | asyncio.Event
+
+
+_STOP = object()
+
+
+class _BaseTraceClient(ABC):
+    """Event builders and context handling shared by the thread and asyncio clients.
+
+    Instrumentation calls only put items on a bounded in-memory queue; a background flusher owns the
+    network. Queue items are `(path, body)` tuples; consecutive span events are coalesced into one
+    `/ingest/spans` request of up to `batch_size` events, and everything is sent in enqueue order.
+    """
+
     def __init__(
         self,
         base_url: str,
@@ -36,15 +69,28 @@ class LLMTraceClient:
         batch_size: int = 20,
         flush_interval_sec: float = 1.0,
         max_retries: int = 3,
+        max_queue_size: int = 10_000,
+        queue_full_policy: str = "drop",
+        timeout_sec: float = 5.0,
+        wire_format: str = "auto",
     ):
+        if queue_full_policy not in QUEUE_FULL_POLICIES:
+            raise ValueError(f"queue_full_policy must be one of {QUEUE_FULL_POLICIES}")
+        if wire_format not in WIRE_FORMATS:
+            raise ValueError(f"wire_format must be one of {WIRE_FORMATS}")
         self.base_url = base_url.rstrip("/")
         self.api_key = api_key
         self.batch_size = batch_size
         self.flush_interval_sec = flush_interval_sec
         self.max_retries = max_retries
-        self._queue: list[dict[str, Any]] = []
-        self._last_flush = time.time()
+        self.max_queue_size = max_queue_size
+        self.queue_full_policy = queue_full_policy
+        self.timeout_sec = timeout_sec
+        self.dropped_events = 0
+        self.failed_events = 0
         self._langgraph_nodes: dict[str, str] = {}
+        # "auto" asks the server once (first flush) which encodings it decodes
+        self._wire: WireFormat | None = None if wire_format == "auto" else JSON_WIRE
 
     @staticmethod
     def _auto_source_ref(stack_depth: int = 2) -> dict[str, Any]:
@@ -55,52 +101,61 @@ class LLMTraceClient:
             "function": frame.function,
         }
 
-    @staticmethod
-    def _raise_with_body(res: httpx.Response) -> None:
-        if res.status_code < 400:
-            return
-        body = res.text
-        raise httpx.HTTPStatusError(
-            f"{res.status_code} {res.request.method} {res.request.url} -> {body}",
-            request=res.request,
-            response=res,
-        )
-
     def _headers(self) -> dict[str, str]:
-        return {"x-api-key": self.api_key, "content-type": "application/json"}
+        return {"x-api-key": self.api_key}
 
     def _now(self) -> str:
         return datetime.now(timezone.utc).isoformat()
 
     def _enqueue(self, event: dict[str, Any]) -> None:
-        self._queue.append(event)
-        should_flush = len(self._queue) >= self.batch_size or (time.time() - self._last_flush) >= self.flush_interval_sec
-        if should_flush:
-            self.flush()
-
-    def flush(self) -> None:
-        if not self._queue:
-            return
-
-        payload = {"events": self._queue.copy(), "allow_missing_parent": True}
-        backoff = 0.5
-        last_error: Exception | None = None
+        self._submit((SPANS_PATH, event))
+
+    @abstractmethod
+    def _submit(self, item: tuple[str, dict[str, Any]]) -> None:
+        """Queue one `(path, body)` item for the flusher."""
+        raise NotImplementedError
+
+    def _requests(self, items: list[tuple[str, dict[str, Any]]]) -> Iterator[tuple[str, dict[str, Any], int]]:
+        """Yield `(path, payload, item_count)` in order, merging runs of span events."""
+        events: list[dict[str, Any]] = []
+        for path, body in items:
+            if path == SPANS_PATH:
+                events.append(body)
+                if len(events) >= self.batch_size:
+                    yield SPANS_PATH, {"events": events, "allow_missing_parent": True}, len(events)
+                    events = []
+                continue
+            if events:
+                yield SPANS_PATH, {"events": events, "allow_missing_parent": True}, len(events)
+                events = []
+            yield path, body, 1
+        if events:
+            yield SPANS_PATH, {"events": events, "allow_missing_parent": True}, len(events)
+
+    def _encode(self, path: str, payload: dict[str, Any]) -> tuple[bytes, dict[str, str]]:
+        wire = self._wire if path in (SPANS_PATH, TRACES_PATH) and self._wire else JSON_WIRE
+        return encode_request(path == SPANS_PATH, payload, wire)
+
+    def _negotiated(self, res: httpx.Response | None) -> None:
+        if res is None:
+            return  # server unreachable; stay on JSON and ask again next flush
+        self._wire = negotiate(res.json()) if res.status_code == 200 else JSON_WIRE
+
+    def _downgrade(self, res: httpx.Response) -> bool:
+        """A 415 on a negotiated encoding (e.g. server rolled back) drops to plain JSON for good."""
+        if res.status_code == 415 and self._wire not in (None, JSON_WIRE):
+            logger.info("llm_trace_hub: server rejected %s, falling back to JSON", self._wire)
+            self._wire = JSON_WIRE
+            return True
+        return False
 
-        for _ in range(self.max_retries):
-            try:
-                with httpx.Client(timeout=5.0) as client:
-                    res = client.post(f"{self.base_url}/api/v1/ingest/spans", headers=self._headers(), json=payload)
-                    self._raise_with_body(res)
-                    self._queue.clear()
-                    self._last_flush = time.time()
-                    return
-            except Exception as exc:
-                last_error = exc
-                time.sleep(backoff)
-                backoff *= 2
+    @staticmethod
+    def _retryable(res: httpx.Response) -> bool:
+        return res.status_code == 429 or res.status_code >= 500
 
-        if last_error:
-            raise last_error
+    def _give_up(self, path: str, count: int, error: Exception | str) -> None:
+        self.failed_events += count
+        logger.warning("llm_trace_hub: dropping %d item(s) for %s: %s", count, path, error)
 
     def start_trace(
         self,
@@ -112,54 +167,40 @@ class LLMTraceClient:
         session_id: str | None = None,
         attributes: dict[str, Any] | None = None,
     ) -> str:
-        last_error: Exception | None = None
-        for _ in range(max(self.max_retries, 5)):
-            trace_id = str(uuid.uuid4())
-            root_span_id = str(uuid.uuid4())
-            _current_trace_id.set(trace_id)
-            _current_span_id.set(root_span_id)
-
-            trace_payload = {
-                "trace": {
+        trace_id = str(uuid.uuid4())
+        root_span_id = str(uuid.uuid4())
+        _current_trace_id.set(trace_id)
+        _current_span_id.set(root_span_id)
+
+        trace_payload = {
+            "trace": {
+                "trace_id": trace_id,
+                "status": "running",
+                "start_time": self._now(),
+                "attributes": attributes or {"trace_name": name},
+                "model": model,
+                "environment": environment,
+                "user_id": user_id,
+                "session_id": session_id,
+                "input_text": input_text,
+            },
+            "spans": [
+                {
+                    "span_id": root_span_id,
                     "trace_id": trace_id,
+                    "parent_span_id": None,
+                    "name": name,
+                    "span_type": "root",
                     "status": "running",
                     "start_time": self._now(),
-                    "attributes": attributes or {"trace_name": name},
-                    "model": model,
-                    "environment": environment,
-                    "user_id": user_id,
-                    "session_id": session_id,
-                    "input_text": input_text,
-                },
-                "spans": [
-                    {
-                        "span_id": root_span_id,
-                        "trace_id": trace_id,
-                        "parent_span_id": None,
-                        "name": name,
-                        "span_type": "root",
-                        "status": "running",
-                        "start_time": self._now(),
-                        "attributes": attributes or {},
-                        "idempotency_key": f"{trace_id}:{root_span_id}:start",
-                    }
-                ],
-            }
-            with httpx.Client(timeout=5.0) as client:
-                res = client.post(f"{self.base_url}/api/v1/ingest/traces", headers=self._headers(), json=trace_payload)
-                if res.status_code == 409:
-                    last_error = httpx.HTTPStatusError(
-                        f"409 conflict while creating trace -> {res.text}",
-                        request=res.request,
-                        response=res,
-                    )
-                    continue
-                self._raise_with_body(res)
-                return trace_id
-
-        if last_error:
-            raise last_error
-        raise RuntimeError("failed to start trace")
+                    "attributes": attributes or {},
+                    "idempotency_key": f"{trace_id}:{root_span_id}:start",
+                }
+            ],
+        }
+        # queued ahead of this trace's span events, so the trace row exists before they are ingested
+        self._submit((TRACES_PATH, trace_payload))
+        return trace_id
 
     def start_span(self, name: str, span_type: str = "task", attributes: dict[str, Any] | None = None) -> SpanContext:
         trace_id = _current_trace_id.get()
@@ -245,9 +286,7 @@ class LLMTraceClient:
             "user_review_passed": user_review_passed,
             "idempotency_key": f"eval:{tid or span_id}:{eval_name}:{uuid.uuid4()}",
         }
-        with httpx.Client(timeout=5.0) as client:
-            res = client.post(f"{self.base_url}/api/v1/evals", headers=self._headers(), json=payload)
-            self._raise_with_body(res)
+        self._submit((EVALS_PATH, payload))
 
     def start_langgraph_run(
         self,
@@ -358,7 +397,7 @@ class LLMTraceClient:
         )
         self.end_span(status=status, error=error, span_id=span_id)
 
-    def ingest_langgraph_run(
+    def _langgraph_run_payload(
         self,
         graph_name: str,
         run_id: str,
@@ -376,9 +415,8 @@ class LLMTraceClient:
         attributes: dict[str, Any] | None = None,
         tags: list[str] | None = None,
     ) -> dict[str, Any]:
-        tid = trace_id or str(uuid.uuid4())
-        payload = {
-            "trace_id": tid,
+        return {
+            "trace_id": trace_id or str(uuid.uuid4()),
             "run_id": run_id,
             "graph_name": graph_name,
             "status": status,
@@ -395,10 +433,6 @@ class LLMTraceClient:
             "nodes": nodes,
             "allow_missing_parent": True,
         }
-        with httpx.Client(timeout=10.0) as client:
-            res = client.post(f"{self.base_url}/api/v1/ingest/langgraph-runs", headers=self._headers(), json=payload)
-            res.raise_for_status()
-            return res.json()
 
     def set_context(self, trace_id: str, span_id: str | None = None) -> None:
         _current_trace_id.set(trace_id)
@@ -409,3 +443,273 @@ class LLMTraceClient:
         if not trace_id:
             return None
         return SpanContext(trace_id=trace_id, span_id=_current_span_id.get() or "")
+
+
+class LLMTraceClient(_BaseTraceClient):
+    """Thread-based client: one keep-alive connection pool and a daemon flusher thread.
+
+    With `queue_full_policy="drop"` a full queue discards the item and counts it in `dropped_events`;
+    `"block"` makes the instrumented call wait for room. `close()` (also run at interpreter exit)
+    drains whatever is still queued.
+    """
+
+    def __init__(self, base_url: str, api_key: str, **kwargs: Any):
+        super().__init__(base_url, api_key, **kwargs)
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=self.max_queue_size)
+        self._http = httpx.Client(base_url=self.base_url, headers=self._headers(), timeout=self.timeout_sec)
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+        atexit.register(self.close)
+
+    def __enter__(self) -> LLMTraceClient:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _submit(self, item: tuple[str, dict[str, Any]]) -> None:
+        if self._closed:
+            raise RuntimeError("client is closed")
+        self._ensure_flusher()
+        if self.queue_full_policy == "block":
+            self._queue.put(item)
+            return
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped_events += 1
+
+    def _ensure_flusher(self) -> None:
+        # is_alive() also covers a forked child, where the parent's thread does not exist
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="llm-trace-hub-flusher", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        pending: list[tuple[str, dict[str, Any]]] = []
+        deadline = 0.0
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()) if pending else None)
+            except queue.Empty:
+                item = None
+            if item is None or item is _STOP or isinstance(item, _FlushMarker):
+                try:
+                    self._send(pending)
+                finally:
+                    # a flush() caller must never be left waiting, whatever happened to the batch
+                    pending = []
+                    if isinstance(item, _FlushMarker):
+                        item.done.set()
+                if item is _STOP:
+                    return
+                continue
+            if not pending:
+                deadline = time.monotonic() + self.flush_interval_sec
+            pending.append(item)
+            if len(pending) >= self.batch_size:
+                self._send(pending)
+                pending = []
+
+    def _send(self, items: list[tuple[str, dict[str, Any]]]) -> None:
+        """Never raises: a batch that cannot be sent is given up on and the flusher keeps running."""
+        if self._wire is None:
+            try:
+                self._negotiated(self._http.get(FORMATS_PATH))
+            except Exception:
+                self._negotiated(None)
+        for path, payload, count in self._requests(items):
+            try:
+                self._post(path, payload, count)
+            except Exception as exc:
+                self._give_up(path, count, exc)
+
+    def _post(self, path: str, payload: dict[str, Any], count: int) -> None:
+        backoff = 0.5
+        attempts = 0
+        while True:
+            try:
+                body, headers = self._encode(path, payload)
+                res = self._http.post(path, content=body, headers=headers)
+            except httpx.HTTPError as exc:
+                error: Exception | str = exc
+            else:
+                if res.status_code < 400:
+                    return
+                if self._downgrade(res):
+                    continue  # re-encoded as JSON; not counted as an attempt
+                error = f"{res.status_code} {res.text}"
+                if not self._retryable(res):
+                    self._give_up(path, count, error)
+                    return
+            attempts += 1
+            if attempts >= self.max_retries:
+                self._give_up(path, count, error)
+                return
+            time.sleep(backoff)
+            backoff *= 2
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Block until everything queued so far has been sent (or given up on); False on timeout."""
+        if self._closed:
+            return True
+        marker = _FlushMarker(threading.Event())
+        self._ensure_flusher()
+        self._queue.put(marker)
+        return marker.done.wait(timeout)
+
+    def close(self, timeout: float | None = 10.0) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        if self._thread and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+        self._http.close()
+
+    def ingest_langgraph_run(self, graph_name: str, run_id: str, nodes: list[dict[str, Any]], **kwargs: Any) -> dict[str, Any]:
+        """Synchronous: the caller gets the server's ingest summary back. See `_langgraph_run_payload`."""
+        payload = self._langgraph_run_payload(graph_name, run_id, nodes, **kwargs)
+        res = self._http.post("/api/v1/ingest/langgraph-runs", json=payload, timeout=max(self.timeout_sec, 10.0))
+        res.raise_for_status()
+        return res.json()
+
+
+class AsyncLLMTraceClient(_BaseTraceClient):
+    """asyncio client: `httpx.AsyncClient` plus a flusher task on the running loop.
+
+    Instrumentation calls stay synchronous and never suspend, so only the "drop" policy applies.
+    Call `await client.aclose()` (or use `async with`) before the loop shuts down.
+    """
+
+    def __init__(self, base_url: str, api_key: str, **kwargs: Any):
+        super().__init__(base_url, api_key, **kwargs)
+        if self.queue_full_policy != "drop":
+            raise ValueError('AsyncLLMTraceClient only supports queue_full_policy="drop"')
+        self._queue: asyncio.Queue[Any] = asyncio.Queue(maxsize=self.max_queue_size)
+        self._http = httpx.AsyncClient(base_url=self.base_url, headers=self._headers(), timeout=self.timeout_sec)
+        self._task: asyncio.Task[None] | None = None
+        self._closed = False
+
+    async def __aenter__(self) -> AsyncLLMTraceClient:
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    def _submit(self, item: tuple[str, dict[str, Any]]) -> None:
+        if self._closed:
+            raise RuntimeError("client is closed")
+        self._ensure_flusher()
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.dropped_events += 1
+
+    def _ensure_flusher(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="llm-trace-hub-flusher")
+
+    async def _run(self) -> None:
+        pending: list[tuple[str, dict[str, Any]]] = []
+        deadline = 0.0
+        while True:
+            try:
+                if pending:
+                    item = await asyncio.wait_for(self._queue.get(), max(0.0, deadline - time.monotonic()))
+                else:
+                    item = await self._queue.get()
+            except asyncio.TimeoutError:
+                item = None
+            if item is None or item is _STOP or isinstance(item, _FlushMarker):
+                try:
+                    await self._send(pending)
+                finally:
+                    # a flush() caller must never be left waiting, whatever happened to the batch
+                    pending = []
+                    if isinstance(item, _FlushMarker):
+                        item.done.set()
+                if item is _STOP:
+                    return
+                continue
+            if not pending:
+                deadline = time.monotonic() + self.flush_interval_sec
+            pending.append(item)
+            if len(pending) >= self.batch_size:
+                await self._send(pending)
+                pending = []
+
+    async def _send(self, items: list[tuple[str, dict[str, Any]]]) -> None:
+        """Never raises: a batch that cannot be sent is given up on and the flusher keeps running."""
+        if self._wire is None:
+            try:
+                self._negotiated(await self._http.get(FORMATS_PATH))
+            except Exception:
+                self._negotiated(None)
+        for path, payload, count in self._requests(items):
+            try:
+                await self._post(path, payload, count)
+            except Exception as exc:
+                self._give_up(path, count, exc)
+
+    async def _post(self, path: str, payload: dict[str, Any], count: int) -> None:
+        backoff = 0.5
+        attempts = 0
+        while True:
+            try:
+                body, headers = self._encode(path, payload)
+                res = await self._http.post(path, content=body, headers=headers)
+            except httpx.HTTPError as exc:
+                error: Exception | str = exc
+            else:
+                if res.status_code < 400:
+                    return
+                if self._downgrade(res):
+                    continue  # re-encoded as JSON; not counted as an attempt
+                error = f"{res.status_code} {res.text}"
+                if not self._retryable(res):
+                    self._give_up(path, count, error)
+                    return
+            attempts += 1
+            if attempts >= self.max_retries:
+                self._give_up(path, count, error)
+                return
+            await asyncio.sleep(backoff)
+            backoff *= 2
+
+    async def flush(self, timeout: float | None = None) -> bool:
+        if self._closed:
+            return True
+        marker = _FlushMarker(asyncio.Event())
+        self._ensure_flusher()
+        await self._queue.put(marker)
+        try:
+            await asyncio.wait_for(marker.done.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def aclose(self, timeout: float | None = 10.0) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self._task and not self._task.done():
+            await self._queue.put(_STOP)
+            try:
+                await asyncio.wait_for(self._task, timeout)
+            except asyncio.TimeoutError:
+                pass
+        await self._http.aclose()
+
+    async def ingest_langgraph_run(
+        self, graph_name: str, run_id: str, nodes: list[dict[str, Any]], **kwargs: Any
+    ) -> dict[str, Any]:
+        payload = self._langgraph_run_payload(graph_name, run_id, nodes, **kwargs)
+        res = await self._http.post("/api/v1/ingest/langgraph-runs", json=payload, timeout=max(self.timeout_sec, 10.0))
+        res.raise_for_status()
+        return res.json()
@@ -0,0 +1,128 @@
+"""Request encodings negotiated with the server's `GET /api/v1/ingest/formats`.
+
+Span batches go out as the compact msgpack document the server expands back into `IngestSpansRequest`
+(trace ids deduplicated into a table, binary UUIDs, integer epoch-microsecond timestamps and
+idempotency keys relative to "{trace_id}:{span_id}:"). Other ingest bodies stay JSON. Bodies above
+`COMPRESS_MIN_BYTES` are compressed with zstd when both sides have it, otherwise gzip.
+`msgpack` and `zstandard` are optional (`pip install llm-trace-hub-sdk[wire]`); without them the client
+falls back to plain or gzip-compressed JSON.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+COMPACT_SPANS_VERSION = 1
+COMPRESS_MIN_BYTES = 1024
+RELATIVE_KEY_MARKER = "\x00"
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_ONE_US = timedelta(microseconds=1)
+
+
+@dataclass(frozen=True)
+class WireFormat:
+    compact_spans: bool = False
+    content_encoding: str | None = None
+
+
+JSON_WIRE = WireFormat()
+
+
+def negotiate(formats: dict[str, Any] | None) -> WireFormat:
+    """Pick the best format both sides support from the server's `/ingest/formats` response."""
+    if not formats:
+        return JSON_WIRE
+    encodings = formats.get("content_encodings") or []
+    compact = (
+        msgpack is not None
+        and MSGPACK_CONTENT_TYPE in (formats.get("content_types") or [])
+        and formats.get("compact_spans_version") == COMPACT_SPANS_VERSION
+    )
+    if zstandard is not None and "zstd" in encodings:
+        encoding = "zstd"
+    elif "gzip" in encodings:
+        encoding = "gzip"
+    else:
+        encoding = None
+    return WireFormat(compact_spans=compact, content_encoding=encoding)
+
+
+def _relative_key(key: str, prefix: str) -> str:
+    return RELATIVE_KEY_MARKER + key[len(prefix) :] if key.startswith(prefix) else key
+
+
+def _epoch_us(value: str) -> int:
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return (dt - _EPOCH) // _ONE_US
+
+
+def encode_compact_spans(events: list[dict[str, Any]], allow_missing_parent: bool = True) -> bytes:
+    traces: dict[str, int] = {}
+    rows = []
+    for event in events:
+        # the server rebuilds relative keys from canonical UUID strings
+        trace_id = str(uuid.UUID(event["trace_id"]))
+        span_id = str(uuid.UUID(event["span_id"])) if event.get("span_id") else None
+        trace_index = traces.setdefault(trace_id, len(traces))
+        prefix = f"{trace_id}:{span_id}:"
+        payload = event.get("payload") or {}
+        if isinstance(payload.get("idempotency_key"), str):
+            payload = {**payload, "idempotency_key": _relative_key(payload["idempotency_key"], prefix)}
+        rows.append(
+            [
+                trace_index,
+                uuid.UUID(span_id).bytes if span_id else None,
+                event["event_type"],
+                _epoch_us(event["event_time"]),
+                payload,
+                _relative_key(event["idempotency_key"], prefix),
+            ]
+        )
+    doc = {
+        "v": COMPACT_SPANS_VERSION,
+        "allow_missing_parent": allow_missing_parent,
+        "traces": [uuid.UUID(trace_id).bytes for trace_id in traces],
+        "events": rows,
+    }
+    return msgpack.packb(doc, use_bin_type=True)
+
+
+def compress(body: bytes, encoding: str | None) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(body)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6)
+    return body
+
+
+def encode_request(path_is_spans: bool, payload: dict[str, Any], wire: WireFormat) -> tuple[bytes, dict[str, str]]:
+    """Return `(body, headers)` for an ingest request under the negotiated format."""
+    if path_is_spans and wire.compact_spans:
+        body = encode_compact_spans(payload["events"], payload.get("allow_missing_parent", True))
+        headers = {"content-type": MSGPACK_CONTENT_TYPE}
+    else:
+        body = json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+        headers = {"content-type": "application/json"}
+    if wire.content_encoding and len(body) >= COMPRESS_MIN_BYTES:
+        body = compress(body, wire.content_encoding)
+        headers["content-encoding"] = wire.content_encoding
+    return body, headers